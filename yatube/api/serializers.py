@@ -0,0 +1,46 @@
+"""Представление моделей posts в ответах API.
+
+Поля описаны словарями «имя — функция от объекта», чтобы клиент мог
+запросить только часть из них параметром `?fields=`.
+"""
+
+
+def _date(value) -> str:
+    return value.isoformat()
+
+
+def _image(post):
+    return post.image.url if post.image else None
+
+
+def _images(post) -> list:
+    return [
+        {"url": variant.file.url, "width": variant.width,
+         "height": variant.height}
+        for variant in post.image_variants.all()
+    ]
+
+
+POST_FIELDS = {
+    "id": lambda post: post.pk,
+    "text": lambda post: post.text,
+    "pub_date": lambda post: _date(post.pub_date),
+    "author": lambda post: post.author.username,
+    "group": lambda post: post.group.slug if post.group else None,
+    "image": _image,
+    "images": _images,
+    "comment_count": lambda post: post.comment_count,
+}
+
+COMMENT_FIELDS = {
+    "id": lambda comment: comment.pk,
+    "post": lambda comment: comment.post_id,
+    "parent": lambda comment: comment.parent_id,
+    "text": lambda comment: comment.text,
+    "pub_date": lambda comment: _date(comment.pub_date),
+    "author": lambda comment: comment.author.username,
+}
+
+
+def serialize(obj, fields, getters) -> dict:
+    return {name: getters[name](obj) for name in fields}
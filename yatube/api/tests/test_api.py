@@ -0,0 +1,90 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ApiTest(TestCase):
+    """Проверка JSON API для чтения."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.reader = User.objects.create_user(username="reader")
+        cls.group = Group.objects.create(
+            title="Группа", slug="group", description="Описание"
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, text=f"Пост {i}", group=cls.group
+            )
+            for i in range(25)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.reader, text="Комментарий"
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(ApiTest.reader)
+
+    def test_endpoints(self):
+        """Все адреса отдают страницу результатов."""
+        urls = {
+            reverse("api:posts"): 20,
+            reverse("api:group_posts", args=["group"]): 20,
+            reverse("api:profile_posts", args=["author"]): 20,
+            reverse("api:comments", args=[ApiTest.posts[0].pk]): 1,
+        }
+        for url, count in urls.items():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.json()["results"]), count)
+        response = self.reader_client.get(reverse("api:follow"))
+        self.assertEqual(len(response.json()["results"]), 20)
+        response = self.client.get(reverse("api:follow"))
+        self.assertEqual(response.status_code, 401)
+        response = self.client.get(reverse("api:group_posts", args=["none"]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_cursor_pagination(self):
+        """Ссылка next ведёт на остаток выборки без повторов."""
+        data = self.client.get(reverse("api:posts")).json()
+        self.assertIsNone(data["previous"])
+        rest = self.client.get(data["next"]).json()
+        ids = [post["id"] for post in data["results"] + rest["results"]]
+        self.assertEqual(
+            ids, [post.pk for post in reversed(ApiTest.posts)]
+        )
+        self.assertIsNone(rest["next"])
+        self.assertIsNotNone(rest["previous"])
+
+    def test_sparse_fields(self):
+        """`fields` оставляет в записях только перечисленные поля."""
+        response = self.client.get(
+            reverse("api:posts"), {"fields": "id,comment_count", "limit": 1}
+        )
+        self.assertEqual(
+            response.json()["results"],
+            [{"id": ApiTest.posts[-1].pk, "comment_count": 0}],
+        )
+        response = self.client.get(reverse("api:posts"), {"fields": "nope"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_etag(self):
+        """Неизменная страница отдаёт 304, правка поста меняет ETag."""
+        url = reverse("api:posts")
+        etag = self.client.get(url)["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.content, b"")
+        post = ApiTest.posts[-1]
+        post.text = "Новый текст"
+        post.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
@@ -0,0 +1,18 @@
+from django.urls import path
+from . import views
+
+app_name = "api"
+
+urlpatterns = [
+    path("posts/", views.posts, name="posts"),
+    path("groups/<slug:slug>/posts/", views.group_posts, name="group_posts"),
+    path(
+        "profile/<str:username>/posts/",
+        views.profile_posts,
+        name="profile_posts",
+    ),
+    path(
+        "posts/<int:post_id>/comments/", views.comments, name="comments"
+    ),
+    path("follow/", views.follow, name="follow"),
+]
@@ -0,0 +1,163 @@
+import hashlib
+import json
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers
+)
+from django.views.decorators.http import require_safe
+
+from core.paginator import CursorPaginator
+from posts import feed_cache, timeline
+from posts.models import Comment, Group, Post, User
+from .serializers import COMMENT_FIELDS, POST_FIELDS, serialize
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class ApiError(Exception):
+    def __init__(self, detail, status=400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status = status
+
+
+def api_view(view):
+    """Только GET и HEAD, ошибки — JSON вида {"detail": ...}."""
+
+    @require_safe
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except Http404:
+            return JsonResponse({"detail": "Не найдено."}, status=404)
+        except ApiError as error:
+            return JsonResponse({"detail": error.detail}, status=error.status)
+
+    return wrapper
+
+
+def get_fields(request, getters) -> list:
+    """Поля из `?fields=a,b`; без параметра — все поля."""
+    raw = request.GET.get("fields")
+    if not raw:
+        return list(getters)
+    fields = [name for name in raw.split(",") if name]
+    unknown = [name for name in fields if name not in getters]
+    if unknown or not fields:
+        raise ApiError(f"Неизвестные поля: {', '.join(unknown)}")
+    return fields
+
+
+def get_limit(request) -> int:
+    try:
+        limit = int(request.GET.get("limit", PAGE_SIZE))
+    except ValueError:
+        raise ApiError("limit должен быть числом.")
+    return min(max(limit, 1), MAX_PAGE_SIZE)
+
+
+def make_etag(page_obj, fields, date_field) -> str:
+    """Сильный ETag страницы по id и датам записей на ней.
+
+    Поколение лент меняется при правке постов и комментариев, поэтому
+    отредактированная запись с прежней датой тоже даёт новый ETag.
+    """
+    state = [
+        feed_cache.generation(),
+        fields,
+        page_obj.has_previous(),
+        page_obj.has_next(),
+        [
+            (obj.pk, getattr(obj, date_field).isoformat())
+            for obj in page_obj
+        ],
+    ]
+    raw = json.dumps(state, separators=(",", ":"))
+    return '"' + hashlib.md5(raw.encode()).hexdigest() + '"'
+
+
+def page_url(request, cursor):
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params["cursor"] = cursor
+    return request.build_absolute_uri(
+        f"{request.path}?{urlencode(sorted(params.items()))}"
+    )
+
+
+def paginated_response(
+    request, queryset, getters, ordering=("-pub_date", "-pk"),
+    date_field="pub_date",
+):
+    """Страница выборки по курсору с поддержкой If-None-Match.
+
+    При совпадении ETag ответ 304 уходит до сериализации записей.
+    """
+    fields = get_fields(request, getters)
+    paginator = CursorPaginator(queryset, get_limit(request), ordering)
+    page_obj = paginator.get_page(request.GET.get("cursor"))
+    etag = make_etag(page_obj, fields, date_field)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = JsonResponse({
+            "results": [serialize(obj, fields, getters) for obj in page_obj],
+            "next": page_url(request, page_obj.next_cursor),
+            "previous": page_url(request, page_obj.previous_cursor),
+        })
+    response["ETag"] = etag
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+@api_view
+def posts(request):
+    return paginated_response(request, Post.objects.for_feed(), POST_FIELDS)
+
+
+@api_view
+def group_posts(request, slug):
+    group = get_object_or_404(Group.objects.only("pk"), slug=slug)
+    return paginated_response(
+        request, group.posts.for_feed(), POST_FIELDS
+    )
+
+
+@api_view
+def profile_posts(request, username):
+    author = get_object_or_404(User.objects.only("pk"), username=username)
+    return paginated_response(
+        request, Post.objects.filter(author=author).for_feed(), POST_FIELDS
+    )
+
+
+@api_view
+def comments(request, post_id):
+    get_object_or_404(Post.objects.only("pk"), pk=post_id)
+    queryset = Comment.objects.filter(post_id=post_id).select_related(
+        "author"
+    )
+    return paginated_response(
+        request, queryset, COMMENT_FIELDS, ordering=("pub_date", "pk")
+    )
+
+
+@api_view
+def follow(request):
+    if not request.user.is_authenticated:
+        raise ApiError("Требуется авторизация.", status=401)
+    response = paginated_response(
+        request,
+        timeline.feed(request.user),
+        POST_FIELDS,
+        ordering=("-feed_date", "-feed_post"),
+    )
+    patch_cache_control(response, private=True)
+    patch_vary_headers(response, ["Cookie"])
+    return response
@@ -3,3 +3,11 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = "core"
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from . import checks  # noqa: F401
+        from .databases import configure_sqlite
+
+        connection_created.connect(configure_sqlite)
@@ -0,0 +1,55 @@
+from contextlib import contextmanager
+
+from django.db import connection
+
+
+def insert_rows(model, field_names, rows, ignore_conflicts=False) -> None:
+    """Вставить кортежи `rows` одним executemany по полям `field_names`.
+
+    Объекты моделей не создаются и сигналы не отправляются: для
+    миллионов строк bulk_create тратит больше времени на экземпляры,
+    чем база на вставку. Даты приводятся к формату базы здесь.
+    """
+    ops = connection.ops
+    fields = [model._meta.get_field(name) for name in field_names]
+    dates = [
+        index
+        for index, field in enumerate(fields)
+        if field.get_internal_type() == "DateTimeField"
+    ]
+    if dates:
+        rows = [list(row) for row in rows]
+        for row in rows:
+            for index in dates:
+                row[index] = fields[index].get_db_prep_value(
+                    row[index], connection
+                )
+    columns = ", ".join(ops.quote_name(field.column) for field in fields)
+    placeholders = ", ".join(["%s"] * len(fields))
+    sql = (
+        f"{ops.insert_statement(ignore_conflicts=ignore_conflicts)} "
+        f"{ops.quote_name(model._meta.db_table)} ({columns}) "
+        f"VALUES ({placeholders}) "
+        f"{ops.ignore_conflicts_suffix_sql(ignore_conflicts=ignore_conflicts)}"
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql.strip(), rows)
+
+
+@contextmanager
+def without_index(model, field_name):
+    """Снять индекс поля `field_name` на время массовой вставки.
+
+    Если строки идут не в порядке этого поля, каждая вставка правит
+    случайную страницу индекса; построить его заново одной сортировкой
+    после вставки заметно дешевле. Вызывать внутри транзакции: при
+    ошибке её откат вернёт индекс на место.
+    """
+    field = model._meta.get_field(field_name)
+    editor = connection.schema_editor()
+    name = editor._create_index_name(model._meta.db_table, [field.column])
+    with connection.cursor() as cursor:
+        cursor.execute(str(editor._delete_index_sql(model, name)))
+    yield
+    with connection.cursor() as cursor:
+        cursor.execute(str(editor._create_index_sql(model, [field])))
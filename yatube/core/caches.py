@@ -0,0 +1,42 @@
+import os
+
+BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "db": "django.core.cache.backends.db.DatabaseCache",
+    "memcached": "django.core.cache.backends.memcached.MemcachedCache",
+    "redis": "django_redis.cache.RedisCache",
+}
+DEFAULT_LOCATIONS = {
+    "locmem": "yatube",
+    "file": os.path.join("/var/tmp", "yatube_cache"),
+    "db": "yatube_cache",
+    "memcached": "127.0.0.1:11211",
+    "redis": "redis://127.0.0.1:6379/1",
+}
+
+
+def build_caches(env) -> dict:
+    """Настройка CACHES из переменных окружения.
+
+    YATUBE_CACHE — тип хранилища (locmem, file, db, memcached, redis),
+    YATUBE_CACHE_LOCATION — адрес или путь, YATUBE_CACHE_PREFIX и
+    YATUBE_CACHE_VERSION — префикс и версия ключей, их меняют при выкладке.
+    Для redis нужен пакет django-redis.
+    """
+    kind = env.get("YATUBE_CACHE", "locmem")
+    if kind not in BACKENDS:
+        raise ValueError(
+            f"Неизвестный YATUBE_CACHE={kind!r}, "
+            f"доступны: {', '.join(BACKENDS)}"
+        )
+    return {
+        "default": {
+            "BACKEND": BACKENDS[kind],
+            "LOCATION": env.get(
+                "YATUBE_CACHE_LOCATION", DEFAULT_LOCATIONS[kind]
+            ),
+            "KEY_PREFIX": env.get("YATUBE_CACHE_PREFIX", "yatube"),
+            "VERSION": int(env.get("YATUBE_CACHE_VERSION", "1")),
+        }
+    }
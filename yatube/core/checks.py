@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+
+HEALTH_CHECK_KEY = "core:health-check"
+
+
+@checks.register(checks.Tags.caches)
+def check_caches(app_configs=None, **kwargs):
+    """Проверка при запуске: каждый кэш принимает и отдаёт значение."""
+    errors = []
+    for alias in settings.CACHES:
+        cache = caches[alias]
+        try:
+            cache.set(HEALTH_CHECK_KEY, alias, 10)
+            healthy = cache.get(HEALTH_CHECK_KEY) == alias
+            cache.delete(HEALTH_CHECK_KEY)
+        except Exception as error:
+            healthy = False
+            reason = f"{type(error).__name__}: {error}"
+        else:
+            reason = "значение не сохранилось"
+        if not healthy:
+            errors.append(
+                checks.Error(
+                    f"Кэш {alias!r} недоступен ({reason}).",
+                    hint=(
+                        "Проверьте YATUBE_CACHE_LOCATION; для YATUBE_CACHE=db "
+                        "выполните manage.py createcachetable."
+                    ),
+                    id="core.E001",
+                )
+            )
+    return errors
@@ -0,0 +1,136 @@
+import os
+import sqlite3
+from contextlib import closing
+
+ENGINES = {
+    "sqlite": "django.db.backends.sqlite3",
+    "postgresql": "django.db.backends.postgresql",
+}
+# Сколько секунд держать соединение между запросами по умолчанию.
+# Открыть файл SQLite дешевле, чем держать соединения фоновых потоков.
+DEFAULT_CONN_MAX_AGE = {"sqlite": 0, "postgresql": 60}
+
+JOURNAL_MODES = ("delete", "truncate", "persist", "memory", "wal", "off")
+SYNCHRONOUS_MODES = ("off", "normal", "full", "extra")
+DEFAULT_PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "mmap_size": 256 * 1024 * 1024,
+    "busy_timeout": 5000,
+}
+
+
+def build_databases(env, base_dir) -> dict:
+    """Настройка DATABASES из переменных окружения.
+
+    YATUBE_DB — sqlite (по умолчанию) или postgresql, YATUBE_DB_NAME —
+    путь к файлу или имя базы, YATUBE_DB_USER, YATUBE_DB_PASSWORD,
+    YATUBE_DB_HOST и YATUBE_DB_PORT — доступ к серверу,
+    YATUBE_DB_CONN_MAX_AGE — сколько секунд держать соединение открытым.
+    YATUBE_DB_POOL=pgbouncer означает, что HOST и PORT указывают
+    на пул соединений в режиме транзакций: серверные курсоры
+    с ним не работают и отключаются. Для postgresql нужен psycopg2.
+    YATUBE_DB_REPLICAS — реплики для чтения через запятую: пути
+    к файлам SQLite или host[:port] серверов; они получают псевдонимы
+    replica_1, replica_2 и т. д., в тестах подменяются основной базой.
+    """
+    kind = env.get("YATUBE_DB", "sqlite")
+    if kind not in ENGINES:
+        raise ValueError(
+            f"Неизвестный YATUBE_DB={kind!r}, доступны: {', '.join(ENGINES)}"
+        )
+    config = {
+        "ENGINE": ENGINES[kind],
+        "CONN_MAX_AGE": int(
+            env.get("YATUBE_DB_CONN_MAX_AGE", DEFAULT_CONN_MAX_AGE[kind])
+        ),
+    }
+    if kind == "sqlite":
+        config["NAME"] = env.get(
+            "YATUBE_DB_NAME", os.path.join(base_dir, "db.sqlite3")
+        )
+        config["TEST"] = {"NAME": os.path.join(base_dir, "test_db.sqlite3")}
+    else:
+        config.update(
+            NAME=env.get("YATUBE_DB_NAME", "yatube"),
+            USER=env.get("YATUBE_DB_USER", "yatube"),
+            PASSWORD=env.get("YATUBE_DB_PASSWORD", ""),
+            HOST=env.get("YATUBE_DB_HOST", "127.0.0.1"),
+            PORT=env.get("YATUBE_DB_PORT", "5432"),
+        )
+        pool = env.get("YATUBE_DB_POOL", "")
+        if pool not in ("", "pgbouncer"):
+            raise ValueError(f"Неизвестный YATUBE_DB_POOL={pool!r}")
+        if pool:
+            config["DISABLE_SERVER_SIDE_CURSORS"] = True
+    databases = {"default": config}
+    locations = env.get("YATUBE_DB_REPLICAS", "").split(",")
+    for number, location in enumerate(filter(None, locations), 1):
+        replica = dict(config, TEST={"MIRROR": "default"})
+        if kind == "sqlite":
+            replica["NAME"] = location.strip()
+        else:
+            host, _, port = location.strip().partition(":")
+            replica.update(HOST=host, PORT=port or config["PORT"])
+        databases[f"replica_{number}"] = replica
+    return databases
+
+
+def build_sqlite_pragmas(env) -> dict:
+    """PRAGMA для каждого нового соединения с SQLite.
+
+    YATUBE_SQLITE_JOURNAL_MODE (wal), YATUBE_SQLITE_SYNCHRONOUS (normal),
+    YATUBE_SQLITE_MMAP_SIZE в байтах и YATUBE_SQLITE_BUSY_TIMEOUT
+    в миллисекундах. В режиме WAL читатели не ждут пишущего,
+    а synchronous=normal не вызывает fsync на каждую фиксацию.
+    """
+    pragmas = {
+        "journal_mode": env.get(
+            "YATUBE_SQLITE_JOURNAL_MODE", DEFAULT_PRAGMAS["journal_mode"]
+        ).lower(),
+        "synchronous": env.get(
+            "YATUBE_SQLITE_SYNCHRONOUS", DEFAULT_PRAGMAS["synchronous"]
+        ).lower(),
+        "mmap_size": int(
+            env.get("YATUBE_SQLITE_MMAP_SIZE", DEFAULT_PRAGMAS["mmap_size"])
+        ),
+        "busy_timeout": int(
+            env.get(
+                "YATUBE_SQLITE_BUSY_TIMEOUT", DEFAULT_PRAGMAS["busy_timeout"]
+            )
+        ),
+    }
+    if pragmas["journal_mode"] not in JOURNAL_MODES:
+        raise ValueError(
+            f"Неизвестный YATUBE_SQLITE_JOURNAL_MODE="
+            f"{pragmas['journal_mode']!r}"
+        )
+    if pragmas["synchronous"] not in SYNCHRONOUS_MODES:
+        raise ValueError(
+            f"Неизвестный YATUBE_SQLITE_SYNCHRONOUS="
+            f"{pragmas['synchronous']!r}"
+        )
+    return pragmas
+
+
+def copy_sqlite(source, target) -> None:
+    """Скопировать файл SQLite в реплику через backup API."""
+    with closing(sqlite3.connect(source)) as src:
+        with closing(sqlite3.connect(target)) as dst:
+            src.backup(dst)
+
+
+def apply_pragmas(cursor, pragmas) -> None:
+    """Выполнить PRAGMA на курсоре SQLite (Django или sqlite3)."""
+    for name, value in pragmas.items():
+        cursor.execute(f"PRAGMA {name} = {value}")
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Обработчик connection_created: настроить новое соединение SQLite."""
+    from django.conf import settings
+
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, settings.SQLITE_PRAGMAS)
@@ -0,0 +1,70 @@
+"""Чтение с реплик, запись в основную базу.
+
+Реплики перечислены в settings.DATABASE_REPLICAS. Чтение уходит
+на основную базу, если в этом потоке уже была запись (поток
+«закреплён» за основной базой, см. core.middleware) или открыта
+транзакция: внутри неё нужно видеть собственные изменения.
+Запросы, результат которых кладётся в кэш, читают с основной базы
+внутри primary(): отстающая реплика иначе положила бы в кэш старые
+строки под ключом, который уже считается свежим.
+"""
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_state = threading.local()
+
+
+def pin_primary(pinned=True) -> None:
+    """Читать в этом потоке только с основной базы (или снять это)."""
+    _state.pinned = pinned
+    _state.wrote = False
+
+
+def is_pinned() -> bool:
+    return getattr(_state, "pinned", False)
+
+
+@contextmanager
+def primary():
+    """Читать с основной базы внутри блока `with`."""
+    pinned = is_pinned()
+    _state.pinned = True
+    try:
+        yield
+    finally:
+        _state.pinned = pinned
+
+
+def wrote() -> bool:
+    """Была ли запись с последнего вызова pin_primary."""
+    return getattr(_state, "wrote", False)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            not replicas
+            or is_pinned()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        _state.pinned = True
+        _state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
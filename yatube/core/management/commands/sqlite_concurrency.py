@@ -0,0 +1,109 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.databases import apply_pragmas
+from core.profiling import percentile
+
+SEED_ROWS = 1000
+RECENT_SQL = "SELECT id, text FROM post ORDER BY id DESC LIMIT 20"
+INSERT_SQL = "INSERT INTO post (text) VALUES (?)"
+
+
+class Worker(threading.Thread):
+    """Поток, который до `deadline` читает или пишет в свою базу."""
+
+    def __init__(self, path, pragmas, deadline, write):
+        super().__init__(daemon=True)
+        self.path = path
+        self.pragmas = pragmas
+        self.deadline = deadline
+        self.write = write
+        self.latencies = []
+        self.errors = 0
+
+    def run(self):
+        db = sqlite3.connect(self.path)
+        apply_pragmas(db, self.pragmas)
+        while time.monotonic() < self.deadline:
+            started = time.perf_counter()
+            try:
+                if self.write:
+                    db.execute(INSERT_SQL, ("новый пост",))
+                    db.commit()
+                else:
+                    db.execute(RECENT_SQL).fetchall()
+            except sqlite3.OperationalError:
+                db.rollback()
+                self.errors += 1
+            else:
+                self.latencies.append(time.perf_counter() - started)
+        db.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнить одновременное чтение и запись в SQLite без настроек "
+        "и с SQLITE_PRAGMAS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seconds", type=float, default=3.0)
+        parser.add_argument("--readers", type=int, default=4)
+        parser.add_argument("--writers", type=int, default=2)
+
+    def handle(self, *args, **options):
+        modes = {"default": {}, "tuned": settings.SQLITE_PRAGMAS}
+        self.stdout.write(
+            f"{'режим':<8} {'чтений/с':>10} {'записей/с':>10} "
+            f"{'p99 чт, мс':>11} {'p99 зап, мс':>12} {'ошибок':>7}"
+        )
+        for name, pragmas in modes.items():
+            result = self.run_mode(pragmas, options)
+            self.stdout.write(
+                f"{name:<8} {result['reads_per_second']:>10.0f} "
+                f"{result['writes_per_second']:>10.0f} "
+                f"{result['read_p99_ms']:>11.2f} "
+                f"{result['write_p99_ms']:>12.2f} {result['errors']:>7}"
+            )
+
+    def run_mode(self, pragmas, options) -> dict:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "bench.sqlite3")
+            db = sqlite3.connect(path)
+            apply_pragmas(db, pragmas)
+            db.execute(
+                "CREATE TABLE post (id INTEGER PRIMARY KEY, text TEXT)"
+            )
+            db.executemany(
+                INSERT_SQL, (("пост",) for _ in range(SEED_ROWS))
+            )
+            db.commit()
+            db.close()
+            seconds = options["seconds"]
+            deadline = time.monotonic() + seconds
+            workers = [
+                Worker(path, pragmas, deadline, write=False)
+                for _ in range(options["readers"])
+            ] + [
+                Worker(path, pragmas, deadline, write=True)
+                for _ in range(options["writers"])
+            ]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        reads = [t for w in workers if not w.write for t in w.latencies]
+        writes = [t for w in workers if w.write for t in w.latencies]
+        return {
+            "reads_per_second": len(reads) / seconds,
+            "writes_per_second": len(writes) / seconds,
+            "read_p99_ms": percentile(reads, 0.99) * 1000,
+            "write_p99_ms": percentile(writes, 0.99) * 1000,
+            "errors": sum(worker.errors for worker in workers),
+        }
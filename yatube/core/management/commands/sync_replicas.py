@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.databases import ENGINES, copy_sqlite
+
+
+class Command(BaseCommand):
+    help = (
+        "Скопировать основную базу SQLite в реплики из DATABASE_REPLICAS "
+        "(замена репликации при локальной разработке)."
+    )
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES["default"]
+        if primary["ENGINE"] != ENGINES["sqlite"]:
+            raise CommandError(
+                "Реплики PostgreSQL обновляет репликация сервера."
+            )
+        for alias in settings.DATABASE_REPLICAS:
+            copy_sqlite(primary["NAME"], settings.DATABASES[alias]["NAME"])
+            self.stdout.write(f"{alias}: {settings.DATABASES[alias]['NAME']}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Обновлено реплик: {len(settings.DATABASE_REPLICAS)}."
+            )
+        )
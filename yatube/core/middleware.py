@@ -0,0 +1,92 @@
+import json
+import logging
+import random
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import db_routers, profiling
+
+logger = logging.getLogger("core.profiling")
+
+# Cookie, по которому запросы после записи читают с основной базы.
+PIN_COOKIE = "pin_primary"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class ReplicaPinMiddleware:
+    """Читать свои записи, пока реплики их догоняют.
+
+    Небезопасные запросы и запросы с cookie `pin_primary` читают
+    с основной базы. Если запрос что-то записал, ответ ставит эту
+    cookie на REPLICA_PIN_SECONDS секунд. Без реплик ничего не делает.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        db_routers.pin_primary(
+            request.method not in SAFE_METHODS
+            or PIN_COOKIE in request.COOKIES
+        )
+        try:
+            response = self.get_response(request)
+            if db_routers.wrote():
+                response.set_cookie(
+                    PIN_COOKIE,
+                    "1",
+                    max_age=settings.REPLICA_PIN_SECONDS,
+                    httponly=True,
+                    samesite="Lax",
+                )
+        finally:
+            db_routers.pin_primary(False)
+        return response
+
+
+class ProfilingMiddleware:
+    """Замеры запроса в заголовке Server-Timing и строке лога.
+
+    Профилируется доля PROFILE_SAMPLE_RATE запросов: число и время
+    SQL-запросов, повторы одного SQL (признак N+1), время шаблонов,
+    попадания и промахи кэша. При нулевой доле — одна проверка
+    на запрос. Стоит первой, чтобы видеть ответы из кэша страниц.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = settings.PROFILE_SAMPLE_RATE
+        if not rate or random.random() >= rate:
+            return self.get_response(request)
+        profile = profiling.start()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(profile.execute)
+                    )
+                response = self.get_response(request)
+        finally:
+            profiling.stop()
+        profile.finish()
+        response["Server-Timing"] = profile.server_timing()
+        match = request.resolver_match
+        logger.info(
+            json.dumps(
+                {
+                    "method": request.method,
+                    "path": request.path,
+                    "view": match.view_name if match else None,
+                    "status": response.status_code,
+                    **profile.as_dict(),
+                },
+                ensure_ascii=False,
+            )
+        )
+        return response
@@ -0,0 +1,185 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+
+
+class InvalidCursor(Exception):
+    """Курсор повреждён или не относится к этой выборке."""
+
+
+class CursorPage(Page):
+    """Страница паджинатора по ключу.
+
+    Не знает своего номера и общего числа страниц: соседние страницы
+    задаются непрозрачными курсорами `next_cursor` и `previous_cursor`.
+    """
+
+    cursor_mode = True
+
+    def __init__(
+        self, object_list, paginator, cursor, has_next, has_previous
+    ):
+        super().__init__(object_list, None, paginator)
+        self.cursor = cursor
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f"<Page cursor {self.cursor or '-'}>"
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return None
+        return self.paginator.encode_cursor(self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        return self.paginator.encode_cursor(
+            self.object_list[0], reverse=True
+        )
+
+
+class CursorPaginator(Paginator):
+    """Паджинатор по ключу (keyset) для моделей на основе CreatedModel.
+
+    Следующая страница выбирается условием по значениям сортировки
+    последней записи предыдущей, поэтому ни COUNT(*), ни OFFSET не нужны,
+    и любая по счёту страница стоит столько же, сколько первая.
+    Все поля `ordering` должны сортироваться в одном направлении,
+    последнее из них должно быть уникальным.
+    """
+
+    def __init__(self, object_list, per_page, ordering=("-pub_date", "-pk")):
+        super().__init__(object_list.order_by(*ordering), per_page)
+        self.ordering = ordering
+        self.fields = [name.lstrip("-") for name in ordering]
+        self.descending = ordering[0].startswith("-")
+
+    def encode_cursor(self, obj, reverse=False) -> str:
+        values = []
+        for name in self.fields:
+            value = getattr(obj, name)
+            if hasattr(value, "isoformat"):
+                value = value.isoformat()
+            values.append(value)
+        raw = json.dumps({"r": int(reverse), "v": values})
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            reverse, raw_values = bool(data["r"]), data["v"]
+        except (
+            binascii.Error, ValueError, TypeError, KeyError, UnicodeError
+        ):
+            raise InvalidCursor(cursor)
+        if not isinstance(raw_values, list) or (
+            len(raw_values) != len(self.fields)
+        ):
+            raise InvalidCursor(cursor)
+        values = []
+        for name, raw in zip(self.fields, raw_values):
+            try:
+                values.append(self._get_field(name).to_python(raw))
+            except (FieldDoesNotExist, ValidationError):
+                raise InvalidCursor(cursor)
+        return reverse, values
+
+    def _get_field(self, name):
+        opts = self.object_list.model._meta
+        if name == "pk":
+            return opts.pk
+        annotation = self.object_list.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return opts.get_field(name)
+
+    def _keyset_filter(self, values, reverse):
+        lookup = "lt" if self.descending != reverse else "gt"
+        condition = Q()
+        for i, name in enumerate(self.fields):
+            step = Q(**{f"{name}__{lookup}": values[i]})
+            for prev_name, prev_value in zip(self.fields[:i], values[:i]):
+                step &= Q(**{prev_name: prev_value})
+            condition |= step
+        # Лишнее на вид условие на первое поле вне OR даёт базе прочитать
+        # индекс одним диапазоном: иначе SQLite объединяет выборки
+        # по каждой ветке OR и сортирует их целиком.
+        first = Q(**{f"{self.fields[0]}__{lookup}e": values[0]})
+        return first & condition
+
+    def _reversed_ordering(self):
+        return [
+            name[1:] if name.startswith("-") else "-" + name
+            for name in self.ordering
+        ]
+
+    def get_page(self, cursor) -> CursorPage:
+        """Вернуть страницу после курсора; битый курсор даёт первую."""
+        reverse, values = False, None
+        if cursor:
+            try:
+                reverse, values = self.decode_cursor(cursor)
+            except InvalidCursor:
+                pass
+        queryset = self.object_list
+        if values is not None:
+            queryset = queryset.filter(self._keyset_filter(values, reverse))
+        if reverse:
+            queryset = queryset.order_by(*self._reversed_ordering())
+        items = list(queryset[:self.per_page + 1])
+        has_more = len(items) > self.per_page
+        items = items[:self.per_page]
+        if reverse:
+            items.reverse()
+            return CursorPage(items, self, cursor, True, has_more)
+        return CursorPage(
+            items, self, cursor, has_more, values is not None
+        )
+
+
+def paginate(
+    request,
+    object_list,
+    per_page,
+    ordering=("-pub_date", "-pk"),
+    numbered=False,
+):
+    """Страница выборки по параметрам запроса.
+
+    По умолчанию и по `?cursor=` страницы идут по ключу, без COUNT(*)
+    и OFFSET. Номерная страница `?page=N` осталась для старых ссылок
+    и для первой страницы при `numbered` — там, где нужен обычный Page
+    с номером и числом страниц. Она получает `next_cursor`, чтобы
+    переход «дальше» из шаблона шёл уже по курсору.
+    """
+    cursor_paginator = CursorPaginator(object_list, per_page, ordering)
+    number = request.GET.get("page")
+    cursor = request.GET.get("cursor")
+    if number is None and (cursor is not None or not numbered):
+        return cursor_paginator.get_page(cursor)
+    paginator = Paginator(cursor_paginator.object_list, per_page)
+    # Аннотации не меняют число строк, а COUNT по выборке с ними
+    # вычислял бы их для каждой строки во вложенном запросе.
+    paginator.count = object_list.model._default_manager.filter(
+        pk__in=object_list.values("pk")
+    ).count()
+    page_obj = paginator.get_page(number)
+    page_obj.next_cursor = None
+    if page_obj.has_next():
+        page_obj.next_cursor = cursor_paginator.encode_cursor(page_obj[-1])
+    return page_obj
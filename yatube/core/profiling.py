@@ -0,0 +1,107 @@
+"""Замеры одного запроса: SQL, шаблоны и кэш.
+
+Профиль запроса живёт в потоке, пока его обрабатывает
+core.middleware.ProfilingMiddleware. Без профиля record_cache
+и шаблоны делают одну проверку и ничего не считают.
+"""
+import threading
+import time
+from collections import Counter
+
+_local = threading.local()
+
+
+class RequestProfile:
+    """Что запрос сделал с базой, шаблонами и кэшем."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total_seconds = 0.0
+        self.queries = Counter()
+        self.query_count = 0
+        self.sql_seconds = 0.0
+        self.template_seconds = 0.0
+        self.cache = Counter()
+
+    def execute(self, execute, sql, params, many, context):
+        """Обёртка для connection.execute_wrapper."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_seconds += time.perf_counter() - started
+            self.query_count += 1
+            self.queries[sql] += 1
+
+    def record_cache(self, name, hit) -> None:
+        self.cache["hits" if hit else "misses"] += 1
+        self.cache[f"{name}.{'hit' if hit else 'miss'}"] += 1
+
+    def finish(self) -> None:
+        self.total_seconds = time.perf_counter() - self.started
+
+    @property
+    def duplicates(self) -> int:
+        """Сколько запросов повторили уже выполненный SQL.
+
+        Параметры не учитываются: так видны и циклы вида N+1,
+        где один и тот же SELECT идёт с разными id.
+        """
+        return sum(count - 1 for count in self.queries.values())
+
+    def as_dict(self) -> dict:
+        top_sql, top_count = next(
+            iter(self.queries.most_common(1)), (None, 0)
+        )
+        return {
+            "total_ms": round(self.total_seconds * 1000, 2),
+            "queries": self.query_count,
+            "sql_ms": round(self.sql_seconds * 1000, 2),
+            "duplicates": self.duplicates,
+            "top_duplicate": top_sql if top_count > 1 else None,
+            "template_ms": round(self.template_seconds * 1000, 2),
+            "cache_hits": self.cache["hits"],
+            "cache_misses": self.cache["misses"],
+        }
+
+    def server_timing(self) -> str:
+        """Значение заголовка Server-Timing."""
+        return ", ".join(
+            [
+                f'sql;dur={self.sql_seconds * 1000:.2f};'
+                f'desc="{self.query_count} queries, '
+                f'{self.duplicates} duplicates"',
+                f"tpl;dur={self.template_seconds * 1000:.2f}",
+                f'cache;desc="{self.cache["hits"]} hits, '
+                f'{self.cache["misses"]} misses"',
+                f"total;dur={self.total_seconds * 1000:.2f}",
+            ]
+        )
+
+
+def percentile(values, fraction) -> float:
+    """Значение, ниже которого лежит доля `fraction` замеров."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def start() -> RequestProfile:
+    _local.profile = RequestProfile()
+    return _local.profile
+
+
+def stop() -> None:
+    _local.profile = None
+
+
+def current():
+    return getattr(_local, "profile", None)
+
+
+def record_cache(name, hit) -> None:
+    """Отметить попадание или промах кэша `name` в профиле запроса."""
+    profile = current()
+    if profile is not None:
+        profile.record_cache(name, hit)
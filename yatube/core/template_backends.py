@@ -0,0 +1,39 @@
+import time
+
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+from . import profiling
+
+
+class ProfiledTemplate(Template):
+    """Шаблон, который прибавляет время отрисовки к профилю запроса.
+
+    Вложенные {% include %} идут мимо бэкенда и входят во время
+    внешнего шаблона, поэтому время не считается дважды.
+    """
+
+    def render(self, context=None, request=None):
+        profile = profiling.current()
+        if profile is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            profile.template_seconds += time.perf_counter() - started
+
+
+class ProfiledDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates с замером времени в core.profiling."""
+
+    def from_string(self, template_code):
+        return ProfiledTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return ProfiledTemplate(
+                self.engine.get_template(template_name), self
+            )
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
@@ -0,0 +1,53 @@
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import TestCase
+from django.utils import timezone
+
+from core.bulk import insert_rows, without_index
+from posts.models import Follow, Post
+
+User = get_user_model()
+
+
+class BulkTest(TestCase):
+    """Проверка массовой вставки строк."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username="reader")
+        cls.author = User.objects.create_user(username="author")
+
+    def test_insert_rows_converts_dates(self):
+        """Строки пишутся как есть, даты читаются обратно без сдвига."""
+        now = timezone.now()
+        insert_rows(
+            Post,
+            ("text", "author", "image", "pub_date"),
+            [("первый", self.author.pk, "", now)],
+        )
+        self.assertEqual(Post.objects.get().pub_date, now)
+
+    def test_insert_rows_ignores_conflicts(self):
+        rows = [(self.reader.pk, self.author.pk)] * 2
+        insert_rows(Follow, ("user", "author"), rows, ignore_conflicts=True)
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_index_is_restored(self):
+        """Индекс возвращается и после вставки, и после отката."""
+        def indexes():
+            with connection.cursor() as cursor:
+                return set(
+                    connection.introspection.get_constraints(
+                        cursor, Post._meta.db_table
+                    )
+                )
+
+        before = indexes()
+        with self.assertRaises(ZeroDivisionError):
+            with transaction.atomic(), without_index(Post, "author"):
+                self.assertEqual(len(indexes()), len(before) - 1)
+                1 / 0
+        self.assertEqual(indexes(), before)
+        with transaction.atomic(), without_index(Post, "author"):
+            pass
+        self.assertEqual(indexes(), before)
@@ -0,0 +1,76 @@
+import shutil
+import tempfile
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from core.caches import BACKENDS, build_caches
+from core.checks import check_caches
+
+TEMP_CACHE_DIR = tempfile.mkdtemp()
+
+
+class BuildCachesTest(SimpleTestCase):
+    """Проверка настройки кэша из переменных окружения."""
+
+    def test_default_is_locmem(self):
+        """Без переменных окружения используется LocMemCache."""
+        config = build_caches({})["default"]
+        self.assertEqual(config["BACKEND"], BACKENDS["locmem"])
+        self.assertEqual(config["KEY_PREFIX"], "yatube")
+        self.assertEqual(config["VERSION"], 1)
+
+    def test_env_selects_backend(self):
+        """YATUBE_CACHE_* задают хранилище, адрес, префикс и версию."""
+        config = build_caches(
+            {
+                "YATUBE_CACHE": "file",
+                "YATUBE_CACHE_LOCATION": TEMP_CACHE_DIR,
+                "YATUBE_CACHE_PREFIX": "release",
+                "YATUBE_CACHE_VERSION": "7",
+            }
+        )["default"]
+        self.assertEqual(config["BACKEND"], BACKENDS["file"])
+        self.assertEqual(config["LOCATION"], TEMP_CACHE_DIR)
+        self.assertEqual(config["KEY_PREFIX"], "release")
+        self.assertEqual(config["VERSION"], 7)
+
+    def test_unknown_backend(self):
+        """Неизвестный тип кэша — ошибка конфигурации."""
+        with self.assertRaises(ValueError):
+            build_caches({"YATUBE_CACHE": "nosuch"})
+
+
+class CacheHealthCheckTest(SimpleTestCase):
+    """Проверка кэша при запуске."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_CACHE_DIR, ignore_errors=True)
+
+    @override_settings(
+        CACHES=build_caches(
+            {"YATUBE_CACHE": "file", "YATUBE_CACHE_LOCATION": TEMP_CACHE_DIR}
+        )
+    )
+    def test_shared_file_cache_is_healthy(self):
+        """Файловый кэш виден из другого экземпляра бэкенда."""
+        self.assertEqual(check_caches(), [])
+        caches["default"].set("shared", "value")
+        other = caches["default"].__class__(
+            TEMP_CACHE_DIR, {"KEY_PREFIX": "yatube"}
+        )
+        self.assertEqual(other.get("shared"), "value")
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.dummy.DummyCache"
+            }
+        }
+    )
+    def test_broken_cache_reported(self):
+        """Кэш, который ничего не хранит, даёт ошибку core.E001."""
+        errors = check_caches()
+        self.assertEqual([error.id for error in errors], ["core.E001"])
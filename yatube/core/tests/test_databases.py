@@ -0,0 +1,92 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from core.databases import (
+    DEFAULT_PRAGMAS, ENGINES, build_databases, build_sqlite_pragmas,
+)
+
+
+class BuildDatabasesTest(SimpleTestCase):
+    """Проверка настройки базы из переменных окружения."""
+
+    def test_default_is_sqlite(self):
+        """Без переменных окружения — SQLite в каталоге проекта."""
+        config = build_databases({}, "/srv/yatube")["default"]
+        self.assertEqual(config["ENGINE"], ENGINES["sqlite"])
+        self.assertEqual(config["NAME"], "/srv/yatube/db.sqlite3")
+        self.assertEqual(config["CONN_MAX_AGE"], 0)
+
+    def test_postgresql_behind_pgbouncer(self):
+        """Для пула в режиме транзакций отключаются серверные курсоры."""
+        config = build_databases(
+            {
+                "YATUBE_DB": "postgresql",
+                "YATUBE_DB_HOST": "pgbouncer",
+                "YATUBE_DB_PORT": "6432",
+                "YATUBE_DB_POOL": "pgbouncer",
+            },
+            "/srv/yatube",
+        )["default"]
+        self.assertEqual(config["ENGINE"], ENGINES["postgresql"])
+        self.assertEqual(config["HOST"], "pgbouncer")
+        self.assertEqual(config["PORT"], "6432")
+        self.assertEqual(config["CONN_MAX_AGE"], 60)
+        self.assertTrue(config["DISABLE_SERVER_SIDE_CURSORS"])
+
+    def test_unknown_values(self):
+        """Неизвестные движок, пул и режимы SQLite — ошибка настройки."""
+        with self.assertRaises(ValueError):
+            build_databases({"YATUBE_DB": "oracle"}, "/srv/yatube")
+        with self.assertRaises(ValueError):
+            build_databases(
+                {"YATUBE_DB": "postgresql", "YATUBE_DB_POOL": "nosuch"},
+                "/srv/yatube",
+            )
+        with self.assertRaises(ValueError):
+            build_sqlite_pragmas({"YATUBE_SQLITE_JOURNAL_MODE": "nosuch"})
+        with self.assertRaises(ValueError):
+            build_sqlite_pragmas({"YATUBE_SQLITE_SYNCHRONOUS": "nosuch"})
+
+    def test_pragmas_from_env(self):
+        """YATUBE_SQLITE_* переопределяют PRAGMA по умолчанию."""
+        self.assertEqual(build_sqlite_pragmas({}), DEFAULT_PRAGMAS)
+        pragmas = build_sqlite_pragmas(
+            {
+                "YATUBE_SQLITE_JOURNAL_MODE": "DELETE",
+                "YATUBE_SQLITE_BUSY_TIMEOUT": "100",
+            }
+        )
+        self.assertEqual(pragmas["journal_mode"], "delete")
+        self.assertEqual(pragmas["busy_timeout"], 100)
+
+
+class SqlitePragmasTest(TestCase):
+    """Новое соединение с SQLite получает PRAGMA из настроек."""
+
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_connection_is_tuned(self):
+        if connection.vendor != "sqlite" or connection.is_in_memory_db():
+            self.skipTest("нужна SQLite в файле")
+        self.assertEqual(self.pragma("journal_mode"), "wal")
+        # synchronous=NORMAL хранится как 1.
+        self.assertEqual(self.pragma("synchronous"), 1)
+        self.assertEqual(self.pragma("busy_timeout"), 5000)
+
+    def test_concurrency_benchmark(self):
+        """Замер выводит строку для каждого режима."""
+        out = StringIO()
+        call_command(
+            "sqlite_concurrency", seconds=0.2, readers=1, writers=1,
+            stdout=out,
+        )
+        lines = out.getvalue().splitlines()
+        self.assertEqual(
+            [line.split()[0] for line in lines[1:]], ["default", "tuned"]
+        )
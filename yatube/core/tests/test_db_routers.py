@@ -0,0 +1,118 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+from contextlib import closing
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core import db_routers
+from core.databases import build_databases, copy_sqlite
+from core.middleware import PIN_COOKIE, ReplicaPinMiddleware
+from posts.models import Post
+
+router = db_routers.PrimaryReplicaRouter()
+
+
+@override_settings(DATABASE_REPLICAS=["replica_1"], REPLICA_PIN_SECONDS=5)
+class PrimaryReplicaRouterTest(SimpleTestCase):
+    """Чтение с реплики и закрепление за основной базой после записи."""
+
+    def setUp(self):
+        db_routers.pin_primary(False)
+        self.factory = RequestFactory()
+
+    def tearDown(self):
+        db_routers.pin_primary(False)
+
+    def test_reads_go_to_replica_until_write(self):
+        self.assertEqual(router.db_for_read(Post), "replica_1")
+        self.assertEqual(router.db_for_write(Post), "default")
+        self.assertEqual(router.db_for_read(Post), "default")
+
+    def test_primary_block(self):
+        """Внутри primary() чтение идёт с основной базы."""
+        with db_routers.primary():
+            self.assertEqual(router.db_for_read(Post), "default")
+            with db_routers.primary():
+                pass
+            self.assertEqual(router.db_for_read(Post), "default")
+        self.assertEqual(router.db_for_read(Post), "replica_1")
+        self.assertFalse(db_routers.wrote())
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        self.assertEqual(router.db_for_read(Post), "default")
+
+    def run_request(self, request, write=False):
+        seen = {}
+
+        def view(request):
+            seen["pinned"] = db_routers.is_pinned()
+            if write:
+                router.db_for_write(Post)
+            return HttpResponse()
+
+        response = ReplicaPinMiddleware(view)(request)
+        return seen["pinned"], response
+
+    def test_write_sets_pin_cookie(self):
+        """После записи ответ закрепляет пользователя за основной базой."""
+        pinned, response = self.run_request(
+            self.factory.post("/create/"), write=True
+        )
+        self.assertTrue(pinned)
+        self.assertEqual(response.cookies[PIN_COOKIE]["max-age"], 5)
+        self.assertFalse(db_routers.is_pinned())
+
+    def test_pin_cookie_reads_primary(self):
+        """Запросы с cookie читают с основной базы, без неё — с реплики."""
+        pinned, response = self.run_request(self.factory.get("/"))
+        self.assertFalse(pinned)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        request = self.factory.get("/")
+        request.COOKIES[PIN_COOKIE] = "1"
+        pinned, _ = self.run_request(request)
+        self.assertTrue(pinned)
+
+
+class SqliteReplicaTest(SimpleTestCase):
+    """Основная база и реплика — два файла SQLite."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_replica_aliases(self):
+        replica = os.path.join(self.directory, "replica.sqlite3")
+        databases = build_databases(
+            {"YATUBE_DB_REPLICAS": replica}, self.directory
+        )
+        self.assertEqual(list(databases), ["default", "replica_1"])
+        self.assertEqual(databases["replica_1"]["NAME"], replica)
+        self.assertEqual(
+            databases["replica_1"]["TEST"], {"MIRROR": "default"}
+        )
+
+    def test_postgresql_replica_hosts(self):
+        databases = build_databases(
+            {"YATUBE_DB": "postgresql", "YATUBE_DB_REPLICAS": "r1,r2:6432"},
+            self.directory,
+        )
+        self.assertEqual(databases["replica_1"]["PORT"], "5432")
+        self.assertEqual(databases["replica_2"]["HOST"], "r2")
+        self.assertEqual(databases["replica_2"]["PORT"], "6432")
+
+    def test_copy_sqlite(self):
+        """Реплика видит данные основной базы только после копирования."""
+        primary = os.path.join(self.directory, "primary.sqlite3")
+        replica = os.path.join(self.directory, "replica.sqlite3")
+        with closing(sqlite3.connect(primary)) as db:
+            db.execute("CREATE TABLE post (text TEXT)")
+            db.execute("INSERT INTO post VALUES ('пост')")
+            db.commit()
+        copy_sqlite(primary, replica)
+        with closing(sqlite3.connect(replica)) as db:
+            rows = db.execute("SELECT text FROM post").fetchall()
+        self.assertEqual(rows, [("пост",)])
@@ -0,0 +1,57 @@
+import json
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core.profiling import RequestProfile
+
+SELECT_AUTHOR = "SELECT * FROM auth_user WHERE id = %s"
+
+
+class RequestProfileTest(SimpleTestCase):
+    def test_duplicates_ignore_params(self):
+        """Один SQL с разными параметрами — повтор, как в N+1."""
+        profile = RequestProfile()
+        for pk in (1, 2, 3):
+            profile.execute(
+                lambda *args: None, SELECT_AUTHOR, [pk], False, {}
+            )
+        profile.execute(lambda *args: None, "SELECT 1", [], False, {})
+        profile.finish()
+        data = profile.as_dict()
+        self.assertEqual(data["queries"], 4)
+        self.assertEqual(data["duplicates"], 2)
+        self.assertEqual(data["top_duplicate"], SELECT_AUTHOR)
+        self.assertIn(
+            'desc="4 queries, 2 duplicates"', profile.server_timing()
+        )
+
+
+class ProfilingMiddlewareTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(PROFILE_SAMPLE_RATE=0)
+    def test_disabled(self):
+        response = self.client.get("/")
+        self.assertNotIn("Server-Timing", response)
+
+    @override_settings(PROFILE_SAMPLE_RATE=1)
+    def test_sampled_request(self):
+        """Server-Timing и строка лога с SQL, шаблонами и кэшем."""
+        with self.assertLogs("core.profiling", "INFO") as logs:
+            response = self.client.get("/")
+            cached = self.client.get("/")
+        self.assertIn("sql;dur=", response["Server-Timing"])
+        self.assertIn("tpl;dur=", response["Server-Timing"])
+        first, second = [
+            json.loads(record.getMessage()) for record in logs.records
+        ]
+        self.assertEqual(first["view"], "posts:index")
+        self.assertEqual(first["status"], 200)
+        self.assertGreater(first["queries"], 0)
+        self.assertGreater(first["template_ms"], 0)
+        self.assertGreater(first["cache_misses"], 0)
+        self.assertEqual(second["queries"], 0)
+        self.assertEqual(second["cache_hits"], 1)
+        self.assertIn('cache;desc="1 hits', cached["Server-Timing"])
@@ -1,5 +1,9 @@
+from datetime import datetime, timezone
+
 from django.contrib import admin
 from .models import Post, Group, Follow, Comment
+from . import group_cache, thumbnails
+from .search import get_backend
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -15,8 +19,53 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ("pub_date",)
     empty_value_display = "-пусто-"
 
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по тексту через полнотекстовый индекс постов."""
+        if not search_term:
+            return queryset, False
+        return get_backend().filter(queryset, search_term), False
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if "image" in form.changed_data:
+            thumbnails.schedule(obj)
+
+
+class GroupAdmin(admin.ModelAdmin):
+    list_display = ("title", "slug")
+    search_fields = ("title", "slug")
+
+    def get_list_display(self, request):
+        """Колонка посещений по счётчикам, собранным раз на запрос.
+
+        Админка вызывает его за запрос не однажды, поэтому счётчики
+        запоминаются в самом запросе.
+        """
+        if not hasattr(request, "group_visits"):
+            request.group_visits = group_cache.traffic.counts()
+
+        def visits(obj):
+            return request.group_visits[obj.slug]
+
+        visits.short_description = (
+            f"Посещений за {group_cache.TRAFFIC_BUCKETS} мин"
+        )
+        return (*super().get_list_display(request), visits)
+
+    def changelist_view(self, request, extra_context=None):
+        """Список групп с долей попаданий прогрева в кэш."""
+        stats = group_cache.warm_stats()
+        if stats["hit_rate"] is not None:
+            stats["hit_percent"] = round(stats["hit_rate"] * 100, 1)
+        if stats["last"] is not None:
+            stats["last"]["at"] = datetime.fromtimestamp(
+                stats["last"]["at"], timezone.utc
+            )
+        extra_context = dict(extra_context or {}, warm_stats=stats)
+        return super().changelist_view(request, extra_context)
+
 
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
+admin.site.register(Group, GroupAdmin)
 admin.site.register(Follow)
 admin.site.register(Comment)
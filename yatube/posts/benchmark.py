@@ -0,0 +1,224 @@
+"""Замеры задержки и числа SQL-запросов для каждого адреса posts.urls.
+
+Запросы идут через тестовый клиент Django в том же процессе, поэтому
+в задержку входят представления, шаблоны, кэш и middleware, но не
+сеть и не WSGI-сервер. Записи, которые делает фоновый поток
+(см. posts.write_batch), в число запросов не попадают.
+"""
+import time
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.profiling import percentile
+from .models import Group, Post, User
+from .urls import urlpatterns
+
+# user — кто делает запрос: "reader" (читатель с подписками)
+# или "author" (автор поста со страницы post_detail).
+Case = namedtuple("Case", ["name", "method", "url", "data", "user"])
+
+
+def url_names() -> set:
+    return {pattern.name for pattern in urlpatterns}
+
+
+def build_cases(prefix) -> tuple:
+    """Запросы ко всем адресам posts.urls на данных с префиксом `prefix`.
+
+    Берутся самая населённая группа, пост с наибольшим числом
+    комментариев и читатель с наибольшим числом подписок: замер идёт
+    по самым тяжёлым страницам. Возвращает (запросы, пользователи).
+    """
+    group = (
+        Group.objects.filter(slug__startswith=prefix)
+        .annotate(total=Count("posts"))
+        .order_by("-total", "pk")
+        .first()
+    )
+    post = (
+        Post.objects.filter(author__username__startswith=prefix)
+        .annotate(total=Count("comments"))
+        .order_by("-total", "pk")
+        .select_related("author")
+        .first()
+    )
+    author = post.author
+    seeded_users = User.objects.filter(username__startswith=prefix).exclude(
+        pk=author.pk
+    )
+    reader = (
+        seeded_users.annotate(total=Count("follower"))
+        .order_by("-total", "pk")
+        .first()
+    )
+    authors = list(
+        seeded_users.exclude(pk=reader.pk)
+        .order_by("pk")
+        .values_list("username", flat=True)[:10]
+    )
+    cases = [
+        Case("index", "get", reverse("posts:index"), None, "reader"),
+        Case("trending", "get", reverse("posts:trending"), None, "reader"),
+        Case(
+            "group_posts",
+            "get",
+            reverse("posts:group_posts", args=[group.slug]),
+            None,
+            "reader",
+        ),
+        Case(
+            "profile",
+            "get",
+            reverse("posts:profile", args=[author.username]),
+            None,
+            "reader",
+        ),
+        Case(
+            "post_detail",
+            "get",
+            reverse("posts:post_detail", args=[post.pk]),
+            None,
+            "reader",
+        ),
+        Case(
+            "post_create", "get", reverse("posts:post_create"), None, "reader"
+        ),
+        Case(
+            "post_edit",
+            "get",
+            reverse("posts:post_edit", args=[post.pk]),
+            None,
+            "author",
+        ),
+        Case(
+            "add_comment",
+            "post",
+            reverse("posts:add_comment", args=[post.pk]),
+            {"text": "Комментарий для замера"},
+            "reader",
+        ),
+        Case(
+            "post_comments",
+            "get",
+            reverse("posts:post_comments", args=[post.pk]) + "?order=newest",
+            None,
+            "reader",
+        ),
+        Case(
+            "follow_index", "get", reverse("posts:follow_index"), None,
+            "reader",
+        ),
+        Case(
+            "follow_many",
+            "post",
+            reverse("posts:follow_many"),
+            {"author": authors},
+            "reader",
+        ),
+        Case(
+            "search",
+            "get",
+            reverse("posts:search") + f"?q={post.text.split()[0]}",
+            None,
+            "reader",
+        ),
+        Case(
+            "profile_follow",
+            "get",
+            reverse("posts:profile_follow", args=[author.username]),
+            None,
+            "reader",
+        ),
+        Case(
+            "profile_unfollow",
+            "get",
+            reverse("posts:profile_unfollow", args=[author.username]),
+            None,
+            "reader",
+        ),
+    ]
+    return cases, {"reader": reader, "author": author}
+
+
+def measure(client, case, repeat, warmup=0, cold=False) -> dict:
+    """Выполнить запрос `warmup + repeat` раз и свести замеры.
+
+    При `cold` кэш очищается перед каждым запросом.
+    """
+    latencies = []
+    queries = []
+    status = None
+    for attempt in range(warmup + repeat):
+        if cold:
+            cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = getattr(client, case.method)(case.url, case.data)
+            elapsed = time.perf_counter() - started
+        status = response.status_code
+        if attempt >= warmup:
+            latencies.append(elapsed)
+            queries.append(len(captured))
+    return {
+        "method": case.method.upper(),
+        "url": case.url,
+        "status": status,
+        "requests": repeat,
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 3),
+        "p90_ms": round(percentile(latencies, 0.9) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "queries_p50": percentile(queries, 0.5),
+        "queries_max": max(queries),
+    }
+
+
+def run(prefix, repeat, warmup=0, cold=False) -> dict:
+    """Замеры всех адресов posts.urls: {имя адреса: результат}."""
+    cases, users = build_cases(prefix)
+    missing = url_names() - {case.name for case in cases}
+    if missing:
+        raise ValueError(
+            f"Нет замера для адресов: {', '.join(sorted(missing))}"
+        )
+    clients = {}
+    for role, user in users.items():
+        clients[role] = Client()
+        clients[role].force_login(user)
+    return {
+        case.name: measure(clients[case.user], case, repeat, warmup, cold)
+        for case in cases
+    }
+
+
+def compare(old, new, threshold=0.1) -> list:
+    """Строки сравнения двух прогонов; `!` отмечает регрессию.
+
+    Регрессия — рост p50 больше чем на `threshold` или рост числа
+    запросов.
+    """
+    lines = []
+    for name, result in new.items():
+        before = old.get(name)
+        if before is None:
+            lines.append(f"  {name}: новый адрес")
+            continue
+        change = (
+            result["p50_ms"] / before["p50_ms"] - 1 if before["p50_ms"] else 0
+        )
+        worse = (
+            change > threshold
+            or result["queries_p50"] > before["queries_p50"]
+        )
+        lines.append(
+            f"{'!' if worse else ' '} {name}: p50 {before['p50_ms']:.2f} → "
+            f"{result['p50_ms']:.2f} мс ({change:+.0%}), запросов "
+            f"{before['queries_p50']} → {result['queries_p50']}"
+        )
+    return lines
@@ -0,0 +1,105 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers
+)
+from django.utils.http import http_date
+
+from . import feed_cache, timeline
+from .models import Follow
+
+
+def timeline_state(request) -> int:
+    """Версия ленты подписок читателя (см. posts.timeline.version).
+
+    Подписка и отписка не меняют поколение лент, поэтому ETag ленты
+    подписок учитывает её состояние отдельно.
+    """
+    return timeline.version(request.user.pk)
+
+
+def follow_state(request, username=None):
+    """Подписан ли вошедший читатель на автора `username`.
+
+    Кнопка подписки на странице автора зависит от этого, а подписка
+    и отписка поколение лент не меняют. Для анонима — None.
+    """
+    if not request.user.is_authenticated:
+        return None
+    return Follow.objects.filter(
+        user=request.user, author__username=username
+    ).exists()
+
+
+def page_etag(request, state=None) -> str:
+    """ETag страницы без обращения к постам.
+
+    Любая запись поста, комментария или группы меняет поколение лент,
+    так что его достаточно для общих страниц. Страница вошедшего
+    пользователя зависит от него самого и от CSRF-токена в формах.
+    """
+    parts = [
+        feed_cache.generation(),
+        request.get_full_path(),
+        state,
+    ]
+    if request.user.is_authenticated:
+        parts += [
+            request.user.pk,
+            request.COOKIES.get(settings.CSRF_COOKIE_NAME),
+        ]
+    raw = repr(parts).encode()
+    return '"' + hashlib.md5(raw).hexdigest() + '"'
+
+
+def conditional_page(state_func=None):
+    """ETag, Last-Modified и Cache-Control для HTML-страницы.
+
+    Валидаторы считаются до вызова представления, и совпавший
+    If-None-Match или If-Modified-Since отдаёт 304 без шаблонов.
+    Анонимные ответы одинаковы для всех и разрешены общим кэшам
+    на PROXY_CACHE_MAX_AGE секунд, ответы вошедшему — только браузеру.
+    `state_func(request, **kwargs)` добавляет в ETag состояние, которое
+    не отражено в поколении лент; если оно не None, Last-Modified
+    не отправляется.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view(request, *args, **kwargs)
+            state = None
+            if state_func is not None:
+                state = state_func(request, **kwargs)
+            etag = page_etag(request, state)
+            last_modified = None
+            if state is None:
+                last_modified = int(feed_cache.changed_at())
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+            if request.user.is_authenticated:
+                patch_cache_control(response, private=True, no_cache=True)
+            else:
+                patch_cache_control(
+                    response,
+                    public=True,
+                    max_age=0,
+                    s_maxage=settings.PROXY_CACHE_MAX_AGE,
+                )
+            patch_vary_headers(response, ["Cookie"])
+            return response
+
+        return wrapper
+
+    return decorator
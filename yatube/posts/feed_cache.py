@@ -0,0 +1,106 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from core import db_routers, profiling
+from core.paginator import paginate
+
+GENERATION_KEY = "feeds:generation"
+CHANGED_KEY = "feeds:changed"
+# Ключи поколения хранятся без срока.
+FEED_CACHE_TIMEOUT = None
+# Страницы лент вытесняет смена поколения; срок — страховка на случай,
+# если страница всё же попала в кэш со старыми строками.
+FEED_PAGE_TIMEOUT = 10 * 60
+
+
+def generation() -> int:
+    """Текущее поколение лент.
+
+    Если ключ поколения пропал из кэша, новое начинается с текущего
+    времени в миллисекундах, чтобы не совпасть со старыми страницами.
+    """
+    value = cache.get(GENERATION_KEY)
+    if value is None:
+        value = int(time.time() * 1000)
+        if not cache.add(GENERATION_KEY, value, FEED_CACHE_TIMEOUT):
+            value = cache.get(GENERATION_KEY, value)
+    return value
+
+
+def changed_at() -> float:
+    """Время последней смены поколения (timestamp).
+
+    Если ключ пропал из кэша, отсчёт начинается заново с текущего
+    момента: так время может только сдвинуться вперёд.
+    """
+    value = cache.get(CHANGED_KEY)
+    if value is None:
+        value = time.time()
+        if not cache.add(CHANGED_KEY, value, FEED_CACHE_TIMEOUT):
+            value = cache.get(CHANGED_KEY, value)
+    return value
+
+
+def invalidate() -> None:
+    """Сменить поколение: все закэшированные страницы лент устаревают.
+
+    Внутри транзакции поколение меняется ещё раз после её фиксации:
+    другой запрос между первой сменой и фиксацией читает старые строки
+    и иначе сохранил бы их страницу под новым поколением.
+    """
+    _bump()
+    if connection.in_atomic_block:
+        transaction.on_commit(_bump)
+
+
+def _bump() -> None:
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        generation()
+    cache.set(CHANGED_KEY, time.time(), FEED_CACHE_TIMEOUT)
+
+
+def page_key(request, feed, scope="") -> str:
+    # Тот же выбор страницы, что в core.paginator.paginate.
+    number = request.GET.get("page")
+    if number is None:
+        position = "cursor:" + request.GET.get("cursor", "")
+    else:
+        position = "page:" + number
+    digest = hashlib.md5(f"{scope}|{position}".encode()).hexdigest()
+    return f"feeds:{feed}:{generation()}:{digest}"
+
+
+def store_page(key, request, object_list, per_page):
+    """Вычислить страницу и положить её в кэш под ключом `key`.
+
+    В кэш кладётся уже вычисленная страница без исходной выборки
+    у паджинатора, поэтому попадание не делает ни одного запроса к постам.
+    Страница читается с основной базы, как всё, что попадает в кэш.
+    """
+    with db_routers.primary():
+        page_obj = paginate(request, object_list, per_page)
+        page_obj.object_list = list(page_obj.object_list)
+    page_obj.paginator.object_list = []
+    cache.set(key, page_obj, FEED_PAGE_TIMEOUT)
+    return page_obj
+
+
+def fetch_page(request, feed, object_list, per_page, scope="") -> tuple:
+    """(страница, попала ли она в кэш) — см. get_page."""
+    key = page_key(request, feed, scope)
+    page_obj = cache.get(key)
+    hit = page_obj is not None
+    profiling.record_cache("feed", hit)
+    if not hit:
+        page_obj = store_page(key, request, object_list, per_page)
+    return page_obj, hit
+
+
+def get_page(request, feed, object_list, per_page, scope=""):
+    """Страница ленты из кэша, а при промахе — из базы с сохранением."""
+    return fetch_page(request, feed, object_list, per_page, scope)[0]
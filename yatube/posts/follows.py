@@ -0,0 +1,95 @@
+"""Подписки одним запросом к базе.
+
+Вставка идёт через INSERT, который пропускает уже существующую пару
+(user, author), а удаление — одним DELETE; число затронутых строк
+показывает, изменилось ли что-нибудь. Поэтому повторный или
+одновременный запрос не падает на ограничении unique_follower,
+а счётчики и ленты меняются ровно один раз в той же транзакции.
+Обработчики сигналов Follow при этом не вызываются: следствия
+подписки для обоих путей собраны в followed() и unfollowed().
+"""
+from django.db import connection, transaction
+
+from . import stats, timeline, trending
+from .models import Follow
+
+# Сколько авторов можно передать в follow_many за раз.
+MAX_BULK_FOLLOW = 100
+
+
+def _execute(sql, params) -> int:
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def _insert(user_id, author_id) -> bool:
+    ops = connection.ops
+    opts = Follow._meta
+    columns = ", ".join(
+        ops.quote_name(opts.get_field(name).column)
+        for name in ("user", "author")
+    )
+    sql = (
+        f"{ops.insert_statement(ignore_conflicts=True)} "
+        f"{ops.quote_name(opts.db_table)} ({columns}) VALUES (%s, %s) "
+        f"{ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}"
+    )
+    return _execute(sql.strip(), [user_id, author_id]) > 0
+
+
+def _delete(user_id, author_id) -> bool:
+    ops = connection.ops
+    opts = Follow._meta
+    sql = (
+        f"DELETE FROM {ops.quote_name(opts.db_table)} "
+        f"WHERE {ops.quote_name(opts.get_field('user').column)} = %s "
+        f"AND {ops.quote_name(opts.get_field('author').column)} = %s"
+    )
+    return _execute(sql, [user_id, author_id]) > 0
+
+
+def followed(user_id, author_id) -> None:
+    """Ленты, счётчики и популярное после новой подписки."""
+    timeline.backfill(user_id, author_id)
+    stats.bump(author_id, follower_count=1)
+    stats.bump(user_id, following_count=1)
+    trending.follower_added(author_id)
+
+
+def unfollowed(user_id, author_id) -> None:
+    """Ленты и счётчики после удалённой подписки."""
+    timeline.drop(user_id, author_id)
+    stats.bump(author_id, follower_count=-1)
+    stats.bump(user_id, following_count=-1)
+
+
+@transaction.atomic
+def follow(user_id, author_id) -> bool:
+    """Подписать читателя на автора; False, если подписка уже была."""
+    if user_id == author_id or not _insert(user_id, author_id):
+        return False
+    followed(user_id, author_id)
+    return True
+
+
+@transaction.atomic
+def unfollow(user_id, author_id) -> bool:
+    """Отписать читателя от автора; False, если подписки не было."""
+    if not _delete(user_id, author_id):
+        return False
+    unfollowed(user_id, author_id)
+    return True
+
+
+@transaction.atomic
+def follow_many(user_id, author_ids) -> list:
+    """Подписать читателя на нескольких авторов одной транзакцией.
+
+    Возвращает id авторов, подписка на которых появилась сейчас.
+    """
+    return [
+        author_id
+        for author_id in dict.fromkeys(author_ids)
+        if follow(user_id, author_id)
+    ]
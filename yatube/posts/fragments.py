@@ -0,0 +1,91 @@
+"""Части страницы, которые зависят от пользователя.
+
+Шаблон страницы выводит на их месте метку `<!--fragment:имя:параметры-->`,
+поэтому сама страница одинакова для всех и хранится в кэше целиком.
+FragmentMiddleware заменяет метки на фрагменты, отрисованные для
+текущего запроса.
+"""
+import re
+from urllib.parse import parse_qsl, urlencode
+
+from django.template.loader import render_to_string
+
+from .forms import CommentForm
+from .models import Follow
+
+MARKER_RE = re.compile(r"<!--fragment:(\w+):([^>]*)-->")
+MARKER_PREFIX = b"<!--fragment:"
+
+FRAGMENTS = {}
+
+
+def fragment(name):
+    def decorator(func):
+        FRAGMENTS[name] = func
+        return func
+
+    return decorator
+
+
+def placeholder(name, **params) -> str:
+    if name not in FRAGMENTS:
+        raise ValueError(f"Неизвестный фрагмент {name}")
+    return f"<!--fragment:{name}:{urlencode(params)}-->"
+
+
+def render(request, content) -> str:
+    """Заменить все метки в `content` на фрагменты для `request`."""
+
+    def replace(match):
+        params = dict(parse_qsl(match.group(2)))
+        return FRAGMENTS[match.group(1)](request, **params)
+
+    return MARKER_RE.sub(replace, content)
+
+
+@fragment("user_menu")
+def user_menu(request) -> str:
+    return render_to_string(
+        "includes/fragments/user_menu.html", request=request
+    )
+
+
+@fragment("feed_switcher")
+def feed_switcher(request, active) -> str:
+    if not request.user.is_authenticated:
+        return ""
+    return render_to_string(
+        "posts/includes/switcher.html", {active: True}, request=request
+    )
+
+
+@fragment("comment_form")
+def comment_form(request, post_id) -> str:
+    if not request.user.is_authenticated:
+        return ""
+    reply_to = request.GET.get("reply_to", "")
+    context = {
+        "form": CommentForm(),
+        "post_id": post_id,
+        "reply_to": reply_to if reply_to.isdigit() else None,
+    }
+    return render_to_string(
+        "includes/fragments/comment_form.html", context, request=request
+    )
+
+
+@fragment("follow_button")
+def follow_button(request, username) -> str:
+    user = request.user
+    owner = user.is_authenticated and user.username == username
+    following = (
+        user.is_authenticated
+        and not owner
+        and Follow.objects.filter(
+            user=user, author__username=username
+        ).exists()
+    )
+    context = {"username": username, "owner": owner, "following": following}
+    return render_to_string(
+        "posts/includes/follow_button.html", context, request=request
+    )
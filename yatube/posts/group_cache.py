@@ -0,0 +1,287 @@
+"""Кэш групп и прогрев первых страниц популярных групп.
+
+Группа по slug читается из кэша, запись и удаление группы стирают
+её ключ (см. posts.signals). Страницы ленты группы кэширует
+posts.feed_cache, но любая запись поста или комментария меняет
+поколение лент, и первые посетители популярной группы после этого
+ждут запросов к базе. Фоновый поток раз в GROUP_WARM_INTERVAL секунд
+отрисовывает заново первые GROUP_WARM_PAGES страниц GROUP_WARM_GROUPS
+групп, которые чаще всего открывали в этом процессе за последние
+TRAFFIC_BUCKETS минут; страницы после первой он проходит по курсорам,
+как посетитель по ссылкам «Следующая». Доля попаданий в кэш на таких
+страницах и итоги последнего прогрева видны в списке групп в админке.
+Всё, что попадает в кэш, читается с основной базы (см. core.db_routers).
+"""
+import logging
+import threading
+import time
+from collections import Counter, deque
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpRequest, QueryDict
+from django.shortcuts import get_object_or_404
+from django.urls import Resolver404, resolve, reverse
+
+from core import db_routers, profiling
+from . import feed_cache, page_cache
+from .models import Group
+
+logger = logging.getLogger(__name__)
+
+# Группа живёт в кэше, пока её не изменят или не удалят.
+GROUP_CACHE_TIMEOUT = None
+# Посещения считаются по минутам за последние TRAFFIC_BUCKETS минут.
+TRAFFIC_BUCKET_SECONDS = 60
+TRAFFIC_BUCKETS = 15
+HITS_KEY = "groups:warm:hits"
+MISSES_KEY = "groups:warm:misses"
+LAST_WARM_KEY = "groups:warm:last"
+# Курсоры прогретых страниц меняются вместе с постами группы.
+WARM_CURSORS_TIMEOUT = feed_cache.FEED_PAGE_TIMEOUT
+
+
+def group_key(slug) -> str:
+    return f"groups:slug:{slug}"
+
+
+def get_group(slug) -> Group:
+    """Группа по slug из кэша, а при промахе — из базы или 404."""
+    key = group_key(slug)
+    group = cache.get(key)
+    profiling.record_cache("group", group is not None)
+    if group is None:
+        with db_routers.primary():
+            group = get_object_or_404(Group, slug=slug)
+        cache.set(key, group, GROUP_CACHE_TIMEOUT)
+    return group
+
+
+def cursors_key(slug) -> str:
+    return f"groups:warm:cursors:{slug}"
+
+
+def forget(slug) -> None:
+    cache.delete(group_key(slug))
+
+
+class Traffic:
+    """Посещения групп в этом процессе по минутам."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets = deque(maxlen=TRAFFIC_BUCKETS)
+
+    def record(self, slug) -> None:
+        bucket = int(time.time() // TRAFFIC_BUCKET_SECONDS)
+        with self._lock:
+            if not self._buckets or self._buckets[-1][0] != bucket:
+                self._buckets.append((bucket, Counter()))
+            self._buckets[-1][1][slug] += 1
+
+    def counts(self) -> Counter:
+        """Посещения групп по slug за последние TRAFFIC_BUCKETS минут."""
+        oldest = time.time() // TRAFFIC_BUCKET_SECONDS - TRAFFIC_BUCKETS
+        total = Counter()
+        with self._lock:
+            for bucket, visits in self._buckets:
+                if bucket > oldest:
+                    total.update(visits)
+        return total
+
+    def top(self, limit) -> list:
+        return [slug for slug, _ in self.counts().most_common(limit)]
+
+
+traffic = Traffic()
+
+
+def _count(key) -> None:
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, None)
+
+
+def is_warmed(request, slug) -> bool:
+    """Запрошена ли страница, которую держит в кэше прогрев:
+    первая или одна из следующих по курсорам, пройденным прогревом."""
+    if "page" in request.GET:
+        return False
+    cursor = request.GET.get("cursor")
+    if cursor is None:
+        return True
+    return cursor in cache.get(cursors_key(slug), ())
+
+
+def group_slug(path):
+    """slug группы, если `path` — адрес её страницы, иначе None."""
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return None
+    if match.view_name != "posts:group_posts":
+        return None
+    return match.kwargs["slug"]
+
+
+def record_visit(request, slug, response) -> None:
+    """Учесть посещение группы и попадание её страницы в кэш.
+
+    Промахом считается страница, для которой пришлось читать посты
+    из базы (get_page отмечает это в запросе); ответы из кэша целых
+    страниц до представления не доходят и считаются попаданиями.
+    """
+    if response.status_code != 200:
+        return
+    traffic.record(slug)
+    if is_warmed(request, slug):
+        miss = getattr(request, "group_page_miss", False)
+        _count(MISSES_KEY if miss else HITS_KEY)
+    get_warmer().start()
+
+
+def get_page(request, group, per_page):
+    """Страница ленты группы; промах кэша отмечается в запросе."""
+    page_obj, hit = feed_cache.fetch_page(
+        request, "group", group.posts.for_feed(), per_page, group.pk
+    )
+    request.group_page_miss = not hit
+    return page_obj
+
+
+def page_request(path, cursor=None) -> HttpRequest:
+    """Анонимный GET страницы с теми же ключами кэша, что у посетителя,
+    пришедшего по ссылке шаблона: первая страница — без параметров."""
+    query = "" if cursor is None else f"cursor={cursor}"
+    request = HttpRequest()
+    request.method = "GET"
+    request.path = request.path_info = path
+    request.GET = QueryDict(query)
+    request.META = {"QUERY_STRING": query}
+    request.user = AnonymousUser()
+    return request
+
+
+def warm(groups, pages) -> dict:
+    """Положить в кэш `pages` первых страниц `groups` популярных групп.
+
+    Страница отрисовывается самим представлением группы, так что
+    в кэше оказываются и страница ленты, и готовый HTML. Уже лежащие
+    в кэше страницы не отрисовываются заново, поэтому, пока поколение
+    лент не сменилось, прогрев обходится без запросов к постам.
+    Возвращает итоги прогрева.
+    """
+    started = time.perf_counter()
+    top = traffic.top(groups)
+    with db_routers.primary():
+        found = Group.objects.in_bulk(top, field_name="slug")
+    rendered = 0
+    for slug in top:
+        group = found.get(slug)
+        if group is None:
+            continue
+        cache.add(group_key(slug), group, GROUP_CACHE_TIMEOUT)
+        path = reverse("posts:group_posts", args=[slug])
+        match = resolve(path)
+        cursor, cursors = None, []
+        for number in range(1, pages + 1):
+            request = page_request(path, cursor)
+            if cache.get(page_cache.page_key("body", request)) is None:
+                match.func(request, *match.args, **match.kwargs)
+                rendered += 1
+            page_obj = cache.get(
+                feed_cache.page_key(request, "group", group.pk)
+            )
+            if number == pages or page_obj is None:
+                break
+            cursor = page_obj.next_cursor
+            if cursor is None:
+                break
+            cursors.append(cursor)
+        cache.set(cursors_key(slug), cursors, WARM_CURSORS_TIMEOUT)
+    result = {
+        "at": time.time(),
+        "groups": len(found),
+        "rendered": rendered,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    cache.set(LAST_WARM_KEY, result, None)
+    return result
+
+
+def warm_stats() -> dict:
+    """Попадания на прогреваемых страницах и итоги последнего прогрева."""
+    counts = cache.get_many([HITS_KEY, MISSES_KEY])
+    hits = counts.get(HITS_KEY, 0)
+    misses = counts.get(MISSES_KEY, 0)
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / (hits + misses) if hits + misses else None,
+        "last": cache.get(LAST_WARM_KEY),
+    }
+
+
+def reset_stats() -> None:
+    cache.delete_many([HITS_KEY, MISSES_KEY, LAST_WARM_KEY])
+
+
+class GroupWarmer:
+    """Фоновый поток, который раз в `interval` секунд вызывает warm()."""
+
+    def __init__(self, interval, groups, pages):
+        self.interval = interval
+        self.groups = groups
+        self.pages = pages
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Запустить поток, если он ещё не идёт и прогрев включён.
+
+        Не запускается внутри транзакции вызывающего (поток не увидит
+        её данных и прогреет страницы без них) и на SQLite в памяти.
+        """
+        if not self.interval or connection.in_atomic_block:
+            return
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="group-warmer", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            try:
+                warm(self.groups, self.pages)
+            except Exception:
+                logger.exception("Прогрев страниц групп не удался")
+            finally:
+                connection.close_if_unusable_or_obsolete()
+
+
+_warmer = None
+_warmer_lock = threading.Lock()
+
+
+def get_warmer() -> GroupWarmer:
+    global _warmer
+    with _warmer_lock:
+        if _warmer is None:
+            _warmer = GroupWarmer(
+                settings.GROUP_WARM_INTERVAL,
+                settings.GROUP_WARM_GROUPS,
+                settings.GROUP_WARM_PAGES,
+            )
+    return _warmer
@@ -0,0 +1,87 @@
+"""Уменьшенные копии картинок постов для srcset.
+
+Копии (по умолчанию WebP) предлагаются в <source> тега <picture>,
+а браузеры без этого формата получают JPEG-миниатюру из
+posts.thumbnails или саму картинку.
+
+Копии строит posts.thumbnails: сразу после сохранения поста из форм
+сайта и админки, а для картинок, сохранённых иначе (seed,
+import_content, посты до появления копий), — команда process_images.
+"""
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps, features
+
+from .models import PostImageVariant
+
+# Пропорции миниатюры 960x339, которую показывают ленты.
+ASPECT_RATIO = 339 / 960
+EXTENSIONS = {"WEBP": "webp", "JPEG": "jpg", "PNG": "png"}
+
+
+def get_format() -> str:
+    """Формат копий из настроек; без кодека WebP в Pillow — JPEG."""
+    image_format = settings.POST_IMAGE_VARIANT_FORMAT
+    if image_format == "WEBP" and not features.check("webp"):
+        return "JPEG"
+    return image_format
+
+
+def encode(image, image_format) -> bytes:
+    if image_format == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGB")
+    buffer = BytesIO()
+    image.save(
+        buffer, image_format, quality=settings.POST_IMAGE_VARIANT_QUALITY
+    )
+    return buffer.getvalue()
+
+
+def build(post_id, name) -> list:
+    """Построить копии картинки `name` всех ширин из POST_IMAGE_WIDTHS.
+
+    Копии шире исходной картинки не строятся, кроме самой узкой.
+    Прежние копии поста удаляются вместе с файлами.
+    """
+    with default_storage.open(name) as source:
+        image = Image.open(source)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA")
+    image_format = get_format()
+    widths = sorted(settings.POST_IMAGE_WIDTHS)
+    widths = [widths[0]] + [
+        width for width in widths[1:] if width <= image.width
+    ]
+    with transaction.atomic():
+        for variant in PostImageVariant.objects.filter(post_id=post_id):
+            variant.file.delete(save=False)
+            variant.delete()
+        variants = []
+        for width in widths:
+            height = max(1, round(width * ASPECT_RATIO))
+            content = encode(
+                ImageOps.fit(image, (width, height), Image.LANCZOS),
+                image_format,
+            )
+            file_name = default_storage.save(
+                f"posts/variants/{post_id}/{width}."
+                f"{EXTENSIONS[image_format]}",
+                ContentFile(content),
+            )
+            variants.append(
+                PostImageVariant(
+                    post_id=post_id,
+                    file=file_name,
+                    format=image_format,
+                    width=width,
+                    height=height,
+                    size=len(content),
+                )
+            )
+        return PostImageVariant.objects.bulk_create(variants)
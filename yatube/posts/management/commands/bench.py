@@ -0,0 +1,114 @@
+import json
+import platform
+import subprocess
+import time
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, teardown_databases
+
+from posts import benchmark, seeding
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполнить тестовую базу синтетическими данными и замерить "
+        "p50/p99 задержки и число SQL-запросов для всех адресов "
+        "posts.urls. Рабочая база не затрагивается, --cold очищает кэш."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--groups", type=int, default=20)
+        parser.add_argument("--posts", type=int, default=20000)
+        parser.add_argument("--comments", type=int, default=50000)
+        parser.add_argument("--follows", type=int, default=2000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--repeat", type=int, default=30)
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument(
+            "--cold",
+            action="store_true",
+            help="Очищать кэш перед каждым запросом.",
+        )
+        parser.add_argument("--output", default="bench.json")
+        parser.add_argument(
+            "--compare", help="JSON прошлого прогона для сравнения."
+        )
+
+    def handle(self, *args, **options):
+        old = None
+        if options["compare"]:
+            try:
+                with open(options["compare"]) as file:
+                    old = json.load(file)["results"]
+            except (OSError, ValueError, KeyError) as error:
+                raise CommandError(
+                    f"Не прочитать {options['compare']}: {error}"
+                )
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            started = time.perf_counter()
+            volumes = seeding.generate(
+                users=options["users"],
+                groups=options["groups"],
+                posts=options["posts"],
+                comments=options["comments"],
+                follows=options["follows"],
+                seed=options["seed"],
+            )
+            seed_seconds = time.perf_counter() - started
+            results = benchmark.run(
+                volumes["prefix"],
+                options["repeat"],
+                options["warmup"],
+                options["cold"],
+            )
+        finally:
+            teardown_databases(old_config, verbosity=0)
+        report = {
+            "meta": {
+                "commit": git_commit(),
+                "date": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": settings.DATABASES["default"]["ENGINE"],
+                "seed_seconds": round(seed_seconds, 2),
+                "volumes": volumes,
+                "repeat": options["repeat"],
+                "warmup": options["warmup"],
+                "cold": options["cold"],
+            },
+            "results": results,
+        }
+        with open(options["output"], "w") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        self.stdout.write(
+            f"{'адрес':<18} {'p50, мс':>9} {'p99, мс':>9} {'запросов':>9}"
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<18} {result['p50_ms']:>9.2f} "
+                f"{result['p99_ms']:>9.2f} {result['queries_p50']:>9}"
+            )
+        if old is not None:
+            self.stdout.write(f"Сравнение с {options['compare']}:")
+            for line in benchmark.compare(old, results):
+                self.stdout.write(line)
+        self.stdout.write(
+            self.style.SUCCESS(f"Результаты записаны в {options['output']}.")
+        )
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = (
+        "Выгрузить пользователей, группы, посты, комментарии и подписки "
+        "в JSON по объекту на строку; .gz, .bz2 и .xz сжимаются."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument(
+            "--chunk-size", type=int, default=transfer.DEFAULT_CHUNK_SIZE
+        )
+
+    def handle(self, *args, **options):
+        results = transfer.export(
+            options["path"],
+            chunk_size=options["chunk_size"],
+            progress=self.stdout.write if options["verbosity"] > 1 else None,
+        )
+        *lines, total = transfer.summary(results)
+        for line in lines:
+            self.stdout.write(line)
+        self.stdout.write(self.style.SUCCESS(total))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = (
+        "Загрузить выгрузку export_content. Прерванная загрузка "
+        "при повторном запуске продолжается с контрольной точки. "
+        "Сайт на время загрузки нужно остановить."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument(
+            "--batch-size", type=int, default=transfer.DEFAULT_BATCH_SIZE
+        )
+        parser.add_argument(
+            "--checkpoint", help="По умолчанию <path>.checkpoint."
+        )
+
+    def handle(self, *args, **options):
+        try:
+            results = transfer.load(
+                options["path"],
+                checkpoint=options["checkpoint"],
+                batch_size=options["batch_size"],
+                progress=(
+                    self.stdout.write if options["verbosity"] > 1 else None
+                ),
+            )
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+        *lines, total = transfer.summary(results)
+        for line in lines:
+            self.stdout.write(line)
+        self.stdout.write(self.style.SUCCESS(total))
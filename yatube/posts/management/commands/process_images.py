@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+
+
+class Command(BaseCommand):
+    help = (
+        "Построить миниатюры и копии для srcset картинкам постов, "
+        "у которых их ещё нет (после seed, import_content или переноса "
+        "каталога media)."
+    )
+
+    def handle(self, *args, **options):
+        done, failed = thumbnails.backfill(progress=self.stdout.write)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Обработано картинок: {done}, ошибок: {failed}."
+            )
+        )
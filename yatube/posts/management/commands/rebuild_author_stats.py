@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts import stats
+
+
+class Command(BaseCommand):
+    help = "Пересчитать счётчики авторов (AuthorStats) с нуля."
+
+    def handle(self, *args, **options):
+        total = stats.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f"Пересчитаны счётчики {total} авторов.")
+        )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = (
+        "Построить поисковый индекс постов заново: после миграции "
+        "на базе с постами или после изменения стеммера."
+    )
+
+    def handle(self, *args, **options):
+        search.get_backend().rebuild()
+        self.stdout.write(self.style.SUCCESS("Поисковый индекс построен."))
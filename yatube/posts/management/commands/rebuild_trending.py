@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитать оценки популярных постов (PostScore) с нуля "
+        "и удалить оценки постов, выпавших из популярного."
+    )
+
+    def handle(self, *args, **options):
+        total = trending.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f"Пересчитаны оценки {total} постов.")
+        )
@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand
+
+from posts import seeding
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполнить базу синтетическими пользователями, группами, постами, "
+        "комментариями и подписками. Одинаковый --seed даёт одинаковые "
+        "данные."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10000)
+        parser.add_argument("--groups", type=int, default=100)
+        parser.add_argument("--posts", type=int, default=1000000)
+        parser.add_argument("--comments", type=int, default=1000000)
+        parser.add_argument("--follows", type=int, default=200000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--images",
+            type=float,
+            default=0.0,
+            help="Доля постов с картинкой, от 0 до 1.",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=seeding.DEFAULT_CHUNK_SIZE
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Процессов, порождающих строки (пишет всегда один).",
+        )
+
+    def handle(self, *args, **options):
+        progress = self.stdout.write if options["verbosity"] > 1 else None
+        result = seeding.generate(
+            users=options["users"],
+            groups=options["groups"],
+            posts=options["posts"],
+            comments=options["comments"],
+            follows=options["follows"],
+            seed=options["seed"],
+            image_share=options["images"],
+            chunk_size=options["chunk_size"],
+            workers=options["workers"],
+            progress=progress,
+        )
+        if progress is None:
+            for kind, seconds in result["seconds"].items():
+                self.stdout.write(f"{kind}: {seconds:.1f} с")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Создано с префиксом {result['prefix']}: "
+                f"пользователей {result['users']}, групп {result['groups']}, "
+                f"постов {result['posts']}, "
+                f"комментариев {result['comments']}, "
+                f"подписок {result['follows']}."
+            )
+        )
@@ -0,0 +1,90 @@
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from . import fragments, group_cache, page_cache
+
+
+class GroupTrafficMiddleware:
+    """Учёт посещений страниц групп для их прогрева.
+
+    Стоит перед AnonymousPageMiddleware, чтобы видеть и ответы
+    из кэша целых страниц (см. posts.group_cache).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        slug = group_cache.group_slug(request.path_info)
+        response = self.get_response(request)
+        if slug is not None:
+            group_cache.record_visit(request, slug, response)
+        return response
+
+
+class AnonymousPageMiddleware:
+    """Готовые страницы для запросов без сессии.
+
+    Стоит до сессий и аутентификации: попадание в кэш отдаётся
+    без сессий, CSRF, аутентификации и шаблонов, с проверкой
+    If-None-Match и If-Modified-Since по сохранённым заголовкам.
+    Всё, что обязано быть в каждом ответе, — заголовки безопасности
+    и X-Frame-Options — добавляют middleware выше неё в MIDDLEWARE.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not page_cache.is_anonymous(request):
+            return self.get_response(request)
+        cached = page_cache.get_anonymous(request)
+        if cached is not None:
+            return self.cached_response(request, *cached)
+        response = self.get_response(request)
+        if (
+            request.method == "GET"
+            and getattr(response, "page_cache", False)
+            and response.status_code == 200
+            and not response.cookies
+        ):
+            page_cache.set_anonymous(request, response)
+        return response
+
+    def cached_response(self, request, content, headers):
+        response = HttpResponse(content)
+        for name, value in headers.items():
+            response[name] = value
+        last_modified = parse_http_date_safe(headers.get("Last-Modified"))
+        return get_conditional_response(
+            request,
+            etag=headers.get("ETag"),
+            last_modified=last_modified,
+            response=response,
+        )
+
+
+class FragmentMiddleware:
+    """Дорисовать в HTML-ответе фрагменты для текущего пользователя.
+
+    Стоит после AuthenticationMiddleware, чтобы фрагментам были
+    доступны `request.user` и CSRF-токен.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            response.streaming
+            or not response.get("Content-Type", "").startswith("text/html")
+            or fragments.MARKER_PREFIX not in response.content
+        ):
+            return response
+        content = fragments.render(request, response.content.decode())
+        response.content = content.encode()
+        if response.has_header("Content-Length"):
+            response["Content-Length"] = len(response.content)
+        return response
@@ -0,0 +1,56 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:19
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+TIMELINE_LENGTH = 1000
+
+
+def fill_timelines(apps, schema_editor):
+    Follow = apps.get_model("posts", "Follow")
+    Post = apps.get_model("posts", "Post")
+    TimelineEntry = apps.get_model("posts", "TimelineEntry")
+    for user_id, author_id in Follow.objects.values_list(
+        "user_id", "author_id"
+    ).iterator():
+        posts = Post.objects.filter(author_id=author_id).order_by(
+            "-pub_date"
+        ).values_list("pk", "pub_date")[:TIMELINE_LENGTH]
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+                for pk, pub_date in posts
+            ],
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0012_auto_20220311_1649'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата публикации поста')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='posts.Post', verbose_name='Пост')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to=settings.AUTH_USER_MODEL, verbose_name='Читатель')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', '-pub_date', '-post'], name='timeline_user_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='timelineentry',
+            constraint=models.UniqueConstraint(fields=('user', 'post'), name='unique_timeline_entry'),
+        ),
+        migrations.RunPython(fill_timelines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:21
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+COUNTERS = {
+    "post_count": ("Post", "author_id"),
+    "comment_count": ("Comment", "author_id"),
+    "follower_count": ("Follow", "author_id"),
+    "following_count": ("Follow", "user_id"),
+}
+
+
+def fill_stats(apps, schema_editor):
+    AuthorStats = apps.get_model("posts", "AuthorStats")
+    counts = {}
+    for name, (model_name, key) in COUNTERS.items():
+        model = apps.get_model("posts", model_name)
+        rows = (
+            model.objects.order_by()
+            .values(key)
+            .annotate(total=Count("pk"))
+            .values_list(key, "total")
+        )
+        for author_id, total in rows.iterator():
+            counts.setdefault(author_id, {})[name] = total
+    AuthorStats.objects.bulk_create(
+        [
+            AuthorStats(author_id=author_id, **values)
+            for author_id, values in counts.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0013_timelineentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('post_count', models.PositiveIntegerField(default=0, verbose_name='Постов')),
+                ('comment_count', models.PositiveIntegerField(default=0, verbose_name='Комментариев')),
+                ('follower_count', models.PositiveIntegerField(default=0, verbose_name='Подписчиков')),
+                ('following_count', models.PositiveIntegerField(default=0, verbose_name='Подписок')),
+            ],
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_authorstats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'pub_date', 'id'], name='comment_post_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['user', 'author'], name='follow_user_author_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-pub_date', '-id'], name='post_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-pub_date', '-id'], name='post_author_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', '-pub_date', '-id'], name='post_group_date_idx'),
+        ),
+    ]
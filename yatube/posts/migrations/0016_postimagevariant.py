@@ -0,0 +1,33 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostImageVariant',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(max_length=255, upload_to='', verbose_name='Файл')),
+                ('format', models.CharField(max_length=10, verbose_name='Формат')),
+                ('width', models.PositiveIntegerField(verbose_name='Ширина')),
+                ('height', models.PositiveIntegerField(verbose_name='Высота')),
+                ('size', models.PositiveIntegerField(verbose_name='Размер в байтах')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='image_variants', to='posts.Post', verbose_name='Пост')),
+            ],
+            options={
+                'ordering': ['width'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='postimagevariant',
+            constraint=models.UniqueConstraint(fields=('post', 'width'), name='unique_post_image_width'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:29
+
+from django.db import migrations
+
+
+def create_fts(apps, schema_editor):
+    """Пустая таблица индекса.
+
+    Документы строит стеммер из posts.stemmer, и миграция от него
+    не зависит: уже имеющиеся посты индексирует команда rebuild_search.
+    """
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE posts_post_fts USING fts5("
+        "body, tokenize='unicode61 remove_diacritics 2')"
+    )
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS posts_post_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_postimagevariant'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Копия posts.models.COMMENT_PATH_STEP на момент миграции.
+PATH_STEP = 10
+BATCH_SIZE = 1000
+
+
+def fill_paths(apps, schema_editor):
+    """Существующие комментарии становятся корнями своих веток."""
+    Comment = apps.get_model("posts", "Comment")
+    batch = []
+    for comment in Comment.objects.only("pk").iterator(chunk_size=BATCH_SIZE):
+        comment.path = f"{comment.pk:0{PATH_STEP}d}"
+        batch.append(comment)
+        if len(batch) >= BATCH_SIZE:
+            Comment.objects.bulk_update(batch, ["path"])
+            batch = []
+    Comment.objects.bulk_update(batch, ["path"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_post_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Глубина'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='posts.Comment', verbose_name='Ответ на'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(default='', editable=False, max_length=200, verbose_name='Путь в ветке'),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='comment_post_path_idx'),
+        ),
+    ]
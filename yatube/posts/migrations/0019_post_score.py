@@ -0,0 +1,25 @@
+# Generated by Django 2.2.16 on 2026-10-18 21:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_comment_threads'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostScore',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='posts.Post', verbose_name='Пост')),
+                ('score', models.FloatField(verbose_name='Оценка')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='postscore',
+            index=models.Index(fields=['-score', '-post'], name='post_score_idx'),
+        ),
+    ]
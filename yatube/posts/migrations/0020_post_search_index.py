@@ -0,0 +1,30 @@
+from django.db import migrations
+
+
+def create_index(apps, schema_editor):
+    """GIN-индекс для posts.search.PostgresSearchBackend.
+
+    На SQLite поиск идёт по таблице FTS5 из миграции 0017.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "CREATE INDEX posts_post_search_idx ON posts_post "
+        "USING GIN (to_tsvector('russian', text))"
+    )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS posts_post_search_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_post_score'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.db.models import Count, IntegerField, OuterRef, Subquery
 from django.db.models import UniqueConstraint
+from django.db.models.functions import Coalesce
 
 from core.models import CreatedModel
 
@@ -17,6 +19,35 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты для лент: автор и группа одним запросом, без лишних
+        колонок, с числом комментариев в `comment_count`."""
+        return (
+            self.select_related("author", "group")
+            .prefetch_related("image_variants")
+            .defer(
+                "author__password",
+                "author__email",
+                "author__last_login",
+                "group__description",
+            )
+            .annotate(
+                comment_count=Coalesce(
+                    Subquery(
+                        Comment.objects.filter(post=OuterRef("pk"))
+                        .order_by()
+                        .values("post")
+                        .annotate(total=Count("pk"))
+                        .values("total"),
+                        output_field=IntegerField(),
+                    ),
+                    0,
+                )
+            )
+        )
+
+
 class Post(CreatedModel):
     text = models.TextField("Текст поста")
     author = models.ForeignKey(
@@ -34,13 +65,37 @@ class Post(CreatedModel):
     )
     image = models.ImageField("Картинка", upload_to="posts/", blank=True)
 
+    objects = PostQuerySet.as_manager()
+
     class Meta:
         ordering = ["-pub_date"]
+        indexes = [
+            models.Index(
+                fields=["-pub_date", "-id"], name="post_date_idx"
+            ),
+            models.Index(
+                fields=["author", "-pub_date", "-id"],
+                name="post_author_date_idx",
+            ),
+            models.Index(
+                fields=["group", "-pub_date", "-id"],
+                name="post_group_date_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.text[:15]
 
 
+# Ширина одного шага пути комментария и предельная глубина ветки.
+COMMENT_PATH_STEP = 10
+COMMENT_MAX_DEPTH = 20
+
+
+def comment_path_step(pk) -> str:
+    return f"{pk:0{COMMENT_PATH_STEP}d}"
+
+
 class Comment(CreatedModel):
     post = models.ForeignKey(
         Post,
@@ -54,6 +109,55 @@ class Comment(CreatedModel):
         verbose_name="Автор",
     )
     text = models.TextField("Текст комментария")
+    parent = models.ForeignKey(
+        "self",
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        verbose_name="Ответ на",
+        related_name="replies",
+    )
+    path = models.CharField(
+        "Путь в ветке", max_length=COMMENT_PATH_STEP * COMMENT_MAX_DEPTH,
+        editable=False, default="",
+    )
+    depth = models.PositiveSmallIntegerField(
+        "Глубина", editable=False, default=0
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["post", "pub_date", "id"],
+                name="comment_post_date_idx",
+            ),
+            models.Index(
+                fields=["post", "path"], name="comment_post_path_idx"
+            ),
+        ]
+
+    def set_parent(self, parent) -> None:
+        """Сделать комментарий ответом на `parent` с учётом глубины."""
+        if parent.depth >= COMMENT_MAX_DEPTH - 1:
+            parent = parent.parent
+        self.parent = parent
+        self.depth = parent.depth + 1
+
+    def save(self, *args, **kwargs):
+        """Сохранить комментарий и дописать его id к пути родителя.
+
+        Путь — id предков и самого комментария фиксированной ширины,
+        поэтому сортировка по нему выводит ветку в порядке обхода,
+        а поддерево выбирается по префиксу. Ответы глубже
+        COMMENT_MAX_DEPTH прикрепляются к предку на последнем уровне.
+        """
+        if self.parent_id is not None and not self.path:
+            self.set_parent(self.parent)
+        super().save(*args, **kwargs)
+        if not self.path:
+            prefix = self.parent.path if self.parent_id else ""
+            self.path = prefix + comment_path_step(self.pk)
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
 
 
 class Follow(models.Model):
@@ -74,3 +178,121 @@ class Follow(models.Model):
         constraints = [
             UniqueConstraint(fields=["author", "user"], name="unique_follower")
         ]
+        indexes = [
+            models.Index(
+                fields=["user", "author"], name="follow_user_author_idx"
+            )
+        ]
+
+
+class TimelineEntry(models.Model):
+    """Запись ленты подписок: пост автора, на которого подписан читатель.
+
+    Хранит копию даты публикации, чтобы лента читалась одним проходом
+    по индексу (user, -pub_date) без объединения всех подписок.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name="Читатель",
+        related_name="timeline",
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        verbose_name="Пост",
+        related_name="timeline_entries",
+    )
+    pub_date = models.DateTimeField("Дата публикации поста")
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=["user", "post"], name="unique_timeline_entry"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-pub_date", "-post"],
+                name="timeline_user_date_idx",
+            )
+        ]
+
+
+class AuthorStats(models.Model):
+    """Счётчики автора, которые поддерживаются сигналами при записи."""
+
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        verbose_name="Автор",
+        related_name="stats",
+    )
+    post_count = models.PositiveIntegerField("Постов", default=0)
+    comment_count = models.PositiveIntegerField("Комментариев", default=0)
+    follower_count = models.PositiveIntegerField("Подписчиков", default=0)
+    following_count = models.PositiveIntegerField("Подписок", default=0)
+
+    def __str__(self) -> str:
+        return f"Статистика {self.author_id}"
+
+
+class PostScore(models.Model):
+    """Оценка поста для популярного, см. posts.trending.
+
+    Хранится логарифмом, поэтому не уменьшается со временем сама:
+    индекс (-score, -post) сразу отдаёт посты от самых популярных.
+    """
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        verbose_name="Пост",
+        related_name="trending",
+    )
+    score = models.FloatField("Оценка")
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["-score", "-post"], name="post_score_idx"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"Оценка поста {self.post_id}"
+
+
+class PostImageVariant(models.Model):
+    """Уменьшенная копия картинки поста для атрибута srcset."""
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        verbose_name="Пост",
+        related_name="image_variants",
+    )
+    file = models.FileField("Файл", max_length=255)
+    format = models.CharField("Формат", max_length=10)
+    width = models.PositiveIntegerField("Ширина")
+    height = models.PositiveIntegerField("Высота")
+    size = models.PositiveIntegerField("Размер в байтах")
+
+    class Meta:
+        ordering = ["width"]
+        constraints = [
+            UniqueConstraint(
+                fields=["post", "width"], name="unique_post_image_width"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.file.name} ({self.width}x{self.height})"
+
+    @property
+    def content_type(self) -> str:
+        """MIME-тип файла для атрибута type тега <source>."""
+        return f"image/{self.format.lower()}"
@@ -0,0 +1,83 @@
+"""Кэш готовых HTML-страниц постов.
+
+Страница кэшируется с метками пользовательских фрагментов (см.
+posts.fragments), поэтому одна запись служит всем пользователям.
+Ключи включают поколение лент, и любая запись поста, комментария
+или группы делает все сохранённые страницы недоступными.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from core import db_routers, profiling
+from . import feed_cache
+
+PAGE_CACHE_TIMEOUT = 60 * 60
+# Заголовки, которые сохраняются вместе с готовым ответом анониму.
+STORED_HEADERS = (
+    "Content-Type", "ETag", "Last-Modified", "Cache-Control", "Vary",
+)
+
+
+def page_key(kind, request) -> str:
+    digest = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f"pages:{kind}:{feed_cache.generation()}:{digest}"
+
+
+def is_anonymous(request) -> bool:
+    """Запрос без сессии: ответ ему одинаков для всех таких запросов."""
+    return (
+        request.method in ("GET", "HEAD")
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+    )
+
+
+def cache_page_body(view):
+    """Отдавать страницу представления из кэша, пока не сменится поколение.
+
+    Ответ помечается `page_cache`, чтобы AnonymousPageMiddleware
+    сохранила его целиком для анонимов. При промахе представление
+    читает с основной базы: реплика могла ещё не получить записи,
+    которые сменили поколение.
+    """
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return view(request, *args, **kwargs)
+        key = page_key("body", request)
+        body = cache.get(key)
+        profiling.record_cache("page_body", body is not None)
+        if body is not None:
+            response = HttpResponse(body)
+        else:
+            with db_routers.primary():
+                response = view(request, *args, **kwargs)
+            if response.status_code != 200 or response.streaming:
+                return response
+            cache.set(key, response.content, PAGE_CACHE_TIMEOUT)
+        response.page_cache = True
+        return response
+
+    return wrapper
+
+
+def get_anonymous(request):
+    """Сохранённый ответ анониму: (тело, заголовки) или None."""
+    cached = cache.get(page_key("anonymous", request))
+    profiling.record_cache("page_anonymous", cached is not None)
+    return cached
+
+
+def set_anonymous(request, response) -> None:
+    headers = {
+        name: response[name] for name in STORED_HEADERS if name in response
+    }
+    cache.set(
+        page_key("anonymous", request),
+        (response.content, headers),
+        PAGE_CACHE_TIMEOUT,
+    )
@@ -0,0 +1,152 @@
+import re
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import FloatField, Value
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import Post
+from .stemmer import stem_text
+
+# Порядок результатов поиска: сначала более релевантные.
+SEARCH_ORDERING = ("search_rank", "pk")
+
+
+class SearchBackend(ABC):
+    """Интерфейс поискового индекса постов.
+
+    `filter` оставляет в выборке найденные посты и аннотирует их
+    `search_rank`: чем меньше значение, тем выше пост в результатах.
+    Поддерживать индекс при записи (`index`, `remove`, `rebuild`)
+    нужно только бэкендам, которые хранят его сами.
+    """
+
+    @abstractmethod
+    def filter(self, queryset, query):
+        """Найденные по `query` посты из `queryset` с `search_rank`."""
+
+    def index(self, post) -> None:
+        pass
+
+    def remove(self, post_id) -> None:
+        pass
+
+    def rebuild(self) -> None:
+        pass
+
+
+class SimpleSearchBackend(SearchBackend):
+    """Поиск подстрокой без индекса — для баз без полнотекстового поиска."""
+
+    def filter(self, queryset, query):
+        for word in query.split():
+            queryset = queryset.filter(text__icontains=word)
+        return queryset.annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        )
+
+
+class PostgresSearchBackend(SearchBackend):
+    """Полнотекстовый поиск PostgreSQL со словарём russian.
+
+    Индекс — GIN по выражению `document` (миграция 0020), его
+    поддерживает сама база, поэтому index, remove и rebuild не нужны.
+    Каждое слово запроса ищется как префикс, порядок задаёт ts_rank.
+    """
+
+    # Выражение должно совпадать с индексом posts_post_search_idx.
+    document = "to_tsvector('russian', posts_post.text)"
+
+    @staticmethod
+    def to_query(query) -> str:
+        return " & ".join(
+            f"{word}:*" for word in re.findall(r"[^\W_]+", query.lower())
+        )
+
+    def filter(self, queryset, query):
+        tsquery = self.to_query(query)
+        if not tsquery:
+            return queryset.none()
+        match = "to_tsquery('russian', %s)"
+        return queryset.extra(
+            where=[f"{self.document} @@ {match}"], params=[tsquery]
+        ).annotate(
+            search_rank=RawSQL(
+                f"-ts_rank({self.document}, {match})",
+                (tsquery,),
+                output_field=FloatField(),
+            )
+        )
+
+
+class SqliteFTSBackend(SearchBackend):
+    """Индекс FTS5 в SQLite по основам слов текста поста.
+
+    Текст раскладывается на основы русским стеммером, каждое слово
+    запроса ищется как префикс основы, порядок задаёт bm25.
+    """
+
+    table = "posts_post_fts"
+
+    @staticmethod
+    def to_document(text) -> str:
+        return " ".join(stem_text(text))
+
+    @staticmethod
+    def to_match(query) -> str:
+        return " ".join(f'"{word}"*' for word in stem_text(query))
+
+    def filter(self, queryset, query):
+        match = self.to_match(query)
+        if not match:
+            return queryset.none()
+        return queryset.extra(
+            tables=[self.table],
+            where=[
+                f"{self.table}.rowid = posts_post.id",
+                f"{self.table} MATCH %s",
+            ],
+            params=[match],
+        ).annotate(
+            search_rank=RawSQL(
+                f"bm25({self.table})", (), output_field=FloatField()
+            )
+        )
+
+    def index(self, post) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT OR REPLACE INTO {self.table}(rowid, body) "
+                "VALUES (%s, %s)",
+                [post.pk, self.to_document(post.text)],
+            )
+
+    def remove(self, post_id) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {self.table} WHERE rowid = %s", [post_id]
+            )
+
+    def rebuild(self, batch_size=1000) -> None:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+            posts = Post.objects.order_by().values_list("pk", "text")
+            batch = []
+            for pk, text in posts.iterator(chunk_size=batch_size):
+                batch.append((pk, self.to_document(text)))
+                if len(batch) >= batch_size:
+                    self._insert(cursor, batch)
+                    batch = []
+            self._insert(cursor, batch)
+
+    def _insert(self, cursor, rows) -> None:
+        if rows:
+            cursor.executemany(
+                f"INSERT INTO {self.table}(rowid, body) VALUES (%s, %s)", rows
+            )
+
+
+def get_backend() -> SearchBackend:
+    return import_string(settings.SEARCH_BACKEND)()
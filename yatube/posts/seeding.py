@@ -0,0 +1,340 @@
+"""Синтетические данные для замеров производительности.
+
+Посты, комментарии и подписки пишутся кусками по `chunk_size` строк:
+каждый кусок — одна транзакция и один executemany, строки для него
+порождает генератор и, при `workers` > 1, отдельные процессы.
+Производные данные (пути комментариев, ленты, счётчики авторов,
+поисковый индекс) после этого достраиваются одним проходом каждое.
+
+Кусок получает свой генератор случайных чисел от (`seed`, вида
+данных, номера куска), поэтому при одинаковом `seed` содержимое
+не зависит от числа процессов. Авторы постов и комментариев,
+авторы в подписках и посты под комментариями выбираются по закону
+Ципфа: немногие пользователи пишут и собирают подписчиков больше всех.
+"""
+import io
+import multiprocessing
+import random
+import time
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, connections, transaction
+from django.utils import timezone
+from PIL import Image
+
+from core.bulk import insert_rows
+from . import feed_cache, search, stats, thumbnails, timeline, trending
+from .models import Comment, Follow, Group, Post, User
+from .write_batch import fill_comment_paths
+
+# Пароль всех созданных пользователей.
+SEED_PASSWORD = "seed-password"
+DEFAULT_CHUNK_SIZE = 10000
+# Показатель степени в законе Ципфа для популярности авторов и постов.
+ZIPF_EXPONENT = 1.1
+# За сколько дней до запуска разложены даты постов и комментариев.
+SEED_DAYS = 365
+# Сколько разных картинок сохраняется для постов с картинкой.
+SEED_IMAGES = 20
+WORDS = (
+    "лето", "город", "река", "кошка", "поезд", "книга", "море", "вечер",
+    "дорога", "музыка", "снег", "друг", "работа", "утро", "солнце",
+    "история", "сад", "дом", "лес", "письмо", "кофе", "дождь", "небо",
+    "праздник", "фотография", "прогулка", "мост", "окно", "ветер",
+)
+
+# Данные, общие для всех кусков одного вида: задаются в init_worker.
+_context = {}
+
+
+def make_text(rng, words) -> str:
+    return " ".join(rng.choices(WORDS, k=words)).capitalize()
+
+
+def zipf_weights(count) -> list:
+    """Накопленные веса для random.choices: k-й элемент с весом 1/k^s."""
+    return list(
+        accumulate(1 / rank ** ZIPF_EXPONENT for rank in range(1, count + 1))
+    )
+
+
+def chunks(total, size):
+    """(номер, смещение, размер) кусков, на которые делится `total`."""
+    for index, offset in enumerate(range(0, total, size)):
+        yield index, offset, min(size, total - offset)
+
+
+def init_worker(context) -> None:
+    _context.clear()
+    _context.update(context)
+
+
+def chunk_rng(kind, index) -> random.Random:
+    return random.Random(f"{_context['seed']}:{kind}:{index}")
+
+
+def moment(position, total):
+    """Дата строки `position` из `total`: от SEED_DAYS назад до `now`."""
+    span = timedelta(days=SEED_DAYS)
+    return _context["now"] - span + span * (position + 1) / max(total, 1)
+
+
+def post_rows(chunk) -> list:
+    index, offset, size = chunk
+    rng = chunk_rng("posts", index)
+    authors = rng.choices(
+        _context["users"], cum_weights=_context["user_weights"], k=size
+    )
+    rows = []
+    for i, author_id in enumerate(authors):
+        image = ""
+        if _context["images"] and rng.random() < _context["image_share"]:
+            image = rng.choice(_context["images"])
+        rows.append(
+            (
+                make_text(rng, rng.randint(5, 60)),
+                author_id,
+                rng.choice(_context["groups"]),
+                image,
+                moment(offset + i, _context["total"]),
+            )
+        )
+    return rows
+
+
+def comment_rows(chunk) -> list:
+    index, offset, size = chunk
+    rng = chunk_rng("comments", index)
+    posts = rng.choices(
+        _context["posts"], cum_weights=_context["post_weights"], k=size
+    )
+    authors = rng.choices(
+        _context["users"], cum_weights=_context["user_weights"], k=size
+    )
+    return [
+        (
+            post_id,
+            author_id,
+            make_text(rng, rng.randint(3, 20)),
+            "",
+            0,
+            moment(offset + i, _context["total"]),
+        )
+        for i, (post_id, author_id) in enumerate(zip(posts, authors))
+    ]
+
+
+def follow_rows(chunk) -> list:
+    index, _, size = chunk
+    rng = chunk_rng("follows", index)
+    users = _context["users"]
+    authors = rng.choices(users, cum_weights=_context["user_weights"], k=size)
+    pairs = {(rng.choice(users), author_id) for author_id in authors}
+    return sorted((user, author) for user, author in pairs if user != author)
+
+
+def save_images(prefix) -> list:
+    """Сохранить SEED_IMAGES небольших картинок и вернуть их пути."""
+    paths = []
+    for i in range(SEED_IMAGES):
+        buffer = io.BytesIO()
+        color = (i * 37 % 256, i * 91 % 256, i * 53 % 256)
+        Image.new("RGB", (64, 48), color).save(buffer, "PNG")
+        paths.append(
+            default_storage.save(
+                f"posts/{prefix}{i}.png", ContentFile(buffer.getvalue())
+            )
+        )
+    return paths
+
+
+class Seeder:
+    """Заполнение базы кусками с отчётом о скорости каждого шага."""
+
+    def __init__(
+        self, seed=0, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, progress=None
+    ):
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.progress = progress
+        self.seconds = {}
+
+    def report(self, kind, done, total, started) -> None:
+        if self.progress is None:
+            return
+        elapsed = time.perf_counter() - started
+        rate = done / elapsed if elapsed else 0
+        self.progress(f"{kind}: {done}/{total}, {rate:.0f} строк/с")
+
+    def fill(
+        self,
+        kind,
+        model,
+        field_names,
+        row_func,
+        total,
+        context,
+        ignore_conflicts=False,
+    ) -> None:
+        """Вставить `total` строк кусками, порождая их через `row_func`."""
+        started = time.perf_counter()
+        context = dict(context, seed=self.seed, total=total)
+        tasks = chunks(total, self.chunk_size)
+        pool = None
+        if self.workers > 1:
+            # Дочерние процессы не должны унаследовать открытое соединение.
+            if not connection.in_atomic_block:
+                connections.close_all()
+            pool = multiprocessing.Pool(
+                self.workers, initializer=init_worker, initargs=(context,)
+            )
+            batches = pool.imap(row_func, tasks)
+        else:
+            init_worker(context)
+            batches = map(row_func, tasks)
+        done = 0
+        try:
+            for rows in batches:
+                with transaction.atomic():
+                    insert_rows(model, field_names, rows, ignore_conflicts)
+                done += len(rows)
+                self.report(kind, done, total, started)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        self.seconds[kind] = time.perf_counter() - started
+
+    def timed(self, kind, func) -> None:
+        started = time.perf_counter()
+        func()
+        self.seconds[kind] = time.perf_counter() - started
+        if self.progress is not None:
+            self.progress(f"{kind}: {self.seconds[kind]:.1f} с")
+
+    def run(self, users, groups, posts, comments, follows, image_share=0.0):
+        prefix = f"seed{self.seed}-"
+        rng = random.Random(self.seed)
+        password = make_password(SEED_PASSWORD)
+        for _, offset, size in chunks(users, self.chunk_size):
+            User.objects.bulk_create(
+                User(username=f"{prefix}user{i}", password=password)
+                for i in range(offset, offset + size)
+            )
+        Group.objects.bulk_create(
+            Group(
+                title=f"Группа {i}",
+                slug=f"{prefix}group{i}",
+                description=make_text(rng, 10),
+            )
+            for i in range(groups)
+        )
+        user_ids = list(
+            User.objects.filter(username__startswith=prefix)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        # Популярность пользователя не зависит от порядка регистрации.
+        rng.shuffle(user_ids)
+        group_ids = list(
+            Group.objects.filter(slug__startswith=prefix)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        ) + [None]
+        context = {
+            "now": timezone.now(),
+            "users": user_ids,
+            "user_weights": zipf_weights(len(user_ids)),
+            "groups": group_ids,
+            "images": save_images(prefix) if image_share else [],
+            "image_share": image_share,
+        }
+        if user_ids:
+            self.fill(
+                "posts",
+                Post,
+                ("text", "author", "group", "image", "pub_date"),
+                post_rows,
+                posts,
+                context,
+            )
+        post_ids = list(
+            Post.objects.filter(author__username__startswith=prefix)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        rng.shuffle(post_ids)
+        if post_ids:
+            self.fill(
+                "comments",
+                Comment,
+                ("post", "author", "text", "path", "depth", "pub_date"),
+                comment_rows,
+                comments,
+                dict(
+                    context,
+                    posts=post_ids,
+                    post_weights=zipf_weights(len(post_ids)),
+                ),
+            )
+        if len(user_ids) > 1:
+            self.fill(
+                "follows",
+                Follow,
+                ("user", "author"),
+                follow_rows,
+                follows,
+                context,
+                ignore_conflicts=True,
+            )
+        self.timed("comment_paths", fill_comment_paths)
+        self.timed("timelines", timeline.rebuild)
+        self.timed("stats", stats.rebuild)
+        self.timed("trending", trending.rebuild)
+        self.timed("search", search.get_backend().rebuild)
+        if context["images"]:
+            self.timed("images", thumbnails.backfill)
+        feed_cache.invalidate()
+        return {
+            "prefix": prefix,
+            "users": len(user_ids),
+            "groups": len(group_ids) - 1,
+            "posts": len(post_ids),
+            "comments": Comment.objects.filter(
+                post__author__username__startswith=prefix
+            ).count(),
+            "follows": Follow.objects.filter(
+                user__username__startswith=prefix
+            ).count(),
+            "seconds": {
+                kind: round(value, 2) for kind, value in self.seconds.items()
+            },
+        }
+
+
+def generate(
+    users=100,
+    groups=10,
+    posts=2000,
+    comments=5000,
+    follows=500,
+    seed=0,
+    image_share=0.0,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    workers=1,
+    progress=None,
+) -> dict:
+    """Создать пользователей, группы, посты, комментарии и подписки.
+
+    Имена пользователей и адреса групп начинаются с `seed<seed>-`,
+    поэтому повторный вызов с другим `seed` не конфликтует с первым.
+    Возвращает префикс, число созданных объектов каждого вида
+    и время каждого шага в секундах.
+    """
+    seeder = Seeder(seed, chunk_size, workers, progress)
+    return seeder.run(users, groups, posts, comments, follows, image_share)
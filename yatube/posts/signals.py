@@ -0,0 +1,69 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import (
+    feed_cache, follows, group_cache, search, stats, timeline, trending,
+)
+from .models import Comment, Follow, Group, Post
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    feed_cache.invalidate()
+    search.get_backend().index(instance)
+    if created:
+        timeline.fan_out(instance)
+        stats.bump(instance.author_id, post_count=1)
+        trending.post_published(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    feed_cache.invalidate()
+    search.get_backend().remove(instance.pk)
+    stats.bump(instance.author_id, post_count=-1)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        feed_cache.invalidate()
+        stats.bump(instance.author_id, comment_count=1)
+        trending.comments_added({instance.post_id: 1}, instance.pub_date)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    feed_cache.invalidate()
+    stats.bump(instance.author_id, comment_count=-1)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    if created:
+        follows.followed(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    follows.unfollowed(instance.user_id, instance.author_id)
+
+
+@receiver(pre_save, sender=Group)
+def group_saving(sender, instance, **kwargs):
+    """Забыть группу и под прежним slug, если его меняют."""
+    if instance.pk is not None:
+        old_slug = (
+            Group.objects.filter(pk=instance.pk)
+            .values_list("slug", flat=True)
+            .first()
+        )
+        if old_slug is not None and old_slug != instance.slug:
+            group_cache.forget(old_slug)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    group_cache.forget(instance.slug)
+    feed_cache.invalidate()
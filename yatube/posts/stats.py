@@ -0,0 +1,65 @@
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from .models import AuthorStats, Comment, Follow, Post
+
+COUNTERS = {
+    "post_count": (Post, "author_id"),
+    "comment_count": (Comment, "author_id"),
+    "follower_count": (Follow, "author_id"),
+    "following_count": (Follow, "user_id"),
+}
+
+
+def bump(author_id, **deltas) -> None:
+    """Изменить счётчики автора на `deltas` одним UPDATE.
+
+    Строка создаётся только при увеличении счётчиков: уменьшение
+    отсутствующей строки приходит из каскадного удаления автора.
+    """
+    updated = AuthorStats.objects.filter(author_id=author_id).update(
+        **{name: F(name) + delta for name, delta in deltas.items()}
+    )
+    if updated or min(deltas.values()) < 0:
+        return
+    try:
+        with transaction.atomic():
+            AuthorStats.objects.create(author_id=author_id, **deltas)
+    except IntegrityError:
+        AuthorStats.objects.filter(author_id=author_id).update(
+            **{name: F(name) + delta for name, delta in deltas.items()}
+        )
+
+
+def get_for(author) -> AuthorStats:
+    """Счётчики автора; для автора без активности — нулевые."""
+    try:
+        return author.stats
+    except AuthorStats.DoesNotExist:
+        return AuthorStats(author=author)
+
+
+@transaction.atomic
+def rebuild(batch_size=None) -> int:
+    """Пересчитать счётчики всех авторов с нуля."""
+    counts = defaultdict(dict)
+    for name, (model, key) in COUNTERS.items():
+        rows = (
+            model.objects.order_by()
+            .values(key)
+            .annotate(total=Count("pk"))
+            .values_list(key, "total")
+        )
+        for author_id, total in rows.iterator():
+            counts[author_id][name] = total
+    AuthorStats.objects.all().delete()
+    AuthorStats.objects.bulk_create(
+        (
+            AuthorStats(author_id=author_id, **values)
+            for author_id, values in counts.items()
+        ),
+        batch_size=batch_size,
+    )
+    return len(counts)
@@ -0,0 +1,136 @@
+"""Стеммер русского языка по алгоритму Snowball.
+
+https://snowballstem.org/algorithms/russian/stemmer.html
+"""
+import re
+from functools import lru_cache
+
+VOWELS = "аеиоуыэюя"
+
+PERFECTIVE_GERUND = (
+    ("в", "вши", "вшись"),
+    ("ив", "ивши", "ившись", "ыв", "ывши", "ывшись"),
+)
+ADJECTIVE = (
+    "ее", "ие", "ые", "ое", "ими", "ыми", "ей", "ий", "ый", "ой", "ем",
+    "им", "ым", "ом", "его", "ого", "ему", "ому", "их", "ых", "ую", "юю",
+    "ая", "яя", "ою", "ею",
+)
+PARTICIPLE = (
+    ("ем", "нн", "вш", "ющ", "щ"),
+    ("ивш", "ывш", "ующ"),
+)
+REFLEXIVE = ("ся", "сь")
+VERB = (
+    (
+        "ла", "на", "ете", "йте", "ли", "й", "л", "ем", "н", "ло", "но",
+        "ет", "ют", "ны", "ть", "ешь", "нно",
+    ),
+    (
+        "ила", "ыла", "ена", "ейте", "уйте", "ите", "или", "ыли", "ей",
+        "уй", "ил", "ыл", "им", "ым", "ен", "ило", "ыло", "ено", "ят",
+        "ует", "уют", "ит", "ыт", "ены", "ить", "ыть", "ишь", "ую", "ю",
+    ),
+)
+NOUN = (
+    "а", "ев", "ов", "ие", "ье", "е", "иями", "ями", "ами", "еи", "ии",
+    "и", "ией", "ей", "ой", "ий", "й", "иям", "ям", "ием", "ем", "ам",
+    "ом", "о", "у", "ах", "иях", "ях", "ы", "ь", "ию", "ью", "ю", "ия",
+    "ья", "я",
+)
+SUPERLATIVE = ("ейше", "ейш")
+DERIVATIONAL = ("ость", "ост")
+
+WORD_RE = re.compile(r"\w+")
+# Сколько основ помнить: частые слова повторяются из поста в пост.
+STEM_CACHE_SIZE = 100000
+
+
+def _region(word, start):
+    """Начало области после первой пары «гласная, согласная»."""
+    for i in range(start + 1, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            return i + 1
+    return len(word)
+
+
+def _strip(rv, suffixes, preceded=()):
+    """Отрезать самое длинное окончание из `suffixes` или `preceded`.
+
+    Окончания из `preceded` отрезаются, только если перед ними
+    стоит «а» или «я». Возвращает None, если ничего не подошло.
+    """
+    candidates = [(suffix, False) for suffix in suffixes]
+    candidates += [(suffix, True) for suffix in preceded]
+    candidates.sort(key=lambda item: len(item[0]), reverse=True)
+    for suffix, needs_a in candidates:
+        if not rv.endswith(suffix):
+            continue
+        rest = rv[:-len(suffix)]
+        if needs_a and not rest.endswith(("а", "я")):
+            continue
+        return rest
+    return None
+
+
+def _step1(rv) -> str:
+    """Деепричастие, иначе возвратность и прилагательное, глагол
+    или существительное."""
+    stripped = _strip(rv, PERFECTIVE_GERUND[1], PERFECTIVE_GERUND[0])
+    if stripped is not None:
+        return stripped
+    reflexive = _strip(rv, REFLEXIVE)
+    if reflexive is not None:
+        rv = reflexive
+    stripped = _strip(rv, ADJECTIVE)
+    if stripped is not None:
+        participle = _strip(stripped, PARTICIPLE[1], PARTICIPLE[0])
+        return stripped if participle is None else participle
+    stripped = _strip(rv, VERB[1], VERB[0])
+    if stripped is None:
+        stripped = _strip(rv, NOUN)
+    return rv if stripped is None else stripped
+
+
+def _step3(rv, offset, r2_start) -> str:
+    """Словообразовательное окончание, если оно целиком в R2.
+
+    `offset` — длина части слова перед RV.
+    """
+    for suffix in DERIVATIONAL:
+        if rv.endswith(suffix) and offset + len(rv) - len(suffix) >= r2_start:
+            return rv[:-len(suffix)]
+    return rv
+
+
+def _step4(rv) -> str:
+    """Двойная «н», превосходная степень или мягкий знак."""
+    if rv.endswith("нн"):
+        return rv[:-1]
+    stripped = _strip(rv, SUPERLATIVE)
+    if stripped is not None:
+        return stripped[:-1] if stripped.endswith("нн") else stripped
+    if rv.endswith("ь"):
+        return rv[:-1]
+    return rv
+
+
+@lru_cache(maxsize=STEM_CACHE_SIZE)
+def stem(word) -> str:
+    word = word.lower().replace("ё", "е")
+    rv_start = next(
+        (i + 1 for i, char in enumerate(word) if char in VOWELS), len(word)
+    )
+    r2_start = _region(word, _region(word, 0))
+    prefix, rv = word[:rv_start], word[rv_start:]
+    rv = _step1(rv)
+    # Шаг 2.
+    if rv.endswith("и"):
+        rv = rv[:-1]
+    rv = _step3(rv, len(prefix), r2_start)
+    return prefix + _step4(rv)
+
+
+def stem_text(text) -> list:
+    """Основы всех слов текста в нижнем регистре."""
+    return [stem(word) for word in WORD_RE.findall(text.lower())]
@@ -0,0 +1,12 @@
+from django import template
+
+register = template.Library()
+
+# Глубже этого уровня ответы выводятся без дополнительного отступа.
+DISPLAY_DEPTH = 4
+
+
+@register.filter
+def thread_indent(depth) -> int:
+    """Отступ комментария в rem с учётом предела вложенности."""
+    return min(depth, DISPLAY_DEPTH) * 2
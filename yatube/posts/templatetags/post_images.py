@@ -0,0 +1,17 @@
+from django import template
+
+from posts import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def feed_thumbnail(image):
+    """Готовая миниатюра картинки поста или None, пока она строится."""
+    return thumbnails.cached(image)
+
+
+@register.simple_tag
+def image_variants(post):
+    """Копии картинки поста по возрастанию ширины (из prefetch)."""
+    return list(post.image_variants.all())
@@ -0,0 +1,49 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from .. import benchmark, seeding
+from ..models import AuthorStats, Comment, TimelineEntry
+
+
+class BenchmarkTest(TestCase):
+    """Проверка заполнения базы и замеров адресов posts.urls."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_generated_data_is_consistent(self):
+        """Производные данные совпадают с тем, что делают сигналы."""
+        volumes = seeding.generate(
+            users=10, groups=2, posts=30, comments=40, follows=15
+        )
+        self.assertEqual(volumes["posts"], 30)
+        self.assertFalse(Comment.objects.filter(path="").exists())
+        self.assertTrue(TimelineEntry.objects.exists())
+        self.assertEqual(
+            sum(AuthorStats.objects.values_list("post_count", flat=True)),
+            30,
+        )
+
+    def test_every_url_is_measured(self):
+        volumes = seeding.generate(
+            users=10, groups=2, posts=30, comments=40, follows=15
+        )
+        results = benchmark.run(volumes["prefix"], repeat=2)
+        self.assertEqual(set(results), benchmark.url_names())
+        for name, result in results.items():
+            with self.subTest(url=name):
+                self.assertIn(result["status"], (200, 302))
+                self.assertEqual(result["requests"], 2)
+                self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+
+    def test_compare_marks_regressions(self):
+        old = {"index": {"p50_ms": 10.0, "queries_p50": 2}}
+        lines = benchmark.compare(
+            old,
+            {
+                "index": {"p50_ms": 10.5, "queries_p50": 3},
+                "search": {"p50_ms": 1.0, "queries_p50": 1},
+            },
+        )
+        self.assertTrue(lines[0].startswith("! index"))
+        self.assertIn("новый адрес", lines[1])
@@ -0,0 +1,141 @@
+from importlib import import_module
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import COMMENT_MAX_DEPTH, Comment, Post, User
+from ..templatetags.comments import DISPLAY_DEPTH, thread_indent
+from ..views import COMMENTS_PER_PAGE
+
+
+class CommentPagesTest(TestCase):
+    """Проверка постраничного вывода комментариев."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.post = Post.objects.create(author=cls.author, text="Пост")
+        cls.comments = [
+            Comment.objects.create(
+                post=cls.post,
+                author=User.objects.create_user(username=f"user{i}"),
+                text=f"Комментарий {i}",
+            )
+            for i in range(COMMENTS_PER_PAGE + 5)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_detail_shows_first_page(self):
+        """На странице поста только первая порция комментариев."""
+        url = reverse("posts:post_detail", args=[CommentPagesTest.post.pk])
+        response = self.client.get(url)
+        comments = response.context["comments"]
+        self.assertEqual(
+            list(comments), CommentPagesTest.comments[:COMMENTS_PER_PAGE]
+        )
+        self.assertContains(response, "data-chunk-url")
+        response = self.client.get(url, {"order": "newest"})
+        self.assertEqual(
+            response.context["comments"][0], CommentPagesTest.comments[-1]
+        )
+
+    def test_chunk_endpoint(self):
+        """Следующая порция приходит HTML-фрагментом и в JSON."""
+        url = reverse("posts:post_detail", args=[CommentPagesTest.post.pk])
+        cursor = self.client.get(url).context["comments"].next_cursor
+        chunk_url = reverse(
+            "posts:post_comments", args=[CommentPagesTest.post.pk]
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(chunk_url, {"cursor": cursor})
+        self.assertEqual(len(context.captured_queries), 2)
+        self.assertTemplateUsed(response, "includes/comment_list.html")
+        self.assertNotContains(response, "<html")
+        self.assertContains(response, "Комментарий 24")
+        self.assertNotContains(response, "Показать ещё")
+        data = self.client.get(
+            chunk_url, {"format": "json", "order": "newest"}
+        ).json()
+        self.assertEqual(len(data["comments"]), COMMENTS_PER_PAGE)
+        self.assertEqual(data["comments"][0]["author"], "user24")
+        rest = self.client.get(data["next"]).json()
+        self.assertEqual(
+            [comment["text"] for comment in rest["comments"]],
+            [f"Комментарий {i}" for i in range(4, -1, -1)],
+        )
+        self.assertIsNone(rest["next"])
+
+
+class CommentThreadsTest(TestCase):
+    """Проверка веток ответов на комментарии."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.post = Post.objects.create(author=cls.author, text="Пост")
+
+    def comment(self, text, parent=None, post=None):
+        return Comment.objects.create(
+            post=post or CommentThreadsTest.post,
+            author=CommentThreadsTest.author,
+            text=text,
+            parent=parent,
+        )
+
+    def test_thread_order_and_subtree(self):
+        """Ветка и поддерево читаются одним запросом по пути."""
+        first = self.comment("Первый")
+        second = self.comment("Второй")
+        reply = self.comment("Ответ", parent=first)
+        nested = self.comment("Ответ на ответ", parent=reply)
+        thread = Comment.objects.filter(
+            post=CommentThreadsTest.post
+        ).order_by("path")
+        self.assertEqual(list(thread), [first, reply, nested, second])
+        self.assertEqual([c.depth for c in thread], [0, 1, 2, 0])
+        with self.assertNumQueries(1):
+            subtree = list(thread.filter(path__startswith=first.path))
+        self.assertEqual(subtree, [first, reply, nested])
+
+    def test_depth_is_limited(self):
+        """Слишком глубокие ответы встают рядом с последним уровнем."""
+        comment = self.comment("Корень")
+        for i in range(COMMENT_MAX_DEPTH + 2):
+            comment = self.comment(f"Ответ {i}", parent=comment)
+        self.assertEqual(comment.depth, COMMENT_MAX_DEPTH - 1)
+        self.assertEqual(thread_indent(comment.depth), DISPLAY_DEPTH * 2)
+
+    def test_reply_via_form(self):
+        """Ответ из формы попадает в ветку своего поста."""
+        client = Client()
+        client.force_login(CommentThreadsTest.author)
+        parent = self.comment("Вопрос")
+        url = reverse("posts:add_comment", args=[CommentThreadsTest.post.pk])
+        client.post(url, {"text": "Ответ", "parent": parent.pk})
+        self.assertTrue(parent.replies.filter(text="Ответ").exists())
+        other = self.comment(
+            "Чужой",
+            post=Post.objects.create(
+                author=CommentThreadsTest.author, text="Другой"
+            ),
+        )
+        response = client.post(url, {"text": "Мимо", "parent": other.pk})
+        self.assertEqual(response.status_code, 404)
+
+    def test_backfill_makes_roots(self):
+        """Миграция делает существующие комментарии корнями."""
+        comment = self.comment("Старый")
+        Comment.objects.update(path="")
+        migration = import_module("posts.migrations.0018_comment_threads")
+        migration.fill_paths(apps, None)
+        comment.refresh_from_db()
+        self.assertEqual(comment.path, f"{comment.pk:010d}")
+        self.assertEqual(comment.depth, 0)
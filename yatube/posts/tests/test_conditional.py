@@ -0,0 +1,122 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import follows
+from ..models import Comment, Follow, Group, Post, User
+
+
+class ConditionalPagesTest(TestCase):
+    """Проверка ETag, Last-Modified и Cache-Control у страниц постов."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.reader = User.objects.create_user(username="reader")
+        cls.group = Group.objects.create(
+            title="Группа", slug="group", description="Описание"
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text="Пост", group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(ConditionalPagesTest.reader)
+
+    def urls(self):
+        return [
+            reverse("posts:index"),
+            reverse("posts:group_posts", args=["group"]),
+            reverse("posts:profile", args=["author"]),
+            reverse("posts:post_detail", args=[ConditionalPagesTest.post.pk]),
+        ]
+
+    def test_not_modified_without_queries(self):
+        """Повторный запрос с валидаторами получает 304 без запросов."""
+        for url in self.urls():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertIn("public", response["Cache-Control"])
+                with CaptureQueriesContext(connection) as context:
+                    repeated = self.client.get(
+                        url, HTTP_IF_NONE_MATCH=response["ETag"]
+                    )
+                self.assertEqual(repeated.status_code, 304)
+                self.assertEqual(len(context.captured_queries), 0)
+                repeated = self.client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+                )
+                self.assertEqual(repeated.status_code, 304)
+
+    def test_comment_changes_validators(self):
+        """Новый комментарий делает прежний ETag недействительным."""
+        url = reverse(
+            "posts:post_detail", args=[ConditionalPagesTest.post.pk]
+        )
+        etag = self.client.get(url)["ETag"]
+        Comment.objects.create(
+            post=ConditionalPagesTest.post,
+            author=ConditionalPagesTest.reader,
+            text="Комментарий",
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_authorized_pages_are_private(self):
+        """Страницы вошедшего пользователя не делят ETag с анонимными."""
+        url = reverse("posts:index")
+        anonymous_etag = self.client.get(url)["ETag"]
+        response = self.reader_client.get(url)
+        self.assertIn("private", response["Cache-Control"])
+        self.assertNotEqual(response["ETag"], anonymous_etag)
+
+    def test_follow_feed_tracks_subscriptions(self):
+        """Подписка меняет ETag ленты подписок."""
+        url = reverse("posts:follow_index")
+        etag = self.reader_client.get(url)["ETag"]
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Follow.objects.create(
+            user=ConditionalPagesTest.reader,
+            author=ConditionalPagesTest.author,
+        )
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_follow_feed_tracks_swapped_authors(self):
+        """Смена автора с тем же числом и датой постов меняет ETag."""
+        reader = ConditionalPagesTest.reader
+        first = User.objects.create_user(username="first")
+        second = User.objects.create_user(username="second")
+        for author in (first, second):
+            for i in range(2):
+                Post.objects.create(author=author, text=f"Пост {i}")
+        latest = Post.objects.filter(author=first).latest("pub_date")
+        Post.objects.filter(author=second).update(pub_date=latest.pub_date)
+        follows.follow(reader.pk, first.pk)
+        url = reverse("posts:follow_index")
+        etag = self.reader_client.get(url)["ETag"]
+        follows.unfollow(reader.pk, first.pk)
+        follows.follow(reader.pk, second.pk)
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_profile_tracks_following(self):
+        """Подписка и отписка меняют ETag страницы автора."""
+        url = reverse("posts:profile", args=["author"])
+        etag = self.reader_client.get(url)["ETag"]
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.reader_client.get(
+            reverse("posts:profile_follow", args=["author"])
+        )
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(
+            response, reverse("posts:profile_unfollow", args=["author"])
+        )
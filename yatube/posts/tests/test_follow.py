@@ -1,6 +1,13 @@
-from django.test import Client, TestCase
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.db import connection, connections
+from django.test import Client, TestCase, TransactionTestCase
 from django.urls import reverse
-from posts.models import Post, Follow, User
+from posts import follows, timeline
+from posts.models import (
+    AuthorStats, Post, PostScore, Follow, TimelineEntry, User,
+)
 
 
 class FollowerTest(TestCase):
@@ -54,3 +61,172 @@ class FollowerTest(TestCase):
             object = response.context["page_obj"][0]
         except IndexError:
             self.assertRaises(IndexError)
+
+    def test_follow_timeline_backfill_and_trim(self):
+        """Подписка добавляет старые посты автора, отписка их убирает."""
+        Post.objects.create(
+            author=FollowerTest.author_model,
+            text="Пост до подписки",
+        )
+        FollowerTest.follower.get(
+            reverse(
+                "posts:profile_follow",
+                kwargs={"username": FollowerTest.author_model.username},
+            )
+        )
+        self.assertEqual(
+            TimelineEntry.objects.filter(
+                user=FollowerTest.follower_model
+            ).count(),
+            1,
+        )
+        response = FollowerTest.follower.get(reverse("posts:follow_index"))
+        self.assertEqual(
+            response.context["page_obj"][0].text, "Пост до подписки"
+        )
+        FollowerTest.follower.get(
+            reverse(
+                "posts:profile_unfollow",
+                kwargs={"username": FollowerTest.author_model.username},
+            )
+        )
+        self.assertFalse(
+            TimelineEntry.objects.filter(
+                user=FollowerTest.follower_model
+            ).exists()
+        )
+
+    def test_fan_out_trims_timelines(self):
+        """Новые посты автора не растят ленту подписчика без предела."""
+        follows.follow(
+            FollowerTest.follower_model.pk, FollowerTest.author_model.pk
+        )
+        entries = TimelineEntry.objects.filter(
+            user=FollowerTest.follower_model
+        )
+        with mock.patch.object(timeline, "TIMELINE_LENGTH", 3):
+            with mock.patch.object(timeline, "TRIM_EVERY", 4):
+                for i in range(8):
+                    Post.objects.create(
+                        author=FollowerTest.author_model, text=f"Пост {i}"
+                    )
+                    self.assertLessEqual(entries.count(), 3 + 4 - 1)
+            with mock.patch.object(timeline, "TRIM_EVERY", 1):
+                Post.objects.create(
+                    author=FollowerTest.author_model, text="Последний"
+                )
+        self.assertEqual(entries.count(), 3)
+        self.assertEqual(entries.latest("pub_date").post.text, "Последний")
+
+
+class IdempotentFollowTest(TestCase):
+    """Проверка подписок одной вставкой и одним удалением."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username="reader")
+        cls.authors = [
+            User.objects.create_user(username=f"author{i}") for i in range(3)
+        ]
+
+    def test_repeat_follow_and_unfollow(self):
+        """Повтор не меняет ни подписок, ни счётчиков."""
+        reader, author = IdempotentFollowTest.reader, self.authors[0]
+        self.assertTrue(follows.follow(reader.pk, author.pk))
+        self.assertFalse(follows.follow(reader.pk, author.pk))
+        self.assertFalse(follows.follow(reader.pk, reader.pk))
+        stats = AuthorStats.objects.get(author=author)
+        self.assertEqual(stats.follower_count, 1)
+        self.assertTrue(follows.unfollow(reader.pk, author.pk))
+        self.assertFalse(follows.unfollow(reader.pk, author.pk))
+        stats.refresh_from_db()
+        self.assertEqual(stats.follower_count, 0)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_orm_follow_matches_follows(self):
+        """Подписка через ORM даёт то же, что и через posts.follows."""
+        reader = IdempotentFollowTest.reader
+        orm_author, author = self.authors[1], self.authors[2]
+        for user in (orm_author, author):
+            Post.objects.create(author=user, text="Пост")
+        Follow.objects.create(user=reader, author=orm_author)
+        follows.follow(reader.pk, author.pk)
+
+        def effects(user):
+            return (
+                AuthorStats.objects.get(author=user).follower_count,
+                TimelineEntry.objects.filter(
+                    user=reader, post__author=user
+                ).count(),
+                PostScore.objects.get(post__author=user).score,
+            )
+
+        orm_effects, follows_effects = effects(orm_author), effects(author)
+        self.assertEqual(orm_effects[:2], follows_effects[:2])
+        self.assertAlmostEqual(orm_effects[2], follows_effects[2], places=3)
+        Follow.objects.get(user=reader, author=orm_author).delete()
+        follows.unfollow(reader.pk, author.pk)
+        self.assertEqual(effects(orm_author)[:2], (0, 0))
+        self.assertEqual(effects(author)[:2], (0, 0))
+
+    def test_bulk_follow_endpoint(self):
+        """Массовая подписка возвращает только новые подписки."""
+        client = Client()
+        client.force_login(IdempotentFollowTest.reader)
+        follows.follow(IdempotentFollowTest.reader.pk, self.authors[0].pk)
+        response = client.post(
+            reverse("posts:follow_many"),
+            {"author": ["author0", "author1", "author2", "nobody"]},
+        )
+        self.assertEqual(response.json(), {"followed": ["author1", "author2"]})
+        self.assertEqual(Follow.objects.count(), 3)
+        response = client.post(reverse("posts:follow_many"))
+        self.assertEqual(response.status_code, 400)
+
+
+class ConcurrentFollowTest(TransactionTestCase):
+    """Одновременные подписки из многих потоков."""
+
+    THREADS = 8
+    REQUESTS = 40
+
+    def setUp(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("SQLite в памяти не пускает параллельную запись")
+        self.reader = User.objects.create_user(username="reader")
+        self.author = User.objects.create_user(username="author")
+
+    def hammer(self, url):
+        client = Client()
+        client.force_login(self.reader)
+        try:
+            return client.get(url).status_code
+        finally:
+            connections.close_all()
+
+    def test_parallel_follow(self):
+        """Подписка из потоков создаётся один раз и без ошибок."""
+        url = reverse("posts:profile_follow", args=["author"])
+        with ThreadPoolExecutor(self.THREADS) as executor:
+            codes = list(executor.map(self.hammer, [url] * self.REQUESTS))
+        self.assertEqual(set(codes), {302})
+        self.assertEqual(Follow.objects.count(), 1)
+        stats = AuthorStats.objects.get(author=self.author)
+        self.assertEqual(stats.follower_count, 1)
+
+    def test_parallel_follow_unfollow(self):
+        """Вперемешку подписки и отписки сохраняют точные счётчики."""
+
+        def toggle(i):
+            try:
+                if i % 2:
+                    return follows.unfollow(self.reader.pk, self.author.pk)
+                return follows.follow(self.reader.pk, self.author.pk)
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(self.THREADS) as executor:
+            list(executor.map(toggle, range(self.REQUESTS)))
+        stats = AuthorStats.objects.get(author=self.author)
+        self.assertEqual(stats.follower_count, Follow.objects.count())
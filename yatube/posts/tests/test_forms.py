@@ -184,10 +184,7 @@ class CommentFormTests(TestCase):
                 text="тестовый комментарий, созданный в форме",
             ).exists()
         )
-        self.assertEqual(
-            response_1.context.get('comments').last().text,
-            form_data["text"],
-        )
+        self.assertContains(response_1, form_data["text"])
 
     def test_create_comment_not_auth_user(self):
         """Неавторизованный клиент не может создать комментарий."""
@@ -0,0 +1,105 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.http import Http404
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import feed_cache, group_cache
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+@override_settings(GROUP_WARM_PAGES=2)
+class GroupCacheTest(TestCase):
+    """Проверка кэша групп и прогрева их первых страниц."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author")
+        cls.hot = Group.objects.create(
+            title="Популярная", slug="hot", description="-"
+        )
+        cls.cold = Group.objects.create(
+            title="Тихая", slug="cold", description="-"
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.author, group=cls.hot, text=f"Пост {i}")
+            for i in range(25)
+        )
+
+    def setUp(self):
+        cache.clear()
+        group_cache.traffic.reset()
+        self.staff = User.objects.create_superuser(
+            "admin", "admin@example.com", "secret"
+        )
+
+    def test_group_cached_until_saved(self):
+        group_cache.get_group("hot")
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(group_cache.get_group("hot"), self.hot)
+        self.assertEqual(len(context.captured_queries), 0)
+        self.hot.slug = "renamed"
+        self.hot.save()
+        self.assertEqual(group_cache.get_group("renamed").title, "Популярная")
+        with self.assertRaises(Http404):
+            group_cache.get_group("hot")
+
+    def test_warm_follows_traffic(self):
+        """Греются первые страницы групп, которые чаще открывали."""
+        for _ in range(3):
+            self.client.get(reverse("posts:group_posts", args=["hot"]))
+        self.client.get(reverse("posts:group_posts", args=["cold"]))
+        self.assertEqual(group_cache.traffic.top(1), ["hot"])
+        feed_cache.invalidate()
+        result = group_cache.warm(groups=1, pages=5)
+        self.assertEqual(result["groups"], 1)
+        self.assertEqual(result["rendered"], 3)
+        self.assertEqual(group_cache.warm(1, 5)["rendered"], 0)
+        second = cache.get(group_cache.cursors_key("hot"))[0]
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(
+                reverse("posts:group_posts", args=["hot"]),
+                {"cursor": second},
+            )
+        self.assertFalse(
+            any("posts_post" in q["sql"] for q in context.captured_queries)
+        )
+
+    def test_hit_rate_in_admin(self):
+        """Считаются первая страница и страницы по курсорам прогрева."""
+        url = reverse("posts:group_posts", args=["hot"])
+        self.client.get(url)
+        feed_cache.invalidate()
+        group_cache.warm(groups=1, pages=2)
+        second = f"{url}?cursor={cache.get(group_cache.cursors_key('hot'))[0]}"
+        self.client.get(url)
+        self.client.get(second)
+        self.client.get(url + "?page=3")
+        feed_cache.invalidate()
+        self.client.get(second)
+        stats = group_cache.warm_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (2, 2))
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse("admin:posts_group_changelist"))
+        self.assertContains(response, "50,0%")
+        self.assertContains(response, "отрисовано страниц 2")
+
+    def test_admin_counts_visits_once(self):
+        """Счётчики посещений собираются один раз на весь список групп."""
+        self.client.get(reverse("posts:group_posts", args=["hot"]))
+        self.client.force_login(self.staff)
+        with mock.patch.object(
+            group_cache.traffic, "counts", wraps=group_cache.traffic.counts
+        ) as counts:
+            response = self.client.get(
+                reverse("admin:posts_group_changelist")
+            )
+        self.assertEqual(counts.call_count, 1)
+        self.assertContains(response, "Посещений за")
+        self.assertContains(response, '<td class="field-visits">1</td>')
@@ -0,0 +1,76 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class FeedIndexesTest(TestCase):
+    """Запросы страниц читают таблицы по индексам, без полных проходов."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="reader")
+        cls.author = User.objects.create_user(username="auth")
+        cls.group = Group.objects.create(
+            title="Тестовый заголовок",
+            description="Тестовое описание",
+            slug="test-slug",
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text="Тестовый пост"
+        )
+        Comment.objects.create(
+            post=cls.post, author=cls.user, text="Комментарий"
+        )
+        cls.user_auth = Client()
+        cls.user_auth.force_login(cls.user)
+
+    def query_plans(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            FeedIndexesTest.user_auth.get(url)
+        plans = {}
+        with connection.cursor() as cursor:
+            for query in context.captured_queries:
+                sql = query["sql"]
+                if not sql.startswith("SELECT"):
+                    continue
+                cursor.execute("EXPLAIN QUERY PLAN " + sql)
+                plans[sql] = [row[-1] for row in cursor.fetchall()]
+        return plans
+
+    def test_views_use_indexes(self):
+        """Ни один запрос страниц posts не сканирует таблицу целиком."""
+        urls = [
+            reverse("posts:index"),
+            reverse(
+                "posts:group_posts",
+                kwargs={"slug": FeedIndexesTest.group.slug},
+            ),
+            reverse(
+                "posts:profile",
+                kwargs={"username": FeedIndexesTest.author.username},
+            ),
+            reverse(
+                "posts:post_detail",
+                kwargs={"post_id": FeedIndexesTest.post.pk},
+            ),
+            reverse("posts:follow_index"),
+            reverse(
+                "posts:post_comments",
+                kwargs={"post_id": FeedIndexesTest.post.pk},
+            ) + "?order=newest",
+        ]
+        for url in urls:
+            for sql, plan in self.query_plans(url).items():
+                for step in plan:
+                    with self.subTest(url=url, sql=sql, step=step):
+                        self.assertFalse(
+                            step.startswith("SCAN") and "USING" not in step
+                        )
+                        self.assertNotIn("TEMP B-TREE", step)
@@ -0,0 +1,109 @@
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import db_routers
+from .. import feed_cache, page_cache
+from ..models import Comment, Follow, Post, User
+
+
+class PageCacheTest(TestCase):
+    """Проверка кэша страниц и пользовательских фрагментов."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.reader = User.objects.create_user(username="reader")
+        cls.post = Post.objects.create(author=cls.author, text="Пост")
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(PageCacheTest.reader)
+
+    def test_anonymous_hit_skips_database(self):
+        """Повторная анонимная страница отдаётся без запросов к базе."""
+        url = reverse("posts:post_detail", args=[PageCacheTest.post.pk])
+        first = self.client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            second = self.client.get(url)
+        self.assertEqual(len(context.captured_queries), 0)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_anonymous_hit_keeps_headers(self):
+        """Ответ из кэша несёт те же заголовки защиты, что и первый."""
+        url = reverse("posts:index")
+        first = self.client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            second = self.client.get(url)
+        self.assertEqual(len(context.captured_queries), 0)
+        self.assertEqual(first["X-Frame-Options"], "SAMEORIGIN")
+        for name in ("X-Frame-Options", "Content-Type", "ETag"):
+            self.assertEqual(second[name], first[name])
+
+    def test_fragments_follow_user(self):
+        """Общая страница получает шапку и форму текущего пользователя."""
+        url = reverse("posts:post_detail", args=[PageCacheTest.post.pk])
+        anonymous = self.client.get(url)
+        self.assertNotContains(anonymous, "<!--fragment:")
+        self.assertContains(anonymous, "Войти")
+        self.assertNotContains(anonymous, "csrfmiddlewaretoken")
+        response = self.reader_client.get(url)
+        self.assertTemplateNotUsed(response, "posts/post_detail.html")
+        self.assertContains(response, "Пользователь: reader")
+        self.assertContains(response, "csrfmiddlewaretoken")
+
+    def test_follow_button_is_fresh(self):
+        """Кнопка подписки меняется, хотя страница взята из кэша."""
+        url = reverse("posts:profile", args=["author"])
+        self.assertContains(self.reader_client.get(url), "Подписаться")
+        Follow.objects.create(
+            user=PageCacheTest.reader, author=PageCacheTest.author
+        )
+        response = self.reader_client.get(url)
+        self.assertTemplateNotUsed(response, "posts/profile.html")
+        self.assertContains(response, "Отписаться")
+
+    def test_comment_invalidates_page(self):
+        """Новый комментарий сразу виден на странице поста."""
+        url = reverse("posts:post_detail", args=[PageCacheTest.post.pk])
+        self.client.get(url)
+        Comment.objects.create(
+            post=PageCacheTest.post,
+            author=PageCacheTest.reader,
+            text="Новый комментарий",
+        )
+        self.assertContains(self.client.get(url), "Новый комментарий")
+
+    def test_miss_reads_primary(self):
+        """Страница для кэша читается с основной базы, а не с реплики."""
+        pinned = []
+
+        @page_cache.cache_page_body
+        def view(request):
+            pinned.append(db_routers.is_pinned())
+            return HttpResponse("Страница")
+
+        request = RequestFactory().get("/primary/")
+        db_routers.pin_primary(False)
+        view(request)
+        view(request)
+        self.assertEqual(pinned, [True])
+        self.assertFalse(db_routers.is_pinned())
+
+
+class InvalidateOnCommitTest(TransactionTestCase):
+    """Проверка смены поколения лент после фиксации транзакции."""
+
+    def test_generation_changes_again_after_commit(self):
+        """Страница, собранная до фиксации записи, не переживает её."""
+        cache.clear()
+        with transaction.atomic():
+            feed_cache.invalidate()
+            during = feed_cache.generation()
+        self.assertGreater(feed_cache.generation(), during)
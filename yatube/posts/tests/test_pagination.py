@@ -1,4 +1,7 @@
+from django.core.cache import cache
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from datetime import datetime
 
@@ -30,6 +33,9 @@ class PaginatorPagesTest(TestCase):
                 )
             )
 
+    def setUp(self):
+        cache.clear()
+
     def test_paginator_obj(self):
         """Паджинатор выводит не более 10 постов странице."""
         pages = [
@@ -48,3 +54,48 @@ class PaginatorPagesTest(TestCase):
                 self.assertEqual(len(response.context["page_obj"]), 10)
                 response = PaginatorPagesTest.user_auth.get(page + "?page=2")
                 self.assertEqual(len(response.context["page_obj"]), 2)
+
+    def test_cursor_paginator(self):
+        """Курсорная паджинация проходит ленту без пропусков и повторов."""
+        page = reverse("posts:index")
+        response = PaginatorPagesTest.user_auth.get(page)
+        next_cursor = response.context["page_obj"].next_cursor
+        self.assertIsNotNone(next_cursor)
+        first_ids = [post.pk for post in response.context["page_obj"]]
+        response = PaginatorPagesTest.user_auth.get(
+            page, {"cursor": next_cursor}
+        )
+        page_obj = response.context["page_obj"]
+        second_ids = [post.pk for post in page_obj]
+        self.assertEqual(len(second_ids), 2)
+        self.assertFalse(page_obj.has_next())
+        self.assertTrue(page_obj.has_previous())
+        self.assertEqual(
+            sorted(first_ids + second_ids),
+            sorted(post.pk for post in PaginatorPagesTest.many_posts),
+        )
+        response = PaginatorPagesTest.user_auth.get(
+            page, {"cursor": page_obj.previous_cursor}
+        )
+        self.assertEqual(
+            [post.pk for post in response.context["page_obj"]], first_ids
+        )
+        self.assertFalse(response.context["page_obj"].has_previous())
+
+    def test_first_page_by_cursor(self):
+        """Первая страница ленты идёт по ключу и не считает посты."""
+        with CaptureQueriesContext(connection) as context:
+            response = PaginatorPagesTest.user_auth.get(
+                reverse("posts:index")
+            )
+        self.assertTrue(response.context["page_obj"].cursor_mode)
+        self.assertFalse(
+            any("__count" in q["sql"] for q in context.captured_queries)
+        )
+
+    def test_cursor_paginator_invalid_cursor(self):
+        """Битый курсор отдаёт первую страницу."""
+        response = PaginatorPagesTest.user_auth.get(
+            reverse("posts:index"), {"cursor": "не-курсор"}
+        )
+        self.assertEqual(len(response.context["page_obj"]), 10)
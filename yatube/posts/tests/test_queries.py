@@ -0,0 +1,66 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class FeedQueriesTest(TestCase):
+    """Число запросов ленты не зависит от числа постов на странице."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="reader")
+        cls.author = User.objects.create_user(
+            username="auth", first_name="Имя", last_name="Фамилия"
+        )
+        cls.group = Group.objects.create(
+            title="Тестовый заголовок",
+            description="Тестовое описание",
+            slug="test-slug",
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        cls.user_auth = Client()
+        cls.user_auth.force_login(cls.user)
+
+    def create_posts(self, count):
+        for i in range(count):
+            post = Post.objects.create(
+                author=FeedQueriesTest.author,
+                group=FeedQueriesTest.group,
+                text=f"Тестовый пост {i}",
+            )
+            Comment.objects.create(
+                post=post, author=FeedQueriesTest.user, text="Комментарий"
+            )
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = FeedQueriesTest.user_auth.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_feed_query_budget(self):
+        """Лента с одним и с десятью постами делает одинаково запросов."""
+        urls = [
+            reverse("posts:index"),
+            reverse(
+                "posts:group_posts",
+                kwargs={"slug": FeedQueriesTest.group.slug},
+            ),
+            reverse(
+                "posts:profile",
+                kwargs={"username": FeedQueriesTest.author.username},
+            ),
+            reverse("posts:follow_index"),
+        ]
+        self.create_posts(1)
+        small = {url: self.count_queries(url) for url in urls}
+        self.create_posts(14)
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(url), small[url])
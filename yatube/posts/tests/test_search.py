@@ -0,0 +1,121 @@
+from io import StringIO
+from unittest import skipUnless
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Post, User
+from ..search import (
+    PostgresSearchBackend, SearchBackend, SimpleSearchBackend, get_backend,
+)
+from ..stemmer import stem
+
+
+class SearchTest(TestCase):
+    """Проверка полнотекстового поиска по постам."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+
+    def search(self, query):
+        return list(get_backend().filter(Post.objects.all(), query))
+
+    def test_stemmer(self):
+        """Формы слова сводятся к одной основе."""
+        for word in ("котами", "коты", "кот"):
+            with self.subTest(word=word):
+                self.assertEqual(stem(word), "кот")
+        self.assertEqual(stem("красивая"), stem("красивый"))
+
+    def test_stemming_and_prefix(self):
+        """Находятся другие формы слова и слова по началу."""
+        post = Post.objects.create(
+            author=SearchTest.author, text="Гуляли с котами по набережной"
+        )
+        for query in ("кот", "гулять набережная", "набер"):
+            with self.subTest(query=query):
+                self.assertEqual(self.search(query), [post])
+        self.assertEqual(self.search("собака"), [])
+
+    def test_ranking(self):
+        """Пост, где слово встречается чаще, идёт первым."""
+        rare = Post.objects.create(
+            author=SearchTest.author, text="Кот и длинный текст про погоду"
+        )
+        frequent = Post.objects.create(
+            author=SearchTest.author, text="Кот, кот и снова кот"
+        )
+        found = get_backend().filter(Post.objects.all(), "кот")
+        self.assertEqual(
+            list(found.order_by("search_rank", "pk")), [frequent, rare]
+        )
+
+    def test_backend_interface(self):
+        """Бэкенд без `filter` не создаётся, простой ищет подстрокой."""
+        with self.assertRaises(TypeError):
+            SearchBackend()
+        post = Post.objects.create(
+            author=SearchTest.author, text="Рыжий котёнок"
+        )
+        found = SimpleSearchBackend().filter(Post.objects.all(), "котён")
+        self.assertEqual(list(found), [post])
+
+    def test_backend_follows_database(self):
+        """Бэкенд выбирается по движку базы, запрос PostgreSQL — префиксы."""
+        engine = settings.DATABASES["default"]["ENGINE"]
+        self.assertEqual(
+            settings.SEARCH_BACKEND, settings.SEARCH_BACKENDS[engine]
+        )
+        self.assertEqual(
+            PostgresSearchBackend.to_query("Коты, ко_ты & (мыши)!"),
+            "коты:* & ко:* & ты:* & мыши:*",
+        )
+
+    def test_signals_keep_index(self):
+        """Индекс обновляется при правке и удалении поста."""
+        post = Post.objects.create(author=SearchTest.author, text="Утро")
+        post.text = "Вечер"
+        post.save()
+        self.assertEqual(self.search("утро"), [])
+        self.assertEqual(self.search("вечер"), [post])
+        post.delete()
+        self.assertEqual(self.search("вечер"), [])
+
+    @skipUnless(
+        settings.SEARCH_BACKEND == "posts.search.SqliteFTSBackend",
+        "отдельная таблица индекса есть только у FTS5",
+    )
+    def test_rebuild_command(self):
+        """Команда индексирует посты, записанные в обход сигналов."""
+        Post.objects.bulk_create(
+            [Post(author=SearchTest.author, text="Записи без сигналов")]
+        )
+        self.assertEqual(self.search("записи"), [])
+        call_command("rebuild_search", stdout=StringIO())
+        self.assertEqual(len(self.search("записи")), 1)
+
+    def test_search_page(self):
+        """Страница поиска листается курсором и сохраняет запрос."""
+        Post.objects.bulk_create(
+            Post(author=SearchTest.author, text=f"Заметка номер {i}")
+            for i in range(12)
+        )
+        get_backend().rebuild()
+        url = reverse("posts:search")
+        response = self.client.get(url, {"q": "заметки"})
+        page_obj = response.context["page_obj"]
+        self.assertEqual(len(page_obj), 10)
+        self.assertContains(
+            response, f"?{urlencode({'q': 'заметки'})}&amp;cursor="
+        )
+        response = self.client.get(
+            url, {"q": "заметки", "cursor": page_obj.next_cursor}
+        )
+        self.assertEqual(len(response.context["page_obj"]), 2)
+        response = self.client.get(url)
+        self.assertIsNone(response.context["page_obj"])
@@ -0,0 +1,51 @@
+from collections import Counter
+
+from django.test import TestCase
+
+from .. import seeding
+from ..models import Follow, Group, Post, TimelineEntry, User
+
+VOLUMES = {"users": 30, "groups": 3, "posts": 200, "follows": 100}
+
+
+class SeedingTest(TestCase):
+    """Проверка быстрого заполнения базы."""
+
+    def snapshot(self, prefix):
+        posts = Post.objects.filter(
+            author__username__startswith=prefix
+        ).order_by("pk")
+        return (
+            list(posts.values_list("text", "author__username")),
+            sorted(
+                Follow.objects.filter(
+                    user__username__startswith=prefix
+                ).values_list("user__username", "author__username")
+            ),
+        )
+
+    def test_same_seed_same_data_with_workers(self):
+        """Содержимое зависит от seed, но не от числа процессов."""
+        seeding.generate(comments=50, seed=7, chunk_size=40, **VOLUMES)
+        first = self.snapshot("seed7-")
+        User.objects.filter(username__startswith="seed7-").delete()
+        Group.objects.filter(slug__startswith="seed7-").delete()
+        seeding.generate(
+            comments=50, seed=7, chunk_size=40, workers=2, **VOLUMES
+        )
+        self.assertEqual(self.snapshot("seed7-"), first)
+        self.assertEqual(len(first[0]), VOLUMES["posts"])
+
+    def test_power_law_and_timelines(self):
+        """Немногие авторы пишут больше всех; ленты собраны по подпискам."""
+        result = seeding.generate(comments=0, seed=1, **VOLUMES)
+        posts_by_author = Counter(
+            Post.objects.values_list("author", flat=True)
+        ).most_common()
+        self.assertGreater(posts_by_author[0][1], 5 * posts_by_author[-1][1])
+        self.assertEqual(result["follows"], Follow.objects.count())
+        reader = Follow.objects.first().user
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=reader).count(),
+            Post.objects.filter(author__following__user=reader).count(),
+        )
@@ -0,0 +1,55 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import AuthorStats, Comment, Follow, Post, User
+
+
+class AuthorStatsTest(TestCase):
+    """Проверка денормализованных счётчиков авторов."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.reader = User.objects.create_user(username="reader")
+
+    def assertStats(self, user, **expected):
+        stats = AuthorStats.objects.get(author=user)
+        for name, value in expected.items():
+            with self.subTest(user=user.username, counter=name):
+                self.assertEqual(getattr(stats, name), value)
+
+    def test_signals_keep_counters(self):
+        """Счётчики меняются при создании и удалении записей."""
+        post = Post.objects.create(author=AuthorStatsTest.author, text="Пост")
+        comment = Comment.objects.create(
+            post=post, author=AuthorStatsTest.reader, text="Комментарий"
+        )
+        follow = Follow.objects.create(
+            user=AuthorStatsTest.reader, author=AuthorStatsTest.author
+        )
+        self.assertStats(
+            AuthorStatsTest.author, post_count=1, follower_count=1
+        )
+        self.assertStats(
+            AuthorStatsTest.reader, comment_count=1, following_count=1
+        )
+        follow.delete()
+        comment.delete()
+        post.delete()
+        self.assertStats(
+            AuthorStatsTest.author, post_count=0, follower_count=0
+        )
+        self.assertStats(
+            AuthorStatsTest.reader, comment_count=0, following_count=0
+        )
+
+    def test_rebuild_command(self):
+        """Команда rebuild_author_stats восстанавливает счётчики."""
+        Post.objects.create(author=AuthorStatsTest.author, text="Пост 1")
+        Post.objects.create(author=AuthorStatsTest.author, text="Пост 2")
+        AuthorStats.objects.update(post_count=100)
+        call_command("rebuild_author_stats", stdout=StringIO())
+        self.assertStats(AuthorStatsTest.author, post_count=2)
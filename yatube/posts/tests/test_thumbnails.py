@@ -0,0 +1,103 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import feed_cache, thumbnails
+from posts.models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b"\x47\x49\x46\x38\x39\x61\x02\x00"
+    b"\x01\x00\x80\x00\x00\x00\x00\x00"
+    b"\xFF\xFF\xFF\x21\xF9\x04\x00\x00"
+    b"\x00\x00\x00\x2C\x00\x00\x00\x00"
+    b"\x02\x00\x01\x00\x00\x02\x02\x0C"
+    b"\x0A\x00\x3B"
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailsTest(TestCase):
+    """Миниатюры строятся заранее, а страница их только читает."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="auth")
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text="Пост с картинкой",
+            image=SimpleUploadedFile(
+                name="small.gif", content=SMALL_GIF, content_type="image/gif"
+            ),
+        )
+        cls.guest = Client()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_page_shows_placeholder_until_ready(self):
+        """До построения миниатюры страница не строит её сама."""
+        url = reverse(
+            "posts:post_detail", kwargs={"post_id": ThumbnailsTest.post.pk}
+        )
+        response = ThumbnailsTest.guest.get(url)
+        self.assertContains(response, "bg-light")
+        self.assertIsNone(thumbnails.cached(ThumbnailsTest.post.image))
+        thumbnails.generate(ThumbnailsTest.post.image.name)
+        feed_cache.invalidate()
+        thumbnail = thumbnails.cached(ThumbnailsTest.post.image)
+        self.assertIsNotNone(thumbnail)
+        response = ThumbnailsTest.guest.get(url)
+        self.assertContains(response, thumbnail.url)
+
+    @override_settings(POST_IMAGE_WIDTHS=(1, 2, 4))
+    def test_image_variants_in_srcset(self):
+        """Копии картинки записаны в базу и попадают в srcset."""
+        thumbnails.process(
+            ThumbnailsTest.post.pk, ThumbnailsTest.post.image.name
+        )
+        variants = list(ThumbnailsTest.post.image_variants.all())
+        self.assertEqual([variant.width for variant in variants], [1, 2])
+        for variant in variants:
+            with self.subTest(width=variant.width):
+                self.assertEqual(variant.format, "WEBP")
+                self.assertEqual(variant.size, variant.file.size)
+        response = ThumbnailsTest.guest.get(reverse("posts:index"))
+        self.assertContains(response, f"{variants[-1].file.url} 2w")
+        self.assertContains(response, '<source type="image/webp"')
+        thumbnail = thumbnails.cached(ThumbnailsTest.post.image)
+        self.assertTrue(thumbnail.url.endswith(".jpg"))
+        self.assertContains(
+            response, f'<img class="card-img my-2" src="{thumbnail.url}"'
+        )
+
+    def test_backfill_processes_pending_posts(self):
+        """Картинки, сохранённые мимо schedule(), обрабатывает команда."""
+        broken = Post.objects.create(
+            author=ThumbnailsTest.user, text="Без файла", image="posts/no.gif"
+        )
+        self.assertEqual(
+            set(thumbnails.pending()), {ThumbnailsTest.post, broken}
+        )
+        out = StringIO()
+        call_command("process_images", stdout=out)
+        self.assertIn("Обработано картинок: 1, ошибок: 1", out.getvalue())
+        self.assertEqual(list(thumbnails.pending()), [broken])
+        self.assertIsNotNone(thumbnails.cached(ThumbnailsTest.post.image))
+        variant = ThumbnailsTest.post.image_variants.get()
+        self.assertEqual(variant.format, "WEBP")
+        response = ThumbnailsTest.guest.get(reverse("posts:index"))
+        self.assertContains(response, variant.file.url)
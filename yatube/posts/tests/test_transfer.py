@@ -0,0 +1,152 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import TestCase
+
+from core.bulk import insert_rows
+from .. import transfer
+from ..models import Comment, Follow, Group, Post, TimelineEntry, User
+
+
+class TransferTest(TestCase):
+    """Проверка выгрузки и загрузки содержимого."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username="author", password="secret"
+        )
+        cls.reader = User.objects.create_user(username="reader")
+        cls.group = Group.objects.create(
+            title="Группа", slug="group", description="Описание"
+        )
+        cls.post = Post.objects.create(
+            text="Пост", author=cls.author, group=cls.group
+        )
+        cls.comment = Comment.objects.create(
+            post=cls.post, author=cls.reader, text="Вопрос"
+        )
+        reply = Comment(post=cls.post, author=cls.author, text="Ответ")
+        reply.set_parent(cls.comment)
+        reply.save()
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, "content.ndjson.gz")
+
+    def snapshot(self):
+        return (
+            sorted(
+                Post.objects.values_list(
+                    "text", "author__username", "group__slug", "pub_date"
+                )
+            ),
+            list(
+                Comment.objects.order_by("path").values_list(
+                    "text", "author__username", "depth", "parent__text"
+                )
+            ),
+            sorted(
+                Follow.objects.values_list(
+                    "user__username", "author__username"
+                )
+            ),
+        )
+
+    def test_round_trip(self):
+        """После загрузки в пустую базу содержимое то же, что выгружено."""
+        before = self.snapshot()
+        exported = transfer.export(self.path)
+        self.assertEqual(exported["posts.post"]["rows"], 1)
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        imported = transfer.load(self.path)
+        self.assertEqual(imported["posts.comment"]["rows"], 2)
+        self.assertEqual(self.snapshot(), before)
+        self.assertTrue(
+            User.objects.get(username="author").check_password("secret")
+        )
+        self.assertEqual(TimelineEntry.objects.count(), 1)
+        self.assertFalse(os.path.exists(f"{self.path}.checkpoint"))
+
+    def test_import_next_to_existing_content(self):
+        """Новые id не пересекаются со старыми, пользователи не дублируются."""
+        transfer.export(self.path)
+        transfer.load(self.path)
+        self.assertEqual(User.objects.count(), 2)
+        self.assertEqual(Group.objects.count(), 1)
+        self.assertEqual(Post.objects.filter(author=self.author).count(), 2)
+        self.assertEqual(Follow.objects.count(), 1)
+        new_reply = Comment.objects.exclude(
+            post=self.post
+        ).get(parent__isnull=False)
+        self.assertTrue(new_reply.path.startswith(new_reply.parent.path))
+        self.assertNotEqual(new_reply.parent, self.comment)
+
+    def test_resume_from_checkpoint(self):
+        """Прерванная загрузка продолжается без дублей."""
+        transfer.export(self.path)
+        User.objects.all().delete()
+        Group.objects.all().delete()
+
+        def failing_insert(*args, **kwargs):
+            if args[0] is Comment:
+                raise OSError("диск заполнен")
+            insert_rows(*args, **kwargs)
+
+        with mock.patch.object(transfer, "insert_rows", failing_insert):
+            with self.assertRaises(OSError):
+                transfer.load(self.path, batch_size=1)
+        self.assertTrue(os.path.exists(f"{self.path}.checkpoint"))
+        self.assertEqual(Post.objects.count(), 1)
+        transfer.load(self.path, batch_size=1)
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertEqual(Comment.objects.count(), 2)
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_resume_after_unsaved_checkpoint(self):
+        """Пачка, записанная до сбоя, при повторе не записывается снова."""
+        transfer.export(self.path)
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        save_state = transfer.Importer.save_state
+
+        def failing_save(importer):
+            if Post.objects.exists():
+                raise OSError("диск заполнен")
+            save_state(importer)
+
+        with mock.patch.object(transfer.Importer, "save_state", failing_save):
+            with self.assertRaises(OSError):
+                transfer.load(self.path, batch_size=1)
+        self.assertEqual(Post.objects.count(), 1)
+        transfer.load(self.path, batch_size=1)
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertEqual(Comment.objects.count(), 2)
+
+    def test_taken_id_fails(self):
+        """Строка, занявшая загружаемый id, останавливает загрузку."""
+        transfer.export(self.path)
+        load_state = transfer.Importer.load_state
+
+        def live_write(importer, header):
+            load_state(importer, header)
+            offset = importer.state["offsets"]["posts.post"]
+            Post.objects.create(
+                pk=offset + self.post.pk, author=self.reader, text="Живой"
+            )
+
+        with mock.patch.object(transfer.Importer, "load_state", live_write):
+            with self.assertRaisesMessage(ValueError, "остановленном"):
+                transfer.load(self.path)
+        self.assertEqual(Post.objects.filter(author=self.author).count(), 1)
+
+    def test_not_an_export(self):
+        with open(self.path.replace(".gz", ""), "w") as file:
+            file.write('{"model": "posts.post"}\n')
+        with self.assertRaises(ValueError):
+            transfer.load(self.path.replace(".gz", ""))
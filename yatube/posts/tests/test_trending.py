@@ -0,0 +1,87 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import follows, trending, write_batch
+from ..models import Comment, Post, PostScore, User
+
+
+class TrendingTest(TestCase):
+    """Проверка оценок популярных постов и страницы популярного."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author")
+        cls.star = User.objects.create_user(username="star")
+        cls.reader = User.objects.create_user(username="reader")
+        cls.older = Post.objects.create(author=cls.author, text="Старый")
+        cls.newer = Post.objects.create(author=cls.author, text="Новый")
+
+    def setUp(self):
+        cache.clear()
+
+    def ranking(self):
+        response = self.client.get(reverse("posts:trending"))
+        return [post.pk for post in response.context["page_obj"]]
+
+    def scores(self):
+        return dict(PostScore.objects.values_list("post", "score"))
+
+    def test_comments_and_followers_raise_posts(self):
+        self.assertEqual(self.ranking(), [self.newer.pk, self.older.pk])
+        Comment.objects.create(
+            post=self.older, author=self.reader, text="Комментарий"
+        )
+        self.assertEqual(self.ranking(), [self.older.pk, self.newer.pk])
+        starred = Post.objects.create(author=self.star, text="Звезда")
+        for i in range(30):
+            fan = User.objects.create_user(username=f"fan{i}")
+            follows.follow(fan.pk, self.star.pk)
+        self.assertEqual(self.ranking()[0], starred.pk)
+
+    def test_batched_comments_counted(self):
+        write_batch.flush(
+            [
+                Comment(post=self.older, author=self.reader, text=str(i))
+                for i in range(3)
+            ]
+        )
+        self.assertGreater(
+            self.scores()[self.older.pk], self.scores()[self.newer.pk] + 1
+        )
+
+    def test_rebuild_matches_incremental(self):
+        Comment.objects.create(
+            post=self.older, author=self.reader, text="Комментарий"
+        )
+        follows.follow(self.reader.pk, self.author.pk)
+        before = self.scores()
+        self.assertEqual(trending.rebuild(), 2)
+        after = self.scores()
+        for post_id, score in before.items():
+            self.assertAlmostEqual(after[post_id], score, places=3)
+
+    def test_old_posts_leave(self):
+        Post.objects.filter(pk=self.older.pk).update(
+            pub_date=timezone.now() - trending.WINDOW - timedelta(hours=1)
+        )
+        call_command("rebuild_trending", stdout=StringIO())
+        self.assertEqual(list(self.scores()), [self.newer.pk])
+        self.assertEqual(self.ranking(), [self.newer.pk])
+
+    def test_follow_changes_etag(self):
+        """Подписка не меняет поколение лент, но меняет ETag популярного."""
+        url = reverse("posts:trending")
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
+        follows.follow(self.reader.pk, self.author.pk)
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200
+        )
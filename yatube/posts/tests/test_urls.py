@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from django.test import TestCase, Client
 from http import HTTPStatus
 from posts.models import Group, Post, User
@@ -22,6 +23,9 @@ class URLTests(TestCase):
             author=cls.user, text="Тестовый пост длиннее 15 символов", pk=1
         )
 
+    def setUp(self):
+        cache.clear()
+
     def test_urls_uses_correct_template(self):
         """URL-адрес работает и шаблон соответствующий."""
         count = 0
@@ -54,6 +54,9 @@ class PostsPagesTest(TestCase):
         super().tearDownClass()
         shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
 
+    def setUp(self):
+        cache.clear()
+
     def test_pages_uses_correct_template(self):
         """URL-адрес по имени использует соответствующий шаблон."""
         templates_pages_names = {
@@ -197,11 +200,11 @@ class PostsPagesTest(TestCase):
         )
 
     def test_cache_for_index(self):
-        """У index работает кэш."""
+        """Кэш index держит страницу до изменения постов."""
         response_1 = PostsPagesTest.user_auth.get(reverse("posts:index"))
-        Post.objects.get(pk=1).delete()
+        Post.objects.filter(pk=1).update(text="Текст мимо сигналов")
         response_2 = PostsPagesTest.user_auth.get(reverse("posts:index"))
         self.assertEqual(response_1.content, response_2.content)
-        cache.clear()
+        Post.objects.get(pk=1).delete()
         response_2 = PostsPagesTest.user_auth.get(reverse("posts:index"))
         self.assertNotEqual(response_1.content, response_2.content)
@@ -0,0 +1,157 @@
+import json
+import re
+import threading
+from unittest import mock
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .. import write_batch
+from ..models import AuthorStats, Comment, Follow, Post, TimelineEntry, User
+
+
+class FlushTest(TestCase):
+    """Проверка записи пачки комментариев и подписок."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.reader = User.objects.create_user(username="reader")
+        cls.post = Post.objects.create(author=cls.author, text="Пост")
+
+    def setUp(self):
+        write_batch.metrics.reset()
+
+    def test_flush_replaces_signals(self):
+        """Пачка получает пути, счётчики и ленты, как при save()."""
+        root = Comment.objects.create(
+            post=FlushTest.post, author=FlushTest.author, text="Корень"
+        )
+        reply = Comment(
+            post=FlushTest.post, author=FlushTest.reader, text="Ответ"
+        )
+        reply.set_parent(root)
+        batch = [
+            reply,
+            Comment(post=FlushTest.post, author=FlushTest.reader, text="2"),
+            Follow(user=FlushTest.reader, author=FlushTest.author),
+            Follow(user=FlushTest.reader, author=FlushTest.author),
+        ]
+        with CaptureQueriesContext(connection) as context:
+            write_batch.flush(batch)
+        inserts = [
+            re.match(r'INSERT .*?INTO "(\w+)"', query["sql"])
+            for query in context.captured_queries
+        ]
+        tables = [insert.group(1) for insert in inserts if insert]
+        self.assertEqual(tables.count("posts_comment"), 1)
+        self.assertEqual(tables.count("posts_follow"), 2)
+        reply = Comment.objects.get(text="Ответ")
+        self.assertEqual(reply.path, root.path + f"{reply.pk:010d}")
+        self.assertEqual(reply.depth, 1)
+        self.assertFalse(Comment.objects.filter(path="").exists())
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertTrue(
+            TimelineEntry.objects.filter(
+                user=FlushTest.reader, post=FlushTest.post
+            ).exists()
+        )
+        reader = AuthorStats.objects.get(author=FlushTest.reader)
+        self.assertEqual(
+            (reader.comment_count, reader.following_count), (2, 1)
+        )
+        write_batch.flush(
+            [Follow(user=FlushTest.reader, author=FlushTest.author)]
+        )
+        author = AuthorStats.objects.get(author=FlushTest.author)
+        self.assertEqual(author.follower_count, 1)
+        snapshot = write_batch.metrics.snapshot()
+        self.assertEqual(snapshot["flushes"], 2)
+        self.assertEqual(snapshot["batch_sizes"], {4: 1, 1: 1})
+
+    @override_settings(WRITE_BATCH_REPORT_SECONDS=60)
+    def test_metrics_reported_to_log(self):
+        """Итоги пачек пишутся в лог раз в интервал и считаются заново."""
+        follow = Follow(user=FlushTest.reader, author=FlushTest.author)
+        write_batch.flush([follow])
+        write_batch.metrics.started -= 60
+        with self.assertLogs("posts.write_batch", "INFO") as logs:
+            write_batch.flush(
+                [Comment(post=FlushTest.post, author=FlushTest.reader)]
+            )
+        report = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(report["flushes"], 2)
+        self.assertEqual(report["batch_sizes"], {"1": 2})
+        self.assertEqual(write_batch.metrics.snapshot()["flushes"], 0)
+
+    def test_views_write_through_batch(self):
+        """Комментарий и подписка из запросов сохраняются."""
+        self.client.force_login(FlushTest.reader)
+        self.client.post(
+            f"/posts/{FlushTest.post.pk}/comment/", {"text": "Привет"}
+        )
+        self.client.get("/profile/author/follow/")
+        self.client.get("/profile/author/follow/")
+        self.assertTrue(Comment.objects.filter(text="Привет").exists())
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(write_batch.metrics.snapshot()["writes"], 3)
+
+
+class WriteBatcherTest(SimpleTestCase):
+    """Проверка сборки записей в пачки."""
+
+    def test_coalesces_writes(self):
+        """Записи одного окна уходят одной пачкой не больше max_size."""
+        batches = []
+        release = threading.Event()
+
+        def flush(objects):
+            release.wait(1)
+            batches.append(objects)
+
+        batcher = write_batch.WriteBatcher(flush, window=0.05, max_size=3)
+        futures = [batcher.submit(i) for i in range(5)]
+        release.set()
+        results = [future.result(1) for future in futures]
+        self.assertEqual(results, list(range(5)))
+        self.assertEqual(batches, [[0, 1, 2], [3, 4]])
+
+    def test_failed_batch_retries_one_by_one(self):
+        """Ошибка одной записи не роняет остальные записи пачки."""
+
+        def flush(objects):
+            if "bad" in objects:
+                raise ValueError("bad")
+
+        batcher = write_batch.WriteBatcher(flush, window=0.05, max_size=10)
+        good = batcher.submit("good")
+        bad = batcher.submit("bad")
+        self.assertEqual(good.result(1), "good")
+        with self.assertRaises(ValueError):
+            bad.result(1)
+
+    def test_timed_out_write_is_cancelled(self):
+        """Запись, которую не дождались, отменяется, а не пишется позже."""
+        batches = []
+        release = threading.Event()
+
+        def flush(objects):
+            release.wait(1)
+            batches.append(objects)
+
+        batcher = write_batch.WriteBatcher(flush, window=0.01, max_size=1)
+        first = batcher.submit("first")
+        patch = mock.patch.multiple(
+            write_batch,
+            RESULT_TIMEOUT=0.01,
+            use_batching=lambda: True,
+            get_batcher=lambda: batcher,
+        )
+        with patch, self.assertRaises(write_batch.WriteTimeout):
+            write_batch.save("late")
+        release.set()
+        first.result(1)
+        batcher.submit("next").result(1)
+        self.assertEqual(batches, [["first"], ["next"]])
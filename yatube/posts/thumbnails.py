@@ -0,0 +1,173 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+
+from . import feed_cache, image_variants
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+# Сколько постов backfill() берёт из базы за раз.
+BACKFILL_CHUNK_SIZE = 100
+# Миниатюра поста в лентах и на странице поста.
+FEED_GEOMETRY = "960x339"
+FEED_OPTIONS = {"crop": "center", "upscale": True}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                thread_name_prefix="thumbnails",
+            )
+    return _executor
+
+
+def generate(name) -> None:
+    """Построить миниатюру картинки `name` и записать её в kvstore."""
+    try:
+        get_thumbnail(name, FEED_GEOMETRY, **FEED_OPTIONS)
+    except Exception:
+        logger.exception("Не удалось построить миниатюру %s", name)
+
+
+def process(post_id, name, invalidate=True) -> bool:
+    """Миниатюра и копии для srcset картинки поста.
+
+    Возвращает False, если копии построить не удалось.
+    """
+    generate(name)
+    try:
+        image_variants.build(post_id, name)
+    except Exception:
+        logger.exception("Не удалось построить копии картинки %s", name)
+        return False
+    finally:
+        if invalidate:
+            feed_cache.invalidate()
+    return True
+
+
+def process_in_worker(post_id, name, invalidate=True) -> bool:
+    """process() для потока пула: закрывает его соединение с базой."""
+    try:
+        return process(post_id, name, invalidate)
+    finally:
+        connection.close()
+
+
+def use_pool() -> bool:
+    """Нужен ли фоновый пул.
+
+    Базу SQLite в памяти (тесты) потоки делят через shared cache, где
+    блокировка таблицы сразу даёт ошибку вместо ожидания, поэтому с ней
+    картинки обрабатываются в текущем потоке.
+    """
+    if not settings.THUMBNAIL_WORKERS:
+        return False
+    return not (
+        connection.vendor == "sqlite" and connection.is_in_memory_db()
+    )
+
+
+def schedule(post) -> None:
+    """Поставить обработку картинки поста в фоновый пул.
+
+    Задача уходит после фиксации транзакции, чтобы поток видел
+    сохранённый пост; без пула (см. use_pool) картинка обрабатывается
+    в текущем потоке.
+    """
+    if not post.image:
+        return
+    post_id, name = post.pk, post.image.name
+    if use_pool():
+        transaction.on_commit(
+            lambda: get_executor().submit(process_in_worker, post_id, name)
+        )
+    else:
+        transaction.on_commit(lambda: process(post_id, name))
+
+
+def pending():
+    """Посты с картинкой, у которой ещё нет копий для srcset.
+
+    Сюда попадают картинки, сохранённые мимо schedule(): из seed,
+    import_content или до появления фоновой обработки.
+    """
+    return Post.objects.exclude(image="").filter(
+        image_variants__isnull=True
+    )
+
+
+def backfill(progress=None) -> tuple:
+    """Обработать картинки всех постов из pending().
+
+    Посты берутся кусками по BACKFILL_CHUNK_SIZE и обрабатываются
+    пулом, если он есть (см. use_pool) и вызывающий не держит
+    транзакцию, которая не дала бы потокам писать. Поколение лент
+    меняется один раз в конце. Пост, картинку которого обработать
+    не удалось (например, файл ещё не перенесён), остаётся в pending()
+    до следующего запуска. Возвращает число обработанных постов и ошибок.
+    """
+    pool = use_pool() and not connection.in_atomic_block
+    done = failed = 0
+    last = 0
+    while True:
+        chunk = list(
+            pending()
+            .filter(pk__gt=last)
+            .order_by("pk")
+            .values_list("pk", "image")[:BACKFILL_CHUNK_SIZE]
+        )
+        if not chunk:
+            break
+        last = chunk[-1][0]
+        if pool:
+            results = get_executor().map(
+                lambda row: process_in_worker(*row, invalidate=False), chunk
+            )
+        else:
+            results = (process(*row, invalidate=False) for row in chunk)
+        for ok in results:
+            done += ok
+            failed += not ok
+        if progress is not None:
+            progress(f"Картинки: обработано {done}, ошибок {failed}")
+    if done:
+        feed_cache.invalidate()
+    return done, failed
+
+
+def cached(image):
+    """Готовая миниатюра из kvstore или None, если её ещё нет.
+
+    Имя миниатюры считается так же, как в ThumbnailBackend.get_thumbnail,
+    но исходная картинка не открывается и ничего не строится.
+    """
+    if not image:
+        return None
+    backend = default.backend
+    source = ImageFile(image)
+    options = dict(FEED_OPTIONS)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault("format", backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+    name = backend._get_thumbnail_filename(source, FEED_GEOMETRY, options)
+    return default.kvstore.get(ImageFile(name, default.storage))
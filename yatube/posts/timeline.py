@@ -0,0 +1,185 @@
+import heapq
+import time
+from collections import defaultdict
+from itertools import groupby, islice
+from operator import itemgetter
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F
+
+from core.bulk import insert_rows, without_index
+
+from .models import Follow, Post, TimelineEntry
+
+# Сколько последних постов автора попадает в ленту при подписке
+# и до скольких записей обрезается лента одного читателя.
+TIMELINE_LENGTH = 1000
+# Ленты подписчиков обрезаются после раскладки каждого TRIM_EVERY-го
+# поста: обрезка одной ленты проходит TIMELINE_LENGTH её записей,
+# поэтому делать её на каждый пост дорого. Между обрезками лента
+# вырастает в среднем на TRIM_EVERY записей сверх TIMELINE_LENGTH.
+TRIM_EVERY = 50
+# Поля записи ленты в порядке значений для core.bulk.insert_rows.
+FIELDS = ("user", "post", "pub_date")
+# Версия ленты читателя: пропавшая из кэша просто начинается заново.
+VERSION_TIMEOUT = 24 * 60 * 60
+
+
+def version_key(user_id) -> str:
+    return f"timeline:version:{user_id}"
+
+
+def version(user_id) -> int:
+    """Версия ленты читателя, которая меняется при каждом её изменении.
+
+    Смена версии — удаление ключа; новая версия берётся из текущего
+    времени в наносекундах и поэтому не совпадает с прежними.
+    """
+    key = version_key(user_id)
+    value = cache.get(key)
+    if value is None:
+        value = time.time_ns()
+        if not cache.add(key, value, VERSION_TIMEOUT):
+            value = cache.get(key, value)
+    return value
+
+
+def touch(user_ids) -> None:
+    """Сменить версии лент читателей `user_ids`.
+
+    Внутри транзакции версия меняется ещё раз после её фиксации,
+    как поколение лент в feed_cache.invalidate.
+    """
+    keys = [version_key(user_id) for user_id in user_ids]
+    if not keys:
+        return
+    cache.delete_many(keys)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def fan_out(post) -> None:
+    """Разложить новый пост по лентам всех подписчиков автора.
+
+    Каждый TRIM_EVERY-й по id пост заодно обрезает их ленты.
+    """
+    followers = list(
+        Follow.objects.filter(author_id=post.author_id).values_list(
+            "user_id", flat=True
+        )
+    )
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+            for user_id in followers
+        ],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+    if post.pk % TRIM_EVERY == 0:
+        for user_id in followers:
+            trim(user_id)
+    touch(followers)
+
+
+def backfill(user_id, author_id) -> None:
+    """Добавить в ленту читателя последние посты нового автора."""
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        "pk", "pub_date"
+    )[:TIMELINE_LENGTH]
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+            for pk, pub_date in posts
+        ],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+    trim(user_id)
+    touch([user_id])
+
+
+def trim(user_id) -> None:
+    """Обрезать ленту читателя до TIMELINE_LENGTH самых свежих записей."""
+    entries = TimelineEntry.objects.filter(user_id=user_id).order_by(
+        "-pub_date", "-post_id"
+    )
+    oldest_kept = list(
+        entries.values_list("pub_date", flat=True)[
+            TIMELINE_LENGTH - 1:TIMELINE_LENGTH
+        ]
+    )
+    if oldest_kept:
+        TimelineEntry.objects.filter(
+            user_id=user_id, pub_date__lt=oldest_kept[0]
+        ).delete()
+
+
+def drop(user_id, author_id) -> None:
+    """Убрать из ленты читателя посты автора, от которого он отписался."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+    touch([user_id])
+
+
+@transaction.atomic
+def rebuild(batch_size=10000) -> int:
+    """Собрать все ленты заново из подписок.
+
+    Последние TIMELINE_LENGTH постов каждого автора читаются один раз
+    по индексу (author, -pub_date), а лента читателя получается
+    слиянием уже упорядоченных списков его авторов: все посты всех
+    подписок не сортируются. Возвращает число записей в лентах.
+    """
+    recent = defaultdict(list)
+    posts = (
+        Post.objects.filter(
+            author_id__in=Follow.objects.values("author_id")
+        )
+        .order_by("author_id", "-pub_date", "-pk")
+        .values_list("author_id", "pub_date", "pk")
+    )
+    for author_id, pub_date, pk in posts.iterator(chunk_size=batch_size):
+        if len(recent[author_id]) < TIMELINE_LENGTH:
+            recent[author_id].append((pub_date, pk))
+    TimelineEntry.objects.all().delete()
+    follows = (
+        Follow.objects.order_by("user_id")
+        .values_list("user_id", "author_id")
+        .iterator(chunk_size=batch_size)
+    )
+    total = 0
+    rows = []
+    # Записи идут по читателям, а посты в них вразнобой.
+    with without_index(TimelineEntry, "post"):
+        for user_id, pairs in groupby(follows, key=itemgetter(0)):
+            lists = [recent.get(author_id, ()) for _, author_id in pairs]
+            merged = heapq.merge(*lists, reverse=True)
+            rows.extend(
+                (user_id, pk, pub_date)
+                for pub_date, pk in islice(merged, TIMELINE_LENGTH)
+            )
+            if len(rows) >= batch_size:
+                insert_rows(TimelineEntry, FIELDS, rows)
+                total += len(rows)
+                rows = []
+        insert_rows(TimelineEntry, FIELDS, rows)
+    return total + len(rows)
+
+
+def feed(user):
+    """Посты ленты подписок в порядке записей материализованной ленты.
+
+    Сортировать нужно по (-feed_date, -feed_post): оба поля берутся
+    из индекса (user, -pub_date, -post) записей ленты.
+    """
+    return (
+        Post.objects.filter(timeline_entries__user=user)
+        .annotate(
+            feed_date=F("timeline_entries__pub_date"),
+            feed_post=F("timeline_entries__post"),
+        )
+        .for_feed()
+    )
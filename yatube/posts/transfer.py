@@ -0,0 +1,464 @@
+"""Выгрузка и загрузка пользователей, групп, постов, комментариев и подписок.
+
+Формат — JSON по объекту на строку в виде dumpdata: первая строка —
+заголовок с числом объектов каждой модели, дальше объекты моделей
+в порядке MODELS, каждой — по возрастанию pk, так что всё, на что
+ссылается строка, встречается в файле раньше неё. Файл с расширением
+.gz, .bz2 или .xz сжимается. Картинки постов выгружаются только
+путями: каталог media переносится отдельно.
+
+При загрузке к id каждой модели прибавляется наибольший id этой модели
+в базе на момент начала загрузки, а пользователи и группы, чьи username
+и slug в базе уже есть, сопоставляются с существующими. Так замена
+старых id новыми не требует памяти на каждую строку и вместе с номером
+последней записанной строки умещается в контрольную точку.
+
+Загружать нужно на остановленном сайте: строка, записанная во время
+загрузки, может занять id, отведённый загружаемой. Тогда загрузка
+останавливается с ошибкой, а не теряет строку и не привязывает
+к чужой строке ссылки на неё.
+"""
+import bz2
+import gzip
+import json
+import lzma
+import os
+import time
+from datetime import datetime
+from functools import partial
+
+from django.core.management.color import no_style
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from core.bulk import insert_rows
+from . import (
+    feed_cache, search, stats, thumbnails, timeline, trending,
+)
+from .models import (
+    COMMENT_PATH_STEP, Comment, Follow, Group, Post, User, comment_path_step,
+)
+from .write_batch import fill_comment_paths
+
+FORMAT = "yatube-content"
+VERSION = 1
+DEFAULT_CHUNK_SIZE = 2000
+DEFAULT_BATCH_SIZE = 5000
+# Раз в сколько строк сообщать о скорости.
+REPORT_EVERY = 50000
+# Уровень 9, который gzip берёт по умолчанию, сжимает выгрузку втрое
+# медленнее 6-го ради 6% размера и становится узким местом выгрузки.
+GZIP_LEVEL = 6
+OPENERS = {
+    ".gz": partial(gzip.open, compresslevel=GZIP_LEVEL),
+    ".bz2": bz2.open,
+    ".xz": lzma.open,
+}
+# Модели в порядке загрузки и их выгружаемые поля, кроме pk.
+MODELS = (
+    (
+        User,
+        (
+            "username", "password", "first_name", "last_name", "email",
+            "is_active", "is_staff", "is_superuser", "last_login",
+            "date_joined",
+        ),
+    ),
+    (Group, ("title", "slug", "description")),
+    (Post, ("text", "author", "group", "image", "pub_date")),
+    (
+        Comment,
+        ("post", "author", "parent", "text", "path", "depth", "pub_date"),
+    ),
+    (Follow, ("user", "author")),
+)
+# Поля, по которым загружаемая строка совпадает с уже имеющейся.
+NATURAL_KEYS = {User: "username", Group: "slug"}
+# Строки, которые после замены id повторяют имеющиеся по этим полям,
+# не загружаются: на них ничто не ссылается.
+DUPLICATE_KEYS = {Follow: ("user", "author")}
+
+
+def open_file(path, mode):
+    """Открыть файл выгрузки как текст, сжатый по расширению или нет."""
+    opener = OPENERS.get(os.path.splitext(path)[1], open)
+    return opener(path, mode + "t", encoding="utf-8")
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} не сериализуется")
+
+
+def dumps(record) -> str:
+    return json.dumps(record, ensure_ascii=False, default=_encode) + "\n"
+
+
+class Meter:
+    """Счётчик строк одной модели с отчётом о скорости."""
+
+    def __init__(self, label, total, progress):
+        self.label = label
+        self.total = total
+        self.progress = progress
+        self.done = 0
+        self.reported = 0
+        self.started = time.perf_counter()
+
+    @property
+    def seconds(self) -> float:
+        return time.perf_counter() - self.started
+
+    def report(self) -> None:
+        self.reported = self.done
+        if self.progress is None:
+            return
+        rate = self.done / self.seconds if self.seconds else 0
+        self.progress(
+            f"{self.label}: {self.done}/{self.total}, {rate:.0f} строк/с"
+        )
+
+    def add(self, count) -> None:
+        self.done += count
+        if self.done - self.reported >= REPORT_EVERY:
+            self.report()
+
+    def finish(self, results) -> None:
+        self.report()
+        results[self.label] = {
+            "rows": self.done,
+            "seconds": round(self.seconds, 2),
+        }
+
+
+def summary(results) -> list:
+    """Строки отчёта: число строк и скорость по моделям и в сумме."""
+    lines = []
+    for label, result in results.items():
+        rate = result["rows"] / result["seconds"] if result["seconds"] else 0
+        lines.append(
+            f"{label}: {result['rows']} строк за {result['seconds']:.1f} с, "
+            f"{rate:.0f} строк/с"
+        )
+    rows = sum(result["rows"] for result in results.values())
+    seconds = sum(result["seconds"] for result in results.values())
+    lines.append(
+        f"Всего {rows} строк за {seconds:.1f} с, "
+        f"{rows / seconds if seconds else 0:.0f} строк/с."
+    )
+    return lines
+
+
+def export(path, chunk_size=DEFAULT_CHUNK_SIZE, progress=None) -> dict:
+    """Выгрузить все объекты MODELS в `path`.
+
+    Строки читаются iterator(chunk_size) в одной транзакции, поэтому
+    память не растёт с размером базы, а на SQLite выгрузка видит
+    базу на один момент. Возвращает число строк и время по моделям.
+    """
+    results = {}
+    with transaction.atomic(), open_file(path, "w") as file:
+        counts = {
+            model._meta.label_lower: model.objects.count()
+            for model, _ in MODELS
+        }
+        file.write(
+            dumps(
+                {
+                    "format": FORMAT,
+                    "version": VERSION,
+                    "exported": timezone.now(),
+                    "counts": counts,
+                }
+            )
+        )
+        for model, fields in MODELS:
+            label = model._meta.label_lower
+            meter = Meter(label, counts[label], progress)
+            rows = (
+                model.objects.order_by("pk")
+                .values_list("pk", *fields)
+                .iterator(chunk_size=chunk_size)
+            )
+            for pk, *values in rows:
+                file.write(
+                    dumps(
+                        {
+                            "model": label,
+                            "pk": pk,
+                            "fields": dict(zip(fields, values)),
+                        }
+                    )
+                )
+                meter.add(1)
+            meter.finish(results)
+    return results
+
+
+class Importer:
+    """Загрузка выгрузки пачками с контрольной точкой после каждой."""
+
+    def __init__(self, path, checkpoint, batch_size, progress):
+        self.path = path
+        self.checkpoint = checkpoint
+        self.batch_size = batch_size
+        self.progress = progress
+        self.models = {
+            model._meta.label_lower: (model, fields)
+            for model, fields in MODELS
+        }
+        self.state = None
+        # Первая пачка после контрольной точки могла быть записана
+        # до сбоя, но не отмечена в ней.
+        self.replay = False
+
+    def load_state(self, header) -> None:
+        """Продолжить с контрольной точки или начать заново."""
+        if os.path.exists(self.checkpoint):
+            with open(self.checkpoint) as file:
+                state = json.load(file)
+            if state["header"] != header:
+                raise ValueError(
+                    f"Контрольная точка {self.checkpoint} относится "
+                    f"к другой выгрузке."
+                )
+            state["existing"] = {
+                label: {int(old): new for old, new in mapping.items()}
+                for label, mapping in state["existing"].items()
+            }
+            self.state = state
+            self.replay = True
+            return
+        self.state = {
+            "header": header,
+            "line": 0,
+            "offsets": {
+                label: model.objects.aggregate(top=Max("pk"))["top"] or 0
+                for label, (model, _) in self.models.items()
+            },
+            "existing": {
+                model._meta.label_lower: {} for model in NATURAL_KEYS
+            },
+        }
+        # Смещения запоминаются до первой пачки: после сбоя они
+        # считались бы уже с учётом записанных строк.
+        self.save_state()
+
+    def save_state(self) -> None:
+        temporary = self.checkpoint + ".tmp"
+        with open(temporary, "w") as file:
+            json.dump(self.state, file)
+        os.replace(temporary, self.checkpoint)
+
+    def new_id(self, label, old):
+        if old is None:
+            return None
+        existing = self.state["existing"].get(label, {})
+        return existing.get(old, old + self.state["offsets"][label])
+
+    def new_path(self, path) -> str:
+        """Путь комментария с заменой id каждого предка на новый."""
+        offset = self.state["offsets"][Comment._meta.label_lower]
+        return "".join(
+            comment_path_step(int(path[i:i + COMMENT_PATH_STEP]) + offset)
+            for i in range(0, len(path), COMMENT_PATH_STEP)
+        )
+
+    def converters(self, model, fields) -> list:
+        """Функции, превращающие выгруженное значение поля в новое."""
+        result = []
+        for name in fields:
+            field = model._meta.get_field(name)
+            if field.is_relation:
+                label = field.related_model._meta.label_lower
+
+                def convert(value, label=label):
+                    return self.new_id(label, value)
+
+                result.append(convert)
+            elif model is Comment and name == "path":
+                result.append(self.new_path)
+            else:
+                result.append(None)
+        return result
+
+    def match_existing(self, label, model, records) -> list:
+        """Сопоставить строки с имеющимися по NATURAL_KEYS.
+
+        Возвращает строки, которых в базе ещё нет.
+        """
+        key = NATURAL_KEYS[model]
+        found = dict(
+            model.objects.filter(
+                **{f"{key}__in": [r["fields"][key] for r in records]}
+            ).values_list(key, "pk")
+        )
+        existing = self.state["existing"][label]
+        fresh = []
+        for record in records:
+            pk = found.get(record["fields"][key])
+            if pk is None:
+                fresh.append(record)
+            else:
+                existing[record["pk"]] = pk
+        return fresh
+
+    def without_duplicates(self, model, fields, rows) -> list:
+        """Строки без тех, что уже есть в базе по DUPLICATE_KEYS."""
+        names = DUPLICATE_KEYS[model]
+        indexes = [fields.index(name) + 1 for name in names]
+        found = set(
+            model.objects.filter(
+                **{f"{names[0]}__in": {row[indexes[0]] for row in rows}}
+            ).values_list(*names)
+        )
+        return [
+            row for row in rows
+            if tuple(row[index] for index in indexes) not in found
+        ]
+
+    def unwritten(self, label, model, rows) -> list:
+        """Строки повторяемой пачки, которые до сбоя не были записаны.
+
+        Пачка пишется одной транзакцией, поэтому её новые id заняты
+        либо все, либо ни один; иначе их заняли чужие строки.
+        """
+        if not rows:
+            return rows
+        ids = [row[0] for row in rows]
+        written = model.objects.filter(
+            pk__range=(min(ids), max(ids))
+        ).count()
+        if written == 0:
+            return rows
+        if written == len(rows):
+            return []
+        raise ValueError(
+            f"{label}: id {min(ids)}–{max(ids)} заняты другими строками. "
+            f"Загрузку нужно вести на остановленном сайте."
+        )
+
+    def flush(self, label, records, line) -> None:
+        model, fields = self.models[label]
+        if model in NATURAL_KEYS:
+            records = self.match_existing(label, model, records)
+        converters = self.converters(model, fields)
+        rows = [
+            (self.new_id(label, record["pk"]),)
+            + tuple(
+                convert(record["fields"][name]) if convert else
+                record["fields"][name]
+                for name, convert in zip(fields, converters)
+            )
+            for record in records
+        ]
+        try:
+            with transaction.atomic():
+                if model in DUPLICATE_KEYS:
+                    rows = self.without_duplicates(model, fields, rows)
+                if self.replay:
+                    rows = self.unwritten(label, model, rows)
+                insert_rows(model, (model._meta.pk.name,) + fields, rows)
+        except IntegrityError as error:
+            raise ValueError(
+                f"{label}: строка с загружаемым id уже есть в базе ({error}). "
+                f"Загрузку нужно вести на остановленном сайте."
+            ) from error
+        self.replay = False
+        self.state["line"] = line
+        self.save_state()
+
+    def read_header(self, file) -> dict:
+        header = json.loads(file.readline() or "{}")
+        if header.get("format") != FORMAT:
+            raise ValueError(f"{self.path} — не выгрузка {FORMAT}.")
+        if header.get("version") != VERSION:
+            raise ValueError(
+                f"Версия выгрузки {header.get('version')} "
+                f"не поддерживается."
+            )
+        return header
+
+    def batches(self, file):
+        """Пачки (модель, строки, номер последней строки) после
+        контрольной точки; в пачке — строки одной модели."""
+        label, batch = None, []
+        for line, text in enumerate(file, 1):
+            if line <= self.state["line"]:
+                continue
+            record = json.loads(text)
+            if record["model"] != label:
+                if batch:
+                    yield label, batch, line - 1
+                    batch = []
+                label = record["model"]
+                if label not in self.models:
+                    raise ValueError(f"Неизвестная модель {label}.")
+            batch.append(record)
+            if len(batch) >= self.batch_size:
+                yield label, batch, line
+                batch = []
+        if batch:
+            yield label, batch, line
+
+    def load_batches(self, file, header) -> dict:
+        results, meter = {}, None
+        for label, batch, line in self.batches(file):
+            if meter is None or meter.label != label:
+                if meter is not None:
+                    meter.finish(results)
+                meter = Meter(
+                    label, header["counts"].get(label), self.progress
+                )
+            self.flush(label, batch, line)
+            meter.add(len(batch))
+        if meter is not None:
+            meter.finish(results)
+        return results
+
+    def run(self) -> dict:
+        with open_file(self.path, "r") as file:
+            header = self.read_header(file)
+            self.load_state(header)
+            results = self.load_batches(file, header)
+        self.finish()
+        os.remove(self.checkpoint)
+        return results
+
+    def finish(self) -> None:
+        """Сдвинуть последовательности id и достроить производные данные."""
+        sequences = connection.ops.sequence_reset_sql(
+            no_style(), [model for model, _ in MODELS]
+        )
+        with connection.cursor() as cursor:
+            for sql in sequences:
+                cursor.execute(sql)
+        fill_comment_paths()
+        timeline.rebuild()
+        stats.rebuild()
+        trending.rebuild()
+        search.get_backend().rebuild()
+        # Картинки, чьи файлы ещё не перенесены в media, останутся
+        # для команды process_images.
+        thumbnails.backfill()
+        feed_cache.invalidate()
+
+
+def load(
+    path, checkpoint=None, batch_size=DEFAULT_BATCH_SIZE, progress=None
+) -> dict:
+    """Загрузить выгрузку `path`, продолжая с контрольной точки.
+
+    Контрольная точка (по умолчанию `<path>.checkpoint`) обновляется
+    после каждой записанной пачки и удаляется после успешной загрузки;
+    если она есть, загрузка продолжается с неё. Возвращает число строк
+    и время по моделям. Сигналы моделей не отправляются: ленты,
+    счётчики и поисковый индекс достраиваются в конце. Сайт на время
+    загрузки нужно остановить, см. описание модуля.
+    """
+    importer = Importer(
+        path, checkpoint or f"{path}.checkpoint", batch_size, progress
+    )
+    return importer.run()
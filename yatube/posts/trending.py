@@ -0,0 +1,178 @@
+"""Популярные посты: оценка по комментариям и подписчикам автора.
+
+Публикация поста, комментарий к нему и новый подписчик автора
+прибавляют к оценке поста свой вес, который вдвое уменьшается
+за каждые HALF_LIFE. Хранится не сама сумма, а её двоичный логарифм,
+приведённый к моменту EPOCH: событие весом `w` в момент `t` даёт
+log2(w) + (t - EPOCH) / HALF_LIFE. Со временем все оценки падают
+одинаково, поэтому порядок постов меняют только новые события,
+и каждое из них — один UPDATE строк PostScore, а страницу самых
+популярных отдаёт индекс по оценке. Удаление комментария или подписки
+оценку не уменьшает: её пересчитывает с нуля rebuild()
+(команда rebuild_trending), которая заодно убирает старые строки.
+"""
+import math
+import time
+from datetime import datetime, timedelta
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Greatest, Least, Log, Power
+from django.utils import timezone
+
+from core.bulk import insert_rows
+from core.paginator import CursorPaginator
+from .models import AuthorStats, Comment, Post, PostScore
+
+EPOCH = datetime(2021, 1, 1, tzinfo=timezone.utc)
+HALF_LIFE = timedelta(hours=12)
+POST_WEIGHT = 1.0
+COMMENT_WEIGHT = 1.0
+# Вес одного подписчика автора: при публикации поста учитываются
+# все подписчики, новая подписка прибавляется к свежим постам автора.
+FOLLOWER_WEIGHT = 0.1
+# В популярном — посты с оценкой не ниже публикации WINDOW назад;
+# новые подписчики прибавляются только постам моложе WINDOW.
+WINDOW = timedelta(days=3)
+VERSION_KEY = "trending:version"
+# Как часто меняется ETag страницы, даже если событий не было:
+# посты старше WINDOW уходят из популярного сами.
+STATE_SECONDS = 10 * 60
+BATCH_SIZE = 5000
+
+
+def event_score(when, weight) -> float:
+    """Оценка одного события весом `weight` в момент `when`."""
+    return math.log2(weight) + (when - EPOCH) / HALF_LIFE
+
+
+def combine(first, second) -> float:
+    """Оценка суммы двух событий по их оценкам."""
+    high, low = max(first, second), min(first, second)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+def _combined(score):
+    """Выражение для UPDATE: оценка строки вместе с событием `score`."""
+    value = Value(score, output_field=FloatField())
+    high = Greatest(F("score"), value)
+    low = Least(F("score"), value)
+    return high + Log(2, Power(2, low - high) + 1)
+
+
+def floor(now=None) -> float:
+    """Наименьшая оценка поста в популярном."""
+    return event_score((now or timezone.now()) - WINDOW, POST_WEIGHT)
+
+
+def add(post_id, when, weight) -> None:
+    """Прибавить к оценке поста событие одним UPDATE.
+
+    Строка создаётся, если её ещё нет, как в stats.bump.
+    """
+    score = event_score(when, weight)
+    posts = PostScore.objects.filter(post_id=post_id)
+    if posts.update(score=_combined(score)):
+        return
+    try:
+        with transaction.atomic():
+            PostScore.objects.create(post_id=post_id, score=score)
+    except IntegrityError:
+        posts.update(score=_combined(score))
+
+
+def post_published(post) -> None:
+    followers = (
+        AuthorStats.objects.filter(author_id=post.author_id)
+        .values_list("follower_count", flat=True)
+        .first()
+    )
+    add(
+        post.pk,
+        post.pub_date,
+        POST_WEIGHT + FOLLOWER_WEIGHT * (followers or 0),
+    )
+
+
+def comments_added(post_counts, when=None) -> None:
+    """Учесть комментарии: {id поста: число новых комментариев}."""
+    when = when or timezone.now()
+    for post_id, count in post_counts.items():
+        add(post_id, when, COMMENT_WEIGHT * count)
+
+
+def follower_added(author_id) -> int:
+    """Прибавить нового подписчика к постам автора моложе WINDOW."""
+    now = timezone.now()
+    updated = PostScore.objects.filter(
+        post__author_id=author_id, post__pub_date__gte=now - WINDOW
+    ).update(score=_combined(event_score(now, FOLLOWER_WEIGHT)))
+    if updated:
+        # Подписка не меняет поколение лент, а порядок популярного —
+        # меняет, поэтому ETag страницы учитывает её отдельно.
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.add(VERSION_KEY, 1, None)
+    return updated
+
+
+def state(request) -> tuple:
+    """Состояние популярного, которое не отражено в поколении лент."""
+    return cache.get(VERSION_KEY, 0), int(time.time() // STATE_SECONDS)
+
+
+def get_page(request, per_page):
+    """Страница популярных постов по `?cursor=`, от самых популярных."""
+    posts = (
+        Post.objects.for_feed()
+        .filter(trending__score__gte=floor())
+        .annotate(score=F("trending__score"))
+    )
+    paginator = CursorPaginator(posts, per_page, ordering=("-score", "-pk"))
+    return paginator.get_page(request.GET.get("cursor"))
+
+
+@transaction.atomic
+def rebuild(now=None, batch_size=BATCH_SIZE) -> int:
+    """Пересчитать оценки с нуля по постам и комментариям моложе WINDOW.
+
+    Подписчики автора учитываются на момент пересчёта, как если бы
+    все они были у автора уже при публикации поста.
+    """
+    since = (now or timezone.now()) - WINDOW
+    followers = dict(
+        AuthorStats.objects.filter(follower_count__gt=0).values_list(
+            "author_id", "follower_count"
+        )
+    )
+    scores = {}
+
+    def push(post_id, when, weight):
+        score = event_score(when, weight)
+        if post_id in scores:
+            score = combine(scores[post_id], score)
+        scores[post_id] = score
+
+    posts = Post.objects.filter(pub_date__gte=since).values_list(
+        "pk", "author_id", "pub_date"
+    )
+    for post_id, author_id, pub_date in posts.iterator():
+        push(
+            post_id,
+            pub_date,
+            POST_WEIGHT + FOLLOWER_WEIGHT * followers.get(author_id, 0),
+        )
+    comments = Comment.objects.filter(pub_date__gte=since).values_list(
+        "post_id", "pub_date"
+    )
+    for post_id, pub_date in comments.iterator():
+        push(post_id, pub_date, COMMENT_WEIGHT)
+    PostScore.objects.all().delete()
+    rows = list(scores.items())
+    for start in range(0, len(rows), batch_size):
+        insert_rows(
+            PostScore, ("post", "score"), rows[start:start + batch_size]
+        )
+    return len(rows)
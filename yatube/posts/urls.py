@@ -5,6 +5,7 @@ app_name = "posts"
 
 urlpatterns = [
     path("", views.index, name="index"),
+    path("trending/", views.trending_posts, name="trending"),
     path("group/<slug:slug>/", views.group_posts, name="group_posts"),
     path("profile/<str:username>/", views.profile, name="profile"),
     path("posts/<int:post_id>/", views.post_detail, name="post_detail"),
@@ -13,7 +14,14 @@ urlpatterns = [
     path(
         "posts/<int:post_id>/comment/", views.add_comment, name="add_comment"
     ),
+    path(
+        "posts/<int:post_id>/comments/",
+        views.post_comments,
+        name="post_comments",
+    ),
     path("follow/", views.follow_index, name="follow_index"),
+    path("follow/bulk/", views.follow_many, name="follow_many"),
+    path("search/", views.search_posts, name="search"),
     path(
         "profile/<str:username>/follow/",
         views.profile_follow,
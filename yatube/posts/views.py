@@ -1,74 +1,189 @@
+from django.http import JsonResponse
 from django.shortcuts import render, get_object_or_404, redirect
-from .models import Post, Group, User, Follow
-from django.core.paginator import Paginator
+from django.urls import reverse
+from .models import Comment, Post, User, Follow
+from urllib.parse import urlencode
+
+from core.paginator import CursorPaginator, paginate
+from . import (
+    feed_cache, follows, group_cache, page_cache, search, stats, thumbnails,
+    timeline, trending, write_batch,
+)
+from .conditional import conditional_page, follow_state, timeline_state
 from .forms import CommentForm, PostForm
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.views.decorators.http import require_POST
 
 POST_PER_PAGES = 10
+COMMENTS_PER_PAGE = 20
+# «oldest» выводит ветки в порядке обхода по пути, «newest» — все
+# комментарии подряд от новых к старым.
+COMMENT_ORDERINGS = {
+    "oldest": ("path",),
+    "newest": ("-pub_date", "-pk"),
+}
+
+
+def get_comments_page(request, post_id):
+    """Порядок и страница комментариев поста по `?order=` и `?cursor=`."""
+    order = request.GET.get("order")
+    if order not in COMMENT_ORDERINGS:
+        order = "oldest"
+    comments = (
+        Comment.objects.filter(post_id=post_id)
+        .select_related("author")
+        .only(
+            "pk", "post", "parent", "path", "depth", "text", "pub_date",
+            "author__username",
+        )
+    )
+    paginator = CursorPaginator(
+        comments, COMMENTS_PER_PAGE, ordering=COMMENT_ORDERINGS[order]
+    )
+    return order, paginator.get_page(request.GET.get("cursor"))
 
 
+def write_timeout_response(request):
+    """Ответ на запись, которая не дождалась своей пачки и отменена."""
+    response = render(request, "core/503.html", status=503)
+    response["Retry-After"] = write_batch.RESULT_TIMEOUT
+    return response
+
+
+@conditional_page()
+@page_cache.cache_page_body
 def index(request) -> None:
-    posts_list = Post.objects.all()
+    posts_list = Post.objects.for_feed()
     template = "posts/index.html"
-    paginator = Paginator(posts_list, POST_PER_PAGES)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    page_obj = feed_cache.get_page(
+        request, "index", posts_list, POST_PER_PAGES
+    )
     context = {"page_obj": page_obj}
     return render(request, template, context)
 
 
+@conditional_page(trending.state)
+def trending_posts(request) -> None:
+    template = "posts/trending.html"
+    page_obj = trending.get_page(request, POST_PER_PAGES)
+    context = {"page_obj": page_obj}
+    return render(request, template, context)
+
+
+@conditional_page()
+@page_cache.cache_page_body
 def group_posts(request, slug) -> None:
     template = "posts/group_list.html"
-    group = get_object_or_404(Group, slug=slug)
-    paginator = Paginator(group.posts.all(), POST_PER_PAGES)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    group = group_cache.get_group(slug)
+    page_obj = group_cache.get_page(request, group, POST_PER_PAGES)
     context = {"page_obj": page_obj, "group": group}
     return render(request, template, context)
 
 
+@conditional_page(follow_state)
+@page_cache.cache_page_body
 def profile(request, username) -> None:
     template = "posts/profile.html"
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        User.objects.select_related("stats"), username=username
+    )
     post_list = Post.objects.filter(author=author)
-    post_count = post_list.count()
-    paginator = Paginator(post_list.all(), POST_PER_PAGES)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
-    if request.user == author:
-        owner = 1
-    else:
-        owner = 0
-    following = (
-        request.user.is_authenticated and Follow.objects.filter(
-            user=request.user, author=author).exists())
+    post_count = stats.get_for(author).post_count
+    page_obj = feed_cache.get_page(
+        request, "profile", post_list.for_feed(), POST_PER_PAGES, author.pk
+    )
     context = {
         "page_obj": page_obj,
         "post_count": post_count,
         "author": author,
-        "following": following,
-        'owner': owner,
     }
     return render(request, template, context)
 
 
+@conditional_page()
+@page_cache.cache_page_body
 def post_detail(request, post_id) -> None:
     template = "posts/post_detail.html"
-    post = get_object_or_404(Post, pk=post_id)
-    post_list = Post.objects.filter(author=post.author)
-    post_count = post_list.count()
-    post_comments = post.comments.all()
-    form = CommentForm(request.POST or None)
+    post = get_object_or_404(
+        Post.objects.select_related("author__stats", "group")
+        .prefetch_related("image_variants"),
+        pk=post_id,
+    )
+    post_count = stats.get_for(post.author).post_count
+    comment_order, comments = get_comments_page(request, post.pk)
     context = {
         "post": post,
         "post_count": post_count,
-        "comments": post_comments,
-        "form": form,
+        "comments": comments,
+        "comment_order": comment_order,
+        "form": CommentForm(),
+    }
+    return render(request, template, context)
+
+
+@conditional_page()
+def post_comments(request, post_id):
+    """Следующая порция комментариев: HTML-фрагмент или JSON.
+
+    JSON отдаётся при `?format=json`.
+    """
+    get_object_or_404(Post.objects.only("pk"), pk=post_id)
+    comment_order, comments = get_comments_page(request, post_id)
+    if request.GET.get("format") != "json":
+        context = {
+            "comments": comments,
+            "comment_order": comment_order,
+            "post_id": post_id,
+        }
+        return render(request, "includes/comment_list.html", context)
+    next_url = None
+    if comments.has_next():
+        query = urlencode({
+            "order": comment_order,
+            "cursor": comments.next_cursor,
+            "format": "json",
+        })
+        chunk_url = reverse("posts:post_comments", args=[post_id])
+        next_url = f"{chunk_url}?{query}"
+    return JsonResponse({
+        "comments": [
+            {
+                "id": comment.pk,
+                "parent": comment.parent_id,
+                "depth": comment.depth,
+                "author": comment.author.username,
+                "text": comment.text,
+                "pub_date": comment.pub_date.isoformat(),
+            }
+            for comment in comments
+        ],
+        "next": next_url,
+    })
+
+
+def search_posts(request):
+    template = "posts/search.html"
+    query = request.GET.get("q", "").strip()
+    page_obj = None
+    if query:
+        posts_list = search.get_backend().filter(
+            Post.objects.for_feed(), query
+        )
+        paginator = CursorPaginator(
+            posts_list, POST_PER_PAGES, ordering=search.SEARCH_ORDERING
+        )
+        page_obj = paginator.get_page(request.GET.get("cursor"))
+    context = {
+        "page_obj": page_obj,
+        "query": query,
+        "extra_query": urlencode({"q": query}) + "&",
     }
     return render(request, template, context)
 
 
 @login_required
+@transaction.atomic
 def post_create(request) -> None:
     form = PostForm(request.POST or None, files=request.FILES or None)
     if not form.is_valid():
@@ -76,6 +191,7 @@ def post_create(request) -> None:
     post = form.save(commit=False)
     post.author = request.user
     post.save()
+    thumbnails.schedule(post)
     return redirect("posts:profile", username=request.user)
 
 
@@ -96,57 +212,91 @@ def post_edit(request, post_id) -> None:
     post = form.save(commit=False)
     post.author = request.user
     post.save()
+    if "image" in form.changed_data:
+        thumbnails.schedule(post)
     return redirect("posts:post_detail", post_id=post_id)
 
 
 @login_required
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(Post.objects.only("pk"), pk=post_id)
     form = CommentForm(request.POST or None)
     if not form.is_valid():
         return redirect("posts:post_detail", post_id=post_id)
     comment = form.save(commit=False)
+    parent_id = request.POST.get("parent", "")
+    if parent_id.isdigit():
+        comment.set_parent(
+            get_object_or_404(
+                Comment.objects.only("pk", "parent", "depth"),
+                pk=parent_id,
+                post=post,
+            )
+        )
     comment.author = request.user
     comment.post = post
-    comment.save()
+    try:
+        write_batch.save(comment)
+    except write_batch.WriteTimeout:
+        return write_timeout_response(request)
     return redirect("posts:post_detail", post_id=post_id)
 
 
 @login_required
+@conditional_page(timeline_state)
 def follow_index(request):
-    followers = list(Follow.objects.filter(user=request.user))
-    authors = []
-    for follower in followers:
-        authors.append(follower.author)
-    posts_list = Post.objects.filter(author__in=authors)
+    posts_list = timeline.feed(request.user)
     template = "posts/follow.html"
-    paginator = Paginator(posts_list, POST_PER_PAGES)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(
+        request,
+        posts_list,
+        POST_PER_PAGES,
+        ordering=("-feed_date", "-feed_post"),
+        # Лента подписок одна на читателя и считается по его индексу,
+        # а шаблоны и клиенты ждут на ней обычную номерную страницу.
+        numbered=True,
+    )
     context = {"page_obj": page_obj}
     return render(request, template, context)
 
 
 @login_required
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
-    test_follow = Follow.objects.filter(
-        user=request.user,
-        author=author,
-    ).exists()
-    if author != request.user and test_follow == 0:
-        Follow.objects.create(
-            user=request.user,
-            author=author,
-        )
+    author = get_object_or_404(User.objects.only("pk"), username=username)
+    if author != request.user:
+        try:
+            write_batch.save(Follow(user=request.user, author=author))
+        except write_batch.WriteTimeout:
+            return write_timeout_response(request)
     return redirect("posts:profile", username=username)
 
 
 @login_required
 def profile_unfollow(request, username):
-    author = get_object_or_404(User, username=username)
-    Follow.objects.filter(
-        user=request.user,
-        author=author,
-    ).delete()
+    author = get_object_or_404(User.objects.only("pk"), username=username)
+    follows.unfollow(request.user.pk, author.pk)
     return redirect("posts:profile", username=username)
+
+
+@login_required
+@require_POST
+def follow_many(request):
+    """Подписаться сразу на авторов из списка `author` (имена).
+
+    Отвечает JSON с именами авторов, подписка на которых появилась.
+    """
+    usernames = request.POST.getlist("author")
+    if not usernames or len(usernames) > follows.MAX_BULK_FOLLOW:
+        return JsonResponse(
+            {"detail": f"Нужно от 1 до {follows.MAX_BULK_FOLLOW} авторов."},
+            status=400,
+        )
+    authors = dict(
+        User.objects.filter(username__in=usernames).values_list(
+            "pk", "username"
+        )
+    )
+    followed = follows.follow_many(request.user.pk, list(authors))
+    return JsonResponse(
+        {"followed": [authors[author_id] for author_id in followed]}
+    )
@@ -0,0 +1,278 @@
+"""Пакетная запись комментариев и подписок.
+
+Запросы не пишут в базу сами, а отдают запись фоновому потоку и ждут
+её фиксации. Поток копит записи WRITE_BATCH_WINDOW_MS миллисекунд (или
+до WRITE_BATCH_SIZE штук) и сохраняет пачку одной транзакцией:
+комментарии — через bulk_create, подписки — через posts.follows.
+При всплеске трафика SQLite берёт блокировку записи один раз
+на пачку, а не на каждый запрос.
+
+bulk_create не шлёт сигналов, поэтому flush() сам делает то, что
+делают обработчики из posts.signals: пути веток комментариев,
+счётчики авторов и смену поколения лент.
+
+Размеры пачек и время их записи раз в WRITE_BATCH_REPORT_SECONDS
+пишутся JSON-строкой в лог posts.write_batch.
+"""
+import json
+import logging
+import queue
+import threading
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import Future, TimeoutError
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import CharField, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Coalesce, Concat, LPad
+
+from . import feed_cache, follows, stats, trending
+from .models import COMMENT_PATH_STEP, Comment, Follow
+
+logger = logging.getLogger(__name__)
+
+# Сколько запрос ждёт фиксации своей записи, в секундах.
+RESULT_TIMEOUT = 5
+
+Write = namedtuple("Write", ["obj", "future"])
+
+
+class WriteTimeout(Exception):
+    """Запись не дождалась своей пачки за RESULT_TIMEOUT и отменена."""
+
+
+class BatchMetrics:
+    """Размеры пачек и время их записи в этом процессе."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._reset()
+
+    def _reset(self) -> None:
+        self.started = time.monotonic()
+        self.flushes = 0
+        self.writes = 0
+        self.sizes = Counter()
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, size, seconds) -> None:
+        with self._lock:
+            self.flushes += 1
+            self.writes += size
+            self.sizes[size] += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return self._snapshot()
+
+    def _snapshot(self) -> dict:
+        flushes = self.flushes or 1
+        return {
+            "seconds": round(time.monotonic() - self.started, 1),
+            "flushes": self.flushes,
+            "writes": self.writes,
+            "mean_batch": self.writes / flushes,
+            "max_batch": max(self.sizes, default=0),
+            "batch_sizes": dict(self.sizes),
+            "mean_flush_ms": self.total_seconds / flushes * 1000,
+            "max_flush_ms": self.max_seconds * 1000,
+        }
+
+    def report(self, interval) -> None:
+        """Раз в `interval` секунд записать итоги в лог и начать заново."""
+        with self._lock:
+            if not interval or time.monotonic() - self.started < interval:
+                return
+            snapshot = self._snapshot()
+            self._reset()
+        logger.info(json.dumps(snapshot))
+
+
+metrics = BatchMetrics()
+
+
+def fill_comment_paths(after=None) -> int:
+    """Достроить пути веток комментариям, сохранённым без пути.
+
+    id новых строк SQLite из bulk_create не возвращает, поэтому пути
+    достраиваются одним UPDATE по строкам без пути; родитель к этому
+    моменту должен иметь свой путь. `after` — наибольший id
+    комментария до вставки: тогда UPDATE читает по первичному ключу
+    только новые строки, а не всю таблицу.
+    """
+    parent_path = Comment.objects.filter(pk=OuterRef("parent_id")).values(
+        "path"
+    )
+    comments = Comment.objects.filter(path="")
+    if after is not None:
+        comments = comments.filter(pk__gt=after)
+    return comments.update(
+        path=Concat(
+            Coalesce(Subquery(parent_path), Value("")),
+            LPad(
+                Cast("pk", CharField()), COMMENT_PATH_STEP, Value("0")
+            ),
+            output_field=CharField(),
+        )
+    )
+
+
+def _save_comments(comments) -> None:
+    last = Comment.objects.aggregate(last=Max("pk"))["last"] or 0
+    Comment.objects.bulk_create(comments)
+    fill_comment_paths(after=last)
+    for author_id, total in Counter(c.author_id for c in comments).items():
+        stats.bump(author_id, comment_count=total)
+    trending.comments_added(Counter(c.post_id for c in comments))
+
+
+def _save_follows(objects) -> None:
+    for obj in objects:
+        follows.follow(obj.user_id, obj.author_id)
+
+
+def flush(objects) -> None:
+    """Сохранить пачку комментариев и подписок одной транзакцией."""
+    started = time.perf_counter()
+    comments = [obj for obj in objects if isinstance(obj, Comment)]
+    new_follows = [obj for obj in objects if isinstance(obj, Follow)]
+    with transaction.atomic():
+        if comments:
+            _save_comments(comments)
+            feed_cache.invalidate()
+        if new_follows:
+            _save_follows(new_follows)
+    seconds = time.perf_counter() - started
+    metrics.record(len(objects), seconds)
+    metrics.report(settings.WRITE_BATCH_REPORT_SECONDS)
+    logger.debug(
+        "Записана пачка из %d объектов за %.1f мс", len(objects),
+        seconds * 1000,
+    )
+
+
+class WriteBatcher:
+    """Фоновый поток, который собирает записи в пачки для `flush_func`."""
+
+    def __init__(self, flush_func, window, max_size):
+        self.flush_func = flush_func
+        self.window = window
+        self.max_size = max_size
+        self.queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, obj) -> Future:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="write-batch", daemon=True
+                )
+                self._thread.start()
+        future = Future()
+        self.queue.put(Write(obj, future))
+        return future
+
+    def _collect(self) -> list:
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            # Запись, которую отменил не дождавшийся её запрос, пропускается.
+            batch = [
+                write for write in self._collect()
+                if write.future.set_running_or_notify_cancel()
+            ]
+            if not batch:
+                continue
+            try:
+                self.flush_func([write.obj for write in batch])
+            except Exception:
+                logger.exception("Пачка не записана, пишем по одной")
+                self._flush_one_by_one(batch)
+            else:
+                for write in batch:
+                    write.future.set_result(write.obj)
+            finally:
+                connection.close_if_unusable_or_obsolete()
+
+    def _flush_one_by_one(self, batch) -> None:
+        for write in batch:
+            try:
+                self.flush_func([write.obj])
+            except Exception as error:
+                write.future.set_exception(error)
+            else:
+                write.future.set_result(write.obj)
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def get_batcher() -> WriteBatcher:
+    global _batcher
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = WriteBatcher(
+                flush,
+                settings.WRITE_BATCH_WINDOW_MS / 1000,
+                settings.WRITE_BATCH_SIZE,
+            )
+    return _batcher
+
+
+def use_batching() -> bool:
+    """Можно ли отдать запись фоновому потоку.
+
+    Нельзя при выключенных пачках, внутри транзакции вызывающего
+    (поток не увидит её данных) и на SQLite в памяти, где потоки
+    не ждут блокировок друг друга.
+    """
+    if not settings.WRITE_BATCH_WINDOW_MS:
+        return False
+    if connection.in_atomic_block:
+        return False
+    return not (
+        connection.vendor == "sqlite" and connection.is_in_memory_db()
+    )
+
+
+def save(obj) -> None:
+    """Записать комментарий или подписку пачкой либо сразу.
+
+    Возвращает управление после фиксации записи, чтобы следующий
+    запрос пользователя её уже видел, или бросает исключение: ошибку
+    записи либо WriteTimeout, если запись за RESULT_TIMEOUT секунд
+    не попала в пачку и потому отменена.
+    """
+    if not use_batching():
+        flush([obj])
+        return
+    future = get_batcher().submit(obj)
+    try:
+        future.result(RESULT_TIMEOUT)
+    except TimeoutError:
+        if future.cancel():
+            logger.warning("Запись %r отменена: очередь не дошла", obj)
+            raise WriteTimeout(obj)
+        # Пачка с записью уже пишется: дождаться её фиксации или ошибки.
+        future.result()
@@ -0,0 +1,22 @@
+// Подгрузка следующей порции комментариев без перезагрузки страницы.
+document.addEventListener("click", function (event) {
+  var link = event.target.closest("[data-chunk-url]");
+  if (!link) {
+    return;
+  }
+  event.preventDefault();
+  fetch(link.dataset.chunkUrl)
+    .then(function (response) {
+      if (!response.ok) {
+        throw new Error(response.statusText);
+      }
+      return response.text();
+    })
+    .then(function (html) {
+      link.insertAdjacentHTML("afterend", html);
+      link.remove();
+    })
+    .catch(function () {
+      window.location = link.href;
+    });
+});
@@ -1,5 +1,8 @@
 import os
 
+from core.caches import build_caches
+from core.databases import build_databases, build_sqlite_pragmas
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 SECRET_KEY = "dea2w_9h5kejh%*z8(e5b$ppzobo13mkbvlr33@_rc3h#y*&du"
@@ -19,16 +22,22 @@ INSTALLED_APPS = [
     "users",
     "core",
     "about",
+    "api",
 ]
 
 MIDDLEWARE = [
+    "core.middleware.ProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "core.middleware.ReplicaPinMiddleware",
+    "posts.middleware.GroupTrafficMiddleware",
+    "posts.middleware.AnonymousPageMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "posts.middleware.FragmentMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
-    "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
 ROOT_URLCONF = "yatube.urls"
@@ -36,7 +45,7 @@ TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "BACKEND": "core.template_backends.ProfiledDjangoTemplates",
         "DIRS": [TEMPLATES_DIR],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -53,13 +62,31 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "yatube.wsgi.application"
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
-    }
+# Доля запросов, для которых пишутся Server-Timing и строка
+# в лог core.profiling (0 — замеры выключены, 1 — все запросы).
+PROFILE_SAMPLE_RATE = float(os.environ.get("YATUBE_PROFILE_SAMPLE_RATE", 0))
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "core.profiling": {"handlers": ["console"], "level": "INFO"},
+        "posts.write_batch": {"handlers": ["console"], "level": "INFO"},
+    },
 }
 
+DATABASES = build_databases(os.environ, BASE_DIR)
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+
+DATABASE_ROUTERS = ["core.db_routers.PrimaryReplicaRouter"]
+
+# Сколько секунд после записи пользователь читает с основной базы.
+REPLICA_PIN_SECONDS = 5
+
+SQLITE_PRAGMAS = build_sqlite_pragmas(os.environ)
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -98,9 +125,40 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
-CACHES = {
-    "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-    }
+# Потоки, строящие миниатюры загруженных картинок; 0 — без фонового пула.
+THUMBNAIL_WORKERS = 2
+# Ширины копий картинок поста для srcset и их формат.
+POST_IMAGE_WIDTHS = (320, 640, 960)
+POST_IMAGE_VARIANT_FORMAT = "WEBP"
+POST_IMAGE_VARIANT_QUALITY = 80
+
+# Сколько секунд общий кэш (обратный прокси) может отдавать
+# анонимную страницу без перепроверки у приложения.
+PROXY_CACHE_MAX_AGE = 30
+
+# Пачки записи комментариев и подписок: сколько миллисекунд копить
+# записи и сколько их максимум в пачке; 0 — писать каждую сразу.
+WRITE_BATCH_WINDOW_MS = 5
+WRITE_BATCH_SIZE = 100
+# Раз в сколько секунд писать размеры пачек и время их записи в лог
+# posts.write_batch; 0 — не писать.
+WRITE_BATCH_REPORT_SECONDS = 60
+
+# Прогрев первых страниц популярных групп, см. posts.group_cache:
+# раз в сколько секунд (0 — не греть), сколько групп и сколько страниц.
+GROUP_WARM_INTERVAL = 30
+GROUP_WARM_GROUPS = 10
+GROUP_WARM_PAGES = 3
+
+# Поисковый индекс постов по движку основной базы,
+# см. posts.search.SearchBackend; для прочих баз — поиск подстрокой.
+SEARCH_BACKENDS = {
+    "django.db.backends.sqlite3": "posts.search.SqliteFTSBackend",
+    "django.db.backends.postgresql": "posts.search.PostgresSearchBackend",
 }
+SEARCH_BACKEND = SEARCH_BACKENDS.get(
+    DATABASES["default"]["ENGINE"], "posts.search.SimpleSearchBackend"
+)
+
+CACHES = build_caches(os.environ)
 CSRF_FAILURE_VIEW = "core.views.csrf_failure"